@@ -0,0 +1,233 @@
+import json
+import os
+import shutil
+from urllib.parse import quote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import ArtifactStore
+import CVELifecycleIndex
+
+STORE_ROOT = "analytics"
+MANIFEST_FILE = "_manifest.json"
+ROW_GROUP_SIZE = 128 * 1024
+
+# Same columns as the hand exported CSVs (Data.csv, tensorflow.csv, ...)
+EXPORT_COLUMNS = [
+    "id", "repo_name", "tag_name", "prerelease", "published_at", "cve_id", "artifact_name", "artifact_version",
+    "severity", "cvss_version", "vector_string", "base_score", "impact_score", "exploitability_score"
+]
+
+CATEGORY_COLUMNS = ["repo_name", "tag_name", "cve_id", "artifact_name", "artifact_version", "severity", "cvss_version", "vector_string"]
+NUMERIC_DTYPES = {
+    "id": "int32",
+    "prerelease": "int8",
+    "base_score": "float32",
+    "impact_score": "float32",
+    "exploitability_score": "float32",
+}
+
+# The schema only knows repos by repo_id; names come from repo_names() and are added in pandas
+EXPORT_QUERY = """
+    SELECT rr.repo_id AS id, rr.tag_name, rr.prerelease, rr.published_at,
+           m.cve_id, m.artifact_name, m.artifact_version,
+           ISNULL(h.severity, 'N/A') AS severity, ISNULL(h.cvss_version, 'N/A') AS cvss_version,
+           ISNULL(h.vector_string, 'N/A') AS vector_string, ISNULL(h.base_score, 0) AS base_score,
+           ISNULL(h.impact_score, 0) AS impact_score, ISNULL(h.exploitability_score, 0) AS exploitability_score
+    FROM Repo_Releases rr
+    JOIN CVE_Mapping m ON m.repo_id = rr.repo_id AND m.tag_name = rr.tag_name
+    LEFT JOIN CVE_History h ON h.cve_id = m.cve_id
+    WHERE rr.repo_id = ?
+"""
+
+# Every release of the repo, CVEs or not: the export rows skip clean releases and the lifecycle index needs them
+RELEASES_QUERY = """
+    SELECT rr.tag_name, rr.published_at
+    FROM Repo_Releases rr
+    WHERE rr.repo_id = ?
+"""
+
+# One checksum per (repo, tag) so a repo is only re-exported when one of its releases changed.
+# It covers the exported columns themselves, so it works whether or not an upsert has added row_hash yet
+FINGERPRINT_QUERY = """
+    SELECT rr.repo_id, rr.tag_name, COUNT(*) AS row_count,
+           CHECKSUM_AGG(BINARY_CHECKSUM(rr.prerelease, rr.published_at, m.cve_id, m.artifact_name, m.artifact_version,
+                                        h.severity, h.cvss_version, h.vector_string, h.base_score, h.impact_score,
+                                        h.exploitability_score)) AS checksum
+    FROM Repo_Releases rr
+    JOIN CVE_Mapping m ON m.repo_id = rr.repo_id AND m.tag_name = rr.tag_name
+    LEFT JOIN CVE_History h ON h.cve_id = m.cve_id
+    GROUP BY rr.repo_id, rr.tag_name
+"""
+
+def normalize_dtypes(df):
+    df = df.copy()
+    for column, dtype in NUMERIC_DTYPES.items():
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype(dtype)
+    if "published_at" in df.columns:
+        df["published_at"] = pd.to_datetime(df["published_at"], errors="coerce")
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
+
+def partition_path(root, repo_name):
+    # Hive style directory, URI-encoded since repo names contain "/"
+    return os.path.join(root, f"repo_name={quote(str(repo_name), safe='')}")
+
+def load_manifest(root=STORE_ROOT):
+    path = os.path.join(root, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(manifest, root=STORE_ROOT):
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+
+def stored_releases(repo_name, artifacts=ArtifactStore.ARTIFACT_ROOT):
+    # Release list saved by the scan, None when the repo was never scanned into the artifact store
+    try:
+        return pd.DataFrame(ArtifactStore.get(repo_name, None, "releases", artifacts), columns=["tag_name", "published_at"])
+    except (KeyError, ValueError):
+        return None
+
+def write_partitions(df, root=STORE_ROOT, releases=None, artifacts=ArtifactStore.ARTIFACT_ROOT):
+    """Writes one partition and lifecycle index per repo of `df`.
+
+    `releases` is {repo_name: DataFrame of tag_name, published_at} with every release of the repo; repos missing
+    from it take the release list stored in `artifacts`, or only the releases present in `df`.
+    """
+    df = normalize_dtypes(df)
+    releases = releases or {}
+    written = []
+    for repo_name, part in df.groupby("repo_name", observed=True, sort=False):
+        path = partition_path(root, repo_name)
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+        # Rows sorted by release so a tag filter can skip whole row groups on large repos
+        part = part.drop(columns=["repo_name"]).sort_values(["published_at", "tag_name"], kind="stable")
+        table = pa.Table.from_pandas(part, preserve_index=False)
+        pq.write_table(table, os.path.join(path, "part-0.parquet"), compression="zstd", row_group_size=ROW_GROUP_SIZE)
+        # Presence intervals for the lifecycle queries, rebuilt with the partition
+        repo_releases = releases.get(repo_name)
+        if repo_releases is None:
+            repo_releases = stored_releases(repo_name, artifacts)
+        CVELifecycleIndex.write_index(repo_name, part, root, releases=repo_releases)
+        written.append(repo_name)
+    return written
+
+def repo_names(csv_path="Data.csv"):
+    """{repo_id: repo_name} from the id / repo_name columns of a hand exported CSV, empty if there is none."""
+    if not csv_path or not os.path.exists(csv_path):
+        return {}
+    ids = pd.read_csv(csv_path, encoding="utf-8-sig", usecols=["id", "repo_name"]).drop_duplicates("id")
+    return {int(repo_id): name for repo_id, name in zip(ids["id"], ids["repo_name"])}
+
+def refresh_from_database(conn, root=STORE_ROOT, full=False, names=None):
+    """Re-export only the repos with new or changed releases since the last refresh.
+
+    `names` maps repo_id to repo_name (by default the pairs in Data.csv); unknown ids are exported as repo_<id>.
+    """
+    manifest = {} if full else load_manifest(root)
+    names = repo_names() if names is None else names
+    fingerprints = pd.read_sql(FINGERPRINT_QUERY, conn)
+
+    current, repo_ids = {}, {}
+    for row in fingerprints.sort_values(["repo_id", "tag_name"]).itertuples(index=False):
+        repo_name = names.get(int(row.repo_id), f"repo_{row.repo_id}")
+        repo_ids[repo_name] = int(row.repo_id)
+        current.setdefault(repo_name, {})[row.tag_name] = f"{row.row_count}:{row.checksum}"
+
+    for repo_name in set(manifest) - set(current):
+        shutil.rmtree(partition_path(root, repo_name), ignore_errors=True)
+
+    stale = [repo_name for repo_name, tags in current.items() if manifest.get(repo_name) != tags]
+    for repo_name in stale:
+        df = pd.read_sql(EXPORT_QUERY, conn, params=[repo_ids[repo_name]])
+        df.insert(1, "repo_name", repo_name)
+        releases = pd.read_sql(RELEASES_QUERY, conn, params=[repo_ids[repo_name]])
+        write_partitions(df[EXPORT_COLUMNS], root, releases={repo_name: releases})
+        print(f"Exported {repo_name}: {len(current[repo_name])} releases, {len(df)} rows")
+
+    save_manifest(current, root)
+    print(f"Analytics store refreshed: {len(stale)} repos exported, {len(current) - len(stale)} unchanged")
+    return stale
+
+def read_export_csv(csv_path):
+    # The hand exported CSVs carry a UTF-8 BOM on the first header
+    return normalize_dtypes(pd.read_csv(csv_path, encoding="utf-8-sig"))
+
+def import_csv(csv_path, root=STORE_ROOT):
+    df = read_export_csv(csv_path)
+    written = write_partitions(df, root)
+    print(f"Imported {csv_path}: {len(df)} rows into {len(written)} partitions")
+    return written
+
+def has_partitions(root=STORE_ROOT):
+    return os.path.isdir(root) and any(name.startswith("repo_name=") for name in os.listdir(root))
+
+def load_releases(repos=None, tags=None, columns=None, root=STORE_ROOT, csv_path=None):
+    """Load the releases x CVE table, reading only the requested columns and partitions.
+
+    Falls back to `csv_path` when the store has not been exported yet.
+    """
+    if isinstance(repos, str):
+        repos = [repos]
+    if isinstance(tags, str):
+        tags = [tags]
+
+    if not has_partitions(root):
+        if csv_path is None:
+            raise FileNotFoundError(f"No analytics store found at {root}")
+        df = read_export_csv(csv_path)
+        if repos is not None:
+            df = df[df["repo_name"].isin(repos)]
+        if tags is not None:
+            df = df[df["tag_name"].isin(tags)]
+        return df[columns].reset_index(drop=True) if columns else df.reset_index(drop=True)
+
+    partitioning = ds.partitioning(pa.schema([("repo_name", pa.string())]), flavor="hive")
+    dataset = ds.dataset(root, format="parquet", partitioning=partitioning, exclude_invalid_files=True)
+
+    condition = None
+    if repos is not None:
+        condition = ds.field("repo_name").isin(repos)
+    if tags is not None:
+        tag_condition = ds.field("tag_name").isin(tags)
+        condition = tag_condition if condition is None else condition & tag_condition
+
+    df = dataset.to_table(columns=columns, filter=condition).to_pandas()
+    if "repo_name" in df.columns:
+        df["repo_name"] = df["repo_name"].astype("category")
+    return df
+
+def rebuild_lifecycle(repos=None, root=STORE_ROOT, artifacts=ArtifactStore.ARTIFACT_ROOT):
+    """Lifecycle indexes of already exported partitions, for stores written before the index existed.
+
+    The partitions only hold releases with CVEs; the clean ones come from the release lists stored in `artifacts`.
+    """
+    df = load_releases(repos, columns=["repo_name", "tag_name", "published_at", "cve_id", "artifact_name"], root=root)
+    built = []
+    for repo_name, part in df.groupby("repo_name", observed=True, sort=False):
+        CVELifecycleIndex.write_index(repo_name, part, root, releases=stored_releases(repo_name, artifacts))
+        built.append(repo_name)
+    print(f"Lifecycle indexes rebuilt for {len(built)} repos")
+    return built
+
+if __name__ == "__main__":
+    import pyodbc
+
+    server = 'DESKTOP-3FC1SUJ'
+    database = 'SBOM'
+
+    conn = pyodbc.connect(f'DRIVER={{SQL Server}};SERVER={server};DATABASE={database};Trusted_Connection=yes;')
+    refresh_from_database(conn)
+    conn.close()
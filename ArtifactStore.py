@@ -0,0 +1,241 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Scan artifacts (syft SBOMs, grype reports, CVE analyses, release lists) as compact compressed JSON, laid out as
+# artifacts/{owner}/{repo}/{tag}/{kind}.json.zst (.json.gz without the zstandard package).
+# Columnar summaries (grype_matches) are Parquet tables, a fraction of the report they come from and much faster to reload.
+# index.json lists every artifact so loaders never have to list directories and match file names.
+ARTIFACT_ROOT = "artifacts"
+INDEX_FILE = "index.json"
+KINDS = ("sbom", "grype", "grype_matches", "cve_analysis", "releases")
+ZSTD_LEVEL = 9
+GZIP_LEVEL = 6
+# Artifacts that belong to the repo rather than to one release (the release list) use this tag
+REPO_LEVEL = "_repo"
+
+_index_lock = threading.Lock()
+
+def compression():
+    return "zstd" if zstandard is not None else "gzip"
+
+def suffix(codec=None):
+    return {"zstd": ".json.zst", "gzip": ".json.gz", "none": ".json"}[codec or compression()]
+
+def artifact_dir(repo_full_name, tag=None, root=ARTIFACT_ROOT):
+    owner, name = repo_full_name.split("/", 1)
+    return os.path.join(root, owner, name, tag or REPO_LEVEL)
+
+def codec_of(path):
+    if path.endswith(".zst"):
+        return "zstd"
+    if path.endswith(".gz"):
+        return "gzip"
+    return "none"
+
+def compress(payload, codec):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+    if codec == "gzip":
+        return gzip.compress(payload, compresslevel=GZIP_LEVEL)
+    return payload
+
+def decompress(payload, codec):
+    if codec == "zstd":
+        if zstandard is None:
+            raise ImportError("Reading .zst artifacts needs the zstandard package")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(payload)
+    if codec == "gzip":
+        return gzip.decompress(payload)
+    return payload
+
+def encode(data):
+    # Compact separators: the indent=4 files were mostly whitespace
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def read_json(path):
+    """Any JSON artifact: compressed store files or the plain .json files the pipeline used to write."""
+    with open(path, "rb") as f:
+        payload = f.read()
+    return json.loads(decompress(payload, codec_of(path)))
+
+def write_bytes(path, payload):
+    # Written next to the target and renamed, so a crash never leaves a truncated artifact behind
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(handle, "wb") as f:
+        f.write(payload)
+    os.replace(temporary, path)
+
+def index_path(root=ARTIFACT_ROOT):
+    return os.path.join(root, INDEX_FILE)
+
+def has_index(root):
+    return os.path.exists(index_path(root))
+
+def load_index(root=ARTIFACT_ROOT):
+    # {repo: {tag: {kind: entry}}}; entry paths are relative to root
+    if not has_index(root):
+        return {}
+    with open(index_path(root), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_index(index, root=ARTIFACT_ROOT):
+    write_bytes(index_path(root), json.dumps(index, indent=1, sort_keys=True).encode("utf-8"))
+
+def put(repo_full_name, tag, kind, data, root=ARTIFACT_ROOT, codec=None, raw_bytes=None):
+    """Stores `data` as compressed compact JSON and records it in the index; returns the index entry."""
+    codec = codec or compression()
+    payload = encode(data)
+    path = os.path.join(artifact_dir(repo_full_name, tag, root), kind + suffix(codec))
+    write_bytes(path, compress(payload, codec))
+
+    # Size of the file this replaces (indent=4 JSON) when known, otherwise of the compact JSON
+    return record(repo_full_name, tag, kind, path, codec, raw_bytes if raw_bytes is not None else len(payload), root)
+
+def record(repo_full_name, tag, kind, path, codec, raw_bytes, root=ARTIFACT_ROOT):
+    entry = {
+        "path": os.path.relpath(path, root).replace(os.sep, "/"),
+        "codec": codec,
+        "raw_bytes": raw_bytes,
+        "bytes": os.path.getsize(path),
+        "written": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    with _index_lock:
+        index = load_index(root)
+        tags = index.setdefault(repo_full_name, {})
+        previous = tags.get(tag or REPO_LEVEL, {}).get(kind)
+        # Switching codecs leaves the old file behind otherwise
+        if previous and previous["path"] != entry["path"] and os.path.exists(os.path.join(root, previous["path"])):
+            os.remove(os.path.join(root, previous["path"]))
+        tags.setdefault(tag or REPO_LEVEL, {})[kind] = entry
+        save_index(index, root)
+    return entry
+
+def put_table(repo_full_name, tag, kind, columns, root=ARTIFACT_ROOT):
+    """Stores a {column: values} summary as a zstd Parquet table; returns the index entry."""
+    # pyarrow is only needed here, the JSON artifacts (and the ingest workers) do without it
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = os.path.join(artifact_dir(repo_full_name, tag, root), kind + ".parquet")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = path + ".tmp"
+    pq.write_table(pa.table(columns), temporary, compression="zstd")
+    os.replace(temporary, path)
+    return record(repo_full_name, tag, kind, path, "parquet", os.path.getsize(path), root)
+
+def read_table(path, columns=None):
+    import pyarrow.parquet as pq
+
+    return pq.read_table(path, columns=columns)
+
+def grype_matches(report):
+    """One row per (match, related vulnerability) of a grype report, with the fields the analyses use."""
+    columns = {name: [] for name in ("vulnerability_id", "related_id", "severity", "artifact_name",
+                                      "artifact_version", "artifact_type", "fix_state")}
+    for match in report.get("matches", []):
+        vulnerability = match.get("vulnerability", {})
+        artifact = match.get("artifact", {})
+        related = [vuln.get("id") for vuln in match.get("relatedVulnerabilities", [])] or [None]
+        for related_id in related:
+            columns["vulnerability_id"].append(vulnerability.get("id"))
+            columns["related_id"].append(related_id)
+            columns["severity"].append(vulnerability.get("severity"))
+            columns["artifact_name"].append(artifact.get("name"))
+            columns["artifact_version"].append(artifact.get("version"))
+            columns["artifact_type"].append(artifact.get("type"))
+            columns["fix_state"].append(vulnerability.get("fix", {}).get("state"))
+    return columns
+
+def put_file(repo_full_name, tag, kind, source_path, root=ARTIFACT_ROOT, codec=None, remove=True):
+    """Moves a JSON file written by another tool (syft, grype) into the store.
+
+    A grype report also gets its grype_matches summary.
+    """
+    raw_bytes = os.path.getsize(source_path)
+    data = read_json(source_path)
+    entry = put(repo_full_name, tag, kind, data, root, codec, raw_bytes)
+    if kind == "grype":
+        put_table(repo_full_name, tag, "grype_matches", grype_matches(data), root)
+    if remove:
+        os.remove(source_path)
+    return entry
+
+def get(repo_full_name, tag, kind, root=ARTIFACT_ROOT):
+    """Decoded JSON artifact, or a pyarrow Table for the Parquet summaries."""
+    entry = load_index(root).get(repo_full_name, {}).get(tag or REPO_LEVEL, {}).get(kind)
+    if entry is None:
+        raise KeyError(f"No {kind} artifact for {repo_full_name}@{tag or REPO_LEVEL} in {root}")
+    path = os.path.join(root, entry["path"])
+    return read_table(path) if entry["codec"] == "parquet" else read_json(path)
+
+def find(kind, repo_full_name=None, root=ARTIFACT_ROOT):
+    """(repo, tag, path) of every stored artifact of `kind`, straight from the index."""
+    found = []
+    for repo, tags in sorted(load_index(root).items()):
+        if repo_full_name is not None and repo != repo_full_name:
+            continue
+        for tag, kinds in sorted(tags.items()):
+            if kind in kinds:
+                found.append((repo, None if tag == REPO_LEVEL else tag, os.path.join(root, kinds[kind]["path"])))
+    return found
+
+def find_one_repo(kind, repo_full_name=None, root=ARTIFACT_ROOT):
+    """find() for loaders that write under a single repo_id: raises ValueError when the artifacts span several repos."""
+    found = find(kind, repo_full_name, root)
+    repos = sorted({repo for repo, _, _ in found})
+    if len(repos) > 1:
+        raise ValueError(f"{kind} artifacts of {len(repos)} repos in {root} ({', '.join(repos)}); "
+                         f"load one repo at a time with its repo_id")
+    return found
+
+def release_workdir(repo_full_name, tag, root=ARTIFACT_ROOT):
+    # Scratch space for the uncompressed syft / grype output of one release, removed once stored
+    path = os.path.join(artifact_dir(repo_full_name, tag, root), "work")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def remove_workdir(repo_full_name, tag, root=ARTIFACT_ROOT):
+    shutil.rmtree(os.path.join(artifact_dir(repo_full_name, tag, root), "work"), ignore_errors=True)
+
+LOOSE_SUFFIXES = {".sbom.json": "sbom", ".grype.json": "grype", ".cve_analysis.json": "cve_analysis"}
+
+def import_loose(repo_full_name, directory=".", root=ARTIFACT_ROOT, remove=False):
+    """Moves the {tag}.sbom.json / .grype.json / .cve_analysis.json files and repo_releases.json of one repo into the store."""
+    imported = []
+    for filename in sorted(os.listdir(directory)):
+        for file_suffix, kind in LOOSE_SUFFIXES.items():
+            if filename.endswith(file_suffix):
+                tag = filename[:-len(file_suffix)]
+                put_file(repo_full_name, tag, kind, os.path.join(directory, filename), root, remove=remove)
+                imported.append((tag, kind))
+    releases = os.path.join(directory, "repo_releases.json")
+    if os.path.exists(releases):
+        put_file(repo_full_name, None, "releases", releases, root, remove=remove)
+        imported.append((None, "releases"))
+    print(f"Imported {len(imported)} artifacts of {repo_full_name} into {root}")
+    return imported
+
+def footprint(root=ARTIFACT_ROOT):
+    """Stored versus uncompressed bytes per kind, from the index."""
+    totals = {}
+    for tags in load_index(root).values():
+        for kinds in tags.values():
+            for kind, entry in kinds.items():
+                total = totals.setdefault(kind, {"artifacts": 0, "raw_bytes": 0, "bytes": 0})
+                total["artifacts"] += 1
+                total["raw_bytes"] += entry["raw_bytes"]
+                total["bytes"] += entry["bytes"]
+    for total in totals.values():
+        total["ratio"] = total["raw_bytes"] / total["bytes"] if total["bytes"] else None
+    return totals
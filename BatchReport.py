@@ -0,0 +1,158 @@
+import matplotlib
+matplotlib.use("Agg")
+
+import hashlib
+import importlib.util
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+import AnalyticsStore
+import SimulationFeatures
+
+REPORT_ROOT = "reports"
+MANIFEST_FILE = "_manifest.json"
+FORMATS = ("png", "svg")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modelo -> script con run()/plot() y el motor que simula; los que dependen de la fecha actual se regeneran cada día
+MODELS = {
+    "5.7": {"script": "Simulation5.7.py", "engine": "IncidentSimulation.py", "dated": False},
+    "5.9": {"script": "Simulation5.9.py", "engine": "RiskTransitionSimulation.py", "dated": True},
+    "5.19": {"script": "Simulation5.19.py", "engine": "ThirdPartySimulation.py", "dated": False},
+    "8.8": {"script": "Simulation8.8.py", "engine": "ExposureSimulation.py", "dated": False},
+}
+# Módulos que usan todos los modelos: si cambian, también cambian las figuras
+SHARED_MODULES = ("SimulationRandom.py", "SimulationFeatures.py", "SimulationStats.py")
+
+_scripts = {}
+
+def load_script(model):
+    # Los nombres de los scripts tienen puntos, así que se cargan por ruta
+    if model not in _scripts:
+        path = os.path.join(BASE_DIR, MODELS[model]["script"])
+        spec = importlib.util.spec_from_file_location(f"simulation_{model.replace('.', '_')}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _scripts[model] = module
+    return _scripts[model]
+
+def file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def frame_hash(df):
+    digest = hashlib.sha256(json.dumps(list(map(str, df.columns))).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def code_hashes(model):
+    # Hash del script, de su motor y de los módulos compartidos
+    names = (MODELS[model]["script"], MODELS[model]["engine"]) + SHARED_MODULES
+    return {name: file_hash(os.path.join(BASE_DIR, name)) for name in names}
+
+def report_key(model, data_hash, replications, seed, today):
+    # Cambia si cambian los datos, el código que produce las figuras o los parámetros de la corrida
+    payload = {
+        "model": model,
+        "data": data_hash,
+        "code": code_hashes(model),
+        "replications": replications,
+        "seed": seed,
+        "today": today if MODELS[model]["dated"] else None,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+def report_dir(root, repo_name):
+    return os.path.join(root, *str(repo_name).split("/"))
+
+def load_manifest(root=REPORT_ROOT):
+    path = os.path.join(root, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(manifest, root=REPORT_ROOT):
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+
+def load_datasets(repos=None, store_root=AnalyticsStore.STORE_ROOT, csv_path="Data.csv", feature_root=SimulationFeatures.FEATURE_ROOT):
+    """La tabla de features de cada repo, actualizada desde el almacén de análisis o el CSV exportado."""
+    SimulationFeatures.refresh_features(repos, feature_root, store_root, csv_path)
+    manifest = SimulationFeatures.load_manifest(feature_root)
+    return {repo_name: SimulationFeatures.load_features(repo_name, feature_root, refresh=False)
+            for repo_name in (repos or sorted(manifest["repos"]))}
+
+def render(model, repo_name, df, out_dir, replications=None, seed=42, today=None):
+    # Se ejecuta en los procesos del pool
+    module = load_script(model)
+    kwargs = {"seed": seed}
+    if replications:
+        kwargs["replications"] = replications
+    if MODELS[model]["dated"]:
+        kwargs["today"] = today
+
+    figures = module.plot(module.run(df, repo_name, **kwargs))
+
+    os.makedirs(out_dir, exist_ok=True)
+    files = []
+    for name, fig in figures.items():
+        for fmt in FORMATS:
+            path = os.path.join(out_dir, f"{model}_{name}.{fmt}")
+            fig.savefig(path, format=fmt, dpi=150)
+            files.append(path)
+        plt.close(fig)
+    return files
+
+def run_batch(repos=None, models=None, root=REPORT_ROOT, store_root=AnalyticsStore.STORE_ROOT, csv_path="Data.csv",
+              workers=None, replications=None, seed=42, force=False):
+    """Genera las figuras de todos los modelos para todos los repos en un pool de procesos.
+
+    Las figuras cuyo hash de entrada no cambió desde la última corrida no se vuelven a generar.
+    """
+    models = models or list(MODELS)
+    today = str(date.today())
+    manifest = load_manifest(root)
+    datasets = load_datasets(repos, store_root, csv_path)
+
+    stats = {"rendered": 0, "skipped": 0, "errors": {}}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for repo_name, df in datasets.items():
+            data_hash = frame_hash(df)
+            for model in models:
+                entry_name = f"{repo_name}:{model}"
+                key = report_key(model, data_hash, replications, seed, today)
+                entry = manifest.get(entry_name, {})
+                if not force and entry.get("key") == key and all(os.path.exists(os.path.join(root, path)) for path in entry.get("files", [])):
+                    stats["skipped"] += 1
+                    continue
+                future = executor.submit(render, model, repo_name, df, report_dir(root, repo_name), replications, seed, today)
+                futures[future] = (entry_name, key)
+
+        for future in as_completed(futures):
+            entry_name, key = futures[future]
+            try:
+                files = future.result()
+            except Exception as e:
+                stats["errors"][entry_name] = str(e)
+                print(f"Error rendering {entry_name}: {e}")
+                continue
+            # Rutas relativas a la carpeta de reportes
+            manifest[entry_name] = {"key": key, "files": sorted(os.path.relpath(path, root) for path in files)}
+            stats["rendered"] += 1
+            print(f"Rendered {entry_name}: {len(files)} files")
+
+    save_manifest(manifest, root)
+    print(f"Report: {stats['rendered']} rendered, {stats['skipped']} unchanged, {len(stats['errors'])} errors")
+    return stats
+
+if __name__ == "__main__":
+    run_batch()
@@ -0,0 +1,187 @@
+import json
+import os
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Presence intervals of every (repo, CVE, artifact) over the repo's releases in publication order.
+# A CVE that disappears and comes back gets one interval per stretch. Written next to the analytics
+# partitions each time a repo is exported, as analytics/_lifecycle/repo_name=<repo>.parquet
+# (the leading underscore keeps it out of the partitioned dataset).
+INDEX_DIR = "_lifecycle"
+
+def index_path(repo_name, root="analytics"):
+    return os.path.join(root, INDEX_DIR, f"repo_name={quote(str(repo_name), safe='')}.parquet")
+
+def release_order(df):
+    # (tag, published_at) oldest first, the order the analytics partitions are sorted in
+    releases = df[["tag_name", "published_at"]].astype({"tag_name": str}).drop_duplicates("tag_name")
+    # Naive UTC: the stored release lists carry "Z" timestamps, the exports naive ones
+    published = pd.to_datetime(releases["published_at"], errors="coerce", utc=True, format="mixed").dt.tz_localize(None)
+    releases = releases.assign(published_at=published)
+    releases = releases.sort_values(["published_at", "tag_name"], kind="stable")
+    return list(releases["tag_name"]), list(releases["published_at"])
+
+def build_intervals(df, tags=None, releases=None):
+    """Interval table of one repo's releases x CVE rows (tag_name, published_at, cve_id, artifact_name).
+
+    The CVE rows only list releases with at least one CVE, so a clean release between two affected ones
+    would vanish and the CVE would look continuously present. `releases` (tag_name, published_at of every
+    release) fills them in; `tags` overrides the order altogether.
+    """
+    if releases is not None:
+        order, published = release_order(pd.concat([releases[["tag_name", "published_at"]], df[["tag_name", "published_at"]]],
+                                                   ignore_index=True))
+    else:
+        order, published = release_order(df)
+    if tags is not None:
+        dates = dict(zip(order, published))
+        order, published = list(tags), [dates.get(tag, pd.NaT) for tag in tags]
+    position = {tag: i for i, tag in enumerate(order)}
+
+    rows = df[["cve_id", "artifact_name", "tag_name"]].astype(str).drop_duplicates()
+    rows = rows.assign(pos=rows["tag_name"].map(position))
+    rows = rows.dropna(subset=["pos"]).astype({"pos": "int32"}).sort_values(["cve_id", "artifact_name", "pos"], kind="stable")
+
+    cve = rows["cve_id"].to_numpy()
+    artifact = rows["artifact_name"].to_numpy()
+    pos = rows["pos"].to_numpy()
+    # A new interval starts at a new key or at a gap in the release positions
+    starts = np.ones(len(rows), dtype=bool)
+    if len(rows):
+        starts[1:] = (cve[1:] != cve[:-1]) | (artifact[1:] != artifact[:-1]) | (pos[1:] != pos[:-1] + 1)
+    start_index = np.flatnonzero(starts)
+    end_index = np.append(start_index[1:], len(rows)) - 1
+
+    intervals = pd.DataFrame({
+        "cve_id": cve[start_index],
+        "artifact_name": artifact[start_index],
+        "start": pos[start_index],
+        "end": pos[end_index],
+    })
+    return intervals, order, published
+
+class LifecycleIndex:
+    """One repo's intervals as sorted numpy columns, answering the lifecycle queries without touching the releases table."""
+
+    def __init__(self, intervals, tags, published):
+        self.tags = list(tags)
+        # Naive UTC, whether the dates came from the CSV exports or from SQL Server
+        self.published = pd.to_datetime(pd.Series(published, dtype="object"), errors="coerce", utc=True).dt.tz_localize(None).to_numpy()
+        self.position = {tag: i for i, tag in enumerate(self.tags)}
+        intervals = intervals.sort_values(["cve_id", "start"], kind="stable").reset_index(drop=True)
+        self.cve = intervals["cve_id"].to_numpy(dtype=object)
+        self.artifact = intervals["artifact_name"].to_numpy(dtype=object)
+        self.start = intervals["start"].to_numpy(dtype=np.int32)
+        self.end = intervals["end"].to_numpy(dtype=np.int32)
+        # Rows of each CVE are contiguous after the sort; code is the CVE's position in keys
+        self.keys, first, counts = np.unique(self.cve, return_index=True, return_counts=True)
+        self.code = np.repeat(np.arange(len(self.keys), dtype=np.int32), counts)
+        self.rows = {key: slice(i, i + n) for key, i, n in zip(self.keys, first, counts)}
+
+    def __len__(self):
+        return len(self.cve)
+
+    def tag_position(self, tag):
+        if tag not in self.position:
+            raise KeyError(f"Unknown release {tag}")
+        return self.position[tag]
+
+    def positions_affected(self, cve_id):
+        rows = self.rows.get(cve_id)
+        if rows is None:
+            return np.array([], dtype=np.int32)
+        return np.unique(np.concatenate([np.arange(s, e + 1, dtype=np.int32) for s, e in zip(self.start[rows], self.end[rows])]))
+
+    def releases_affected(self, cve_id):
+        """Tags that carried `cve_id` through any artifact, oldest first."""
+        return [self.tags[i] for i in self.positions_affected(cve_id)]
+
+    def open_at(self, tag):
+        """CVEs present in release `tag` (a stabbing query over every interval), sorted."""
+        p = self.tag_position(tag)
+        return self.keys[np.unique(self.code[(self.start <= p) & (self.end >= p)])].tolist()
+
+    def carriers(self, cve_id, tag):
+        # Artifacts that carry the CVE in release `tag`
+        rows = self.rows.get(cve_id, slice(0, 0))
+        p = self.tag_position(tag)
+        return sorted(self.artifact[rows][(self.start[rows] <= p) & (self.end[rows] >= p)])
+
+    def present_between(self, tag_from, tag_to):
+        # CVEs present in at least one release of the range, both ends included
+        a, b = sorted((self.tag_position(tag_from), self.tag_position(tag_to)))
+        return self.keys[np.unique(self.code[(self.start <= b) & (self.end >= a)])].tolist()
+
+    def exposure_window(self, cve_id, now=None):
+        """First release with the CVE, the release that fixed it (None while open), releases carrying it and days exposed.
+
+        Days run from the publication of the release that introduced each stretch to the publication of the one that
+        dropped it, or to `now` while it is still open.
+        """
+        rows = self.rows.get(cve_id)
+        if rows is None:
+            return None
+        now = pd.Timestamp(now or datetime.now(timezone.utc))
+        now = (now.tz_convert("UTC").tz_localize(None) if now.tzinfo else now).to_datetime64()
+        stretch_starts, stretch_ends = self.stretches(cve_id)
+        affected = self.positions_affected(cve_id)
+
+        days = 0.0
+        for start, end in zip(stretch_starts, stretch_ends):
+            closed = self.published[end + 1] if end + 1 < len(self.tags) else now
+            opened = self.published[start]
+            if not (pd.isna(opened) or pd.isna(closed)):
+                days += (closed - opened) / np.timedelta64(1, "D")
+        last = int(stretch_ends[-1])
+        fixed = self.tags[last + 1] if last + 1 < len(self.tags) else None
+        return {
+            "cve_id": cve_id,
+            "first_seen": self.tags[int(stretch_starts[0])],
+            "last_seen": self.tags[last],
+            "fixed_in": fixed,
+            "open": fixed is None,
+            "releases": len(affected),
+            "reintroduced": len(stretch_starts) - 1,
+            "artifacts": sorted(set(self.artifact[rows])),
+            "days_exposed": float(days),
+        }
+
+    def stretches(self, cve_id):
+        # (starts, ends) of the runs of consecutive releases carrying the CVE through any of its artifacts
+        affected = self.positions_affected(cve_id)
+        breaks = np.flatnonzero(np.diff(affected) != 1)
+        return np.append(affected[0], affected[breaks + 1]), np.append(affected[breaks], affected[-1])
+
+    def open_counts(self):
+        """Distinct open CVEs per release, from a difference array over the stretch bounds."""
+        delta = np.zeros(len(self.tags) + 1, dtype=np.int64)
+        for cve_id in self.rows:
+            starts, ends = self.stretches(cve_id)
+            np.add.at(delta, starts, 1)
+            np.add.at(delta, ends + 1, -1)
+        return dict(zip(self.tags, np.cumsum(delta)[:-1].tolist()))
+
+def write_index(repo_name, df, root="analytics", tags=None, releases=None):
+    """Builds and saves the interval index of one repo from its releases x CVE rows; returns the LifecycleIndex."""
+    intervals, order, published = build_intervals(df, tags, releases)
+    table = pa.Table.from_pandas(intervals, preserve_index=False)
+    # Release order travels in the schema metadata so loading needs no other file
+    metadata = {"tags": order, "published": [None if pd.isna(p) else pd.Timestamp(p).isoformat() for p in published]}
+    table = table.replace_schema_metadata({b"lifecycle": json.dumps(metadata).encode("utf-8")})
+    path = index_path(repo_name, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(table, path, compression="zstd")
+    return LifecycleIndex(intervals, order, published)
+
+def load_index(repo_name, root="analytics"):
+    path = index_path(repo_name, root)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No lifecycle index for {repo_name} at {path}")
+    table = pq.read_table(path)
+    metadata = json.loads(table.schema.metadata[b"lifecycle"])
+    return LifecycleIndex(table.to_pandas(), metadata["tags"], metadata["published"])
@@ -0,0 +1,199 @@
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import ArtifactStore
+
+# Every distinct (ecosystem, name, version) seen in any SBOM gets one integer id in a shared catalog
+# ({root}/catalog/components.parquet). A release is then a sorted uint32 array of ids, stored per repo as the
+# "component_sets" table: the first release in full, every later one as the ids added and removed since the previous.
+CATALOG_DIR = "catalog"
+CATALOG_FILE = "components.parquet"
+ID_TYPE = np.uint32
+
+def ecosystem_of(artifact):
+    # pkg:npm/lodash@4.17.20 -> npm; syft's own type (npm, python, go-module, ...) when there is no purl
+    purl = artifact.get("purl") or ""
+    if purl.startswith("pkg:") and "/" in purl:
+        return purl[4:purl.index("/")]
+    return artifact.get("type") or "unknown"
+
+def license_names(artifact):
+    # Older syft versions write plain strings, newer ones objects with a value
+    names = [entry.get("value") if isinstance(entry, dict) else entry for entry in artifact.get("licenses") or []]
+    return ",".join(sorted({name for name in names if name}))
+
+class Catalog:
+    """Interned components; ids are positions in the catalog and never change once assigned."""
+
+    def __init__(self, columns=None):
+        self.columns = columns or {"ecosystem": [], "name": [], "version": [], "purl": [], "licenses": []}
+        self.ids = {key: i for i, key in enumerate(zip(self.columns["ecosystem"], self.columns["name"], self.columns["version"]))}
+        self.by_name = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def intern(self, ecosystem, name, version, purl=None, licenses=""):
+        key = (ecosystem, name, version)
+        component_id = self.ids.get(key)
+        if component_id is None:
+            component_id = self.ids[key] = len(self.ids)
+            for column, value in zip(("ecosystem", "name", "version", "purl", "licenses"), (*key, purl, licenses)):
+                self.columns[column].append(value)
+            self.by_name = None
+        return component_id
+
+    def component(self, component_id):
+        return {column: values[component_id] for column, values in self.columns.items()} | {"id": int(component_id)}
+
+    def lookup(self, name, version=None, ecosystem=None):
+        """Sorted ids of every version of `name` (or just `version`), optionally within one ecosystem."""
+        if self.by_name is None:
+            self.by_name = {}
+            for component_id, (eco, component_name, component_version) in enumerate(zip(self.columns["ecosystem"], self.columns["name"], self.columns["version"])):
+                self.by_name.setdefault(component_name, []).append((eco, component_version, component_id))
+        return np.array(sorted(component_id for eco, component_version, component_id in self.by_name.get(name, [])
+                               if (version is None or component_version == version) and (ecosystem is None or eco == ecosystem)),
+                        dtype=ID_TYPE)
+
+def catalog_path(root=ArtifactStore.ARTIFACT_ROOT):
+    return os.path.join(root, CATALOG_DIR, CATALOG_FILE)
+
+def load_catalog(root=ArtifactStore.ARTIFACT_ROOT):
+    path = catalog_path(root)
+    if not os.path.exists(path):
+        return Catalog()
+    return Catalog({column: values for column, values in pq.read_table(path).to_pydict().items()})
+
+def save_catalog(catalog, root=ArtifactStore.ARTIFACT_ROOT):
+    path = catalog_path(root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.table({column: pa.array(values, type=pa.string()) for column, values in catalog.columns.items()})
+    pq.write_table(table, path + ".tmp", compression="zstd")
+    os.replace(path + ".tmp", path)
+
+def release_ids(catalog, sbom):
+    """Sorted, unique component ids of one syft SBOM, interning the components seen for the first time."""
+    ids = [catalog.intern(ecosystem_of(artifact), artifact.get("name"), artifact.get("version") or "",
+                          artifact.get("purl"), license_names(artifact))
+           for artifact in sbom.get("artifacts", [])]
+    return np.unique(np.array(ids, dtype=ID_TYPE))
+
+def encode_sets(tags, sets):
+    # Each release as a delta against the one before it; identical neighbours cost two empty lists
+    columns = {"tag": [], "base": [], "added": [], "removed": [], "size": []}
+    previous_tag, previous = None, np.array([], dtype=ID_TYPE)
+    for tag in tags:
+        current = sets[tag]
+        columns["tag"].append(tag)
+        columns["base"].append(previous_tag)
+        columns["added"].append(np.setdiff1d(current, previous, assume_unique=True))
+        columns["removed"].append(np.setdiff1d(previous, current, assume_unique=True))
+        columns["size"].append(len(current))
+        previous_tag, previous = tag, current
+    return {
+        "tag": pa.array(columns["tag"], type=pa.string()),
+        "base": pa.array(columns["base"], type=pa.string()),
+        "added": pa.array(columns["added"], type=pa.list_(pa.uint32())),
+        "removed": pa.array(columns["removed"], type=pa.list_(pa.uint32())),
+        "size": pa.array(columns["size"], type=pa.uint32()),
+    }
+
+def decode_sets(table):
+    """{tag: sorted id array} in stored (release) order, replaying the deltas."""
+    sets = {}
+    current = np.array([], dtype=ID_TYPE)
+    added = table.column("added").to_pylist()
+    removed = table.column("removed").to_pylist()
+    for tag, plus, minus in zip(table.column("tag").to_pylist(), added, removed):
+        current = np.union1d(np.setdiff1d(current, np.array(minus, dtype=ID_TYPE), assume_unique=True),
+                             np.array(plus, dtype=ID_TYPE)).astype(ID_TYPE)
+        sets[tag] = current
+    return sets
+
+def load_sets(repo_full_name, root=ArtifactStore.ARTIFACT_ROOT):
+    try:
+        return decode_sets(ArtifactStore.get(repo_full_name, None, "component_sets", root))
+    except KeyError:
+        return {}
+
+def release_order(repo_full_name, tags, root=ArtifactStore.ARTIFACT_ROOT):
+    # Oldest first by published_at from the stored release list, so neighbouring releases differ the least;
+    # tags missing from it go last
+    try:
+        releases = ArtifactStore.get(repo_full_name, None, "releases", root)
+    except KeyError:
+        releases = []
+    published = {release["tag_name"]: release.get("published_at") or "" for release in releases}
+    return sorted(tags, key=lambda tag: (tag not in published, published.get(tag, ""), tag))
+
+def build(repo_full_name, root=ArtifactStore.ARTIFACT_ROOT, rebuild=False):
+    """Adds the stored SBOMs of `repo_full_name` that are not in its component sets yet; returns {tag: ids}.
+
+    Only the new SBOMs are read, the existing releases come from the stored deltas.
+    """
+    catalog = load_catalog(root)
+    sets = {} if rebuild else load_sets(repo_full_name, root)
+    new_tags = [tag for _, tag, _ in ArtifactStore.find("sbom", repo_full_name, root) if tag not in sets]
+    if not new_tags:
+        return sets
+
+    for tag in new_tags:
+        sets[tag] = release_ids(catalog, ArtifactStore.get(repo_full_name, tag, "sbom", root))
+    save_catalog(catalog, root)
+    tags = release_order(repo_full_name, sets, root)
+    ArtifactStore.put_table(repo_full_name, None, "component_sets", encode_sets(tags, sets), root)
+    print(f"Component sets of {repo_full_name}: {len(new_tags)} releases added, {len(sets)} in total, "
+          f"{len(catalog)} components in the catalog")
+    return {tag: sets[tag] for tag in tags}
+
+def releases_containing(repo_full_name, name, version=None, ecosystem=None, root=ArtifactStore.ARTIFACT_ROOT):
+    """Tags whose SBOM includes `name` (at `version`, if given): "which releases contain lodash 4.17.20"."""
+    wanted = load_catalog(root).lookup(name, version, ecosystem)
+    if not len(wanted):
+        return []
+    return [tag for tag, ids in load_sets(repo_full_name, root).items()
+            if len(np.intersect1d(ids, wanted, assume_unique=True))]
+
+def components(repo_full_name, tag, root=ArtifactStore.ARTIFACT_ROOT):
+    catalog = load_catalog(root)
+    return [catalog.component(component_id) for component_id in load_sets(repo_full_name, root)[tag]]
+
+def diff(repo_full_name, tag_a, tag_b, root=ArtifactStore.ARTIFACT_ROOT):
+    """Components added and removed going from tag_a to tag_b."""
+    catalog = load_catalog(root)
+    sets = load_sets(repo_full_name, root)
+    return {
+        "added": [catalog.component(i) for i in np.setdiff1d(sets[tag_b], sets[tag_a], assume_unique=True)],
+        "removed": [catalog.component(i) for i in np.setdiff1d(sets[tag_a], sets[tag_b], assume_unique=True)],
+    }
+
+def common(repo_full_name, tags=None, root=ArtifactStore.ARTIFACT_ROOT):
+    # Ids present in every one of `tags` (all releases by default)
+    sets = load_sets(repo_full_name, root)
+    arrays = [sets[tag] for tag in (tags or list(sets))]
+    result = arrays[0] if arrays else np.array([], dtype=ID_TYPE)
+    for ids in arrays[1:]:
+        result = np.intersect1d(result, ids, assume_unique=True)
+    return result
+
+def cve_components(repo_full_name, tag, root=ArtifactStore.ARTIFACT_ROOT):
+    """{cve_id: component ids} of a release, resolving CVE_Mapping's free-text artifact name/version against its SBOM."""
+    catalog = load_catalog(root)
+    ids = load_sets(repo_full_name, root)[tag]
+    resolved = {}
+    for item in ArtifactStore.get(repo_full_name, tag, "cve_analysis", root):
+        candidates = catalog.lookup(item["artifact_name"], item["artifact_version"])
+        resolved.setdefault(item["cve_id"], set()).update(int(i) for i in np.intersect1d(candidates, ids, assume_unique=True))
+    return {cve_id: sorted(found) for cve_id, found in resolved.items()}
+
+def storage(repo_full_name, root=ArtifactStore.ARTIFACT_ROOT):
+    """Ids kept by the delta encoding versus full per-release arrays."""
+    table = ArtifactStore.get(repo_full_name, None, "component_sets", root)
+    stored = sum(len(ids) for ids in table.column("added").to_pylist()) + sum(len(ids) for ids in table.column("removed").to_pylist())
+    full = sum(table.column("size").to_pylist())
+    return {"releases": table.num_rows, "full_ids": full, "stored_ids": stored,
+            "ratio": full / stored if stored else None}
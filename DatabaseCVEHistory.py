@@ -3,83 +3,303 @@ import pyodbc
 from datetime import datetime
 import os
 import glob
+import gzip
+import hashlib
+import re
+from DatabaseUpsert import NATURAL_KEYS, ensure_row_hash_column, fetch_row_hashes, print_upsert_summary, upsert_rows
 
-def insert_cve_data(conn, cursor, json_file):
-    with open(json_file, 'r', encoding='utf-8') as file:
-        data = json.load(file)
+CVE_HISTORY_COLUMNS = (
+    "cve_id", "published_date", "last_modified_date", "cwe_id", "severity",
+    "cvss_version", "vector_string", "base_score", "impact_score", "exploitability_score"
+)
 
-    for cve_item in data.get("CVE_Items", []):
-        cve_id = cve_item["cve"]["CVE_data_meta"]["ID"]
-        published_date_str = cve_item.get("publishedDate", "N/A")
-        last_modified_date_str = cve_item.get("lastModifiedDate", "N/A")
+NVD_DATE_FORMAT = "%Y-%m-%dT%H:%MZ"
+BATCH_SIZE = 5000
 
-        # Convert date strings to DATETIME format
-        if published_date_str != "N/A":
-            published_date = datetime.strptime(published_date_str, "%Y-%m-%dT%H:%MZ")
-            published_date = published_date.strftime("%Y-%m-%d %H:%M:%S")
-        else:
-            published_date = None
+def open_feed(file_path):
+    # NVD feeds are published as .json.gz, read them without unpacking to disk first
+    if file_path.endswith(".gz"):
+        return gzip.open(file_path, 'rt', encoding='utf-8')
+    return open(file_path, 'r', encoding='utf-8')
+
+def iter_cve_items(file_path, chunk_size=1 << 20):
+    # Decode the CVE_Items array one item at a time so only a chunk of the feed is held in memory
+    decoder = json.JSONDecoder()
+    separator = re.compile(r'[\s,]*')
+
+    with open_feed(file_path) as file:
+        buffer = ""
+        while True:
+            key = buffer.find('"CVE_Items"')
+            start = buffer.find('[', key) if key != -1 else -1
+            if start != -1:
+                break
+            chunk = file.read(chunk_size)
+            if not chunk:
+                return
+            buffer += chunk
 
-        if last_modified_date_str != "N/A":
-            last_modified_date = datetime.strptime(last_modified_date_str, "%Y-%m-%dT%H:%MZ")
-            last_modified_date = last_modified_date.strftime("%Y-%m-%d %H:%M:%S")
+        pos = start + 1
+        eof = False
+        while True:
+            pos = separator.match(buffer, pos).end()
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+            try:
+                if pos >= len(buffer):
+                    raise ValueError("need more data")
+                cve_item, pos = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                if eof:
+                    raise
+                chunk = file.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            yield cve_item
+
+def convert_nvd_dates(date_strings):
+    # "2021-03-04T05:06Z" -> "2021-03-04 05:06:00", same result as strptime/strftime.
+    # Still one value at a time: the slicing fast path beats pandas.to_datetime + strftime on these batches
+    converted = []
+    for value in date_strings:
+        if value is None or value == "N/A":
+            converted.append(None)
+        elif len(value) == 17 and value[10] == "T" and value[16] == "Z":
+            converted.append(f"{value[:10]} {value[11:16]}:00")
         else:
-            last_modified_date = None
-        
-        # Extract CWE ID (if available)
-        cwe_id = "N/A"
-        problemtype_data = cve_item["cve"]["problemtype"]["problemtype_data"]
-        if problemtype_data and problemtype_data[0].get("description"):
-            cwe_id = problemtype_data[0]["description"][0].get("value", "N/A")
-        
-        # Extract CVSS metrics (CVSSv2, CVSSv3, or CVSSv3.1)
-        cvss_version = "N/A"
-        vector_string = "N/A"
-        base_score = None
-        impact_score = None
-        exploitability_score = None
-        severity = "N/A"
-        
-        if "impact" in cve_item:
-            if "baseMetricV3" in cve_item["impact"]:
-                cvss_version = "CVSSv3.1"
-                cvss_data = cve_item["impact"]["baseMetricV3"]["cvssV3"]
-                vector_string = cvss_data.get("vectorString", "N/A")
-                base_score = cvss_data.get("baseScore", None)
-                impact_score = cve_item["impact"]["baseMetricV3"].get("impactScore", None)
-                exploitability_score = cve_item["impact"]["baseMetricV3"].get("exploitabilityScore", None)
-                severity = cvss_data.get("baseSeverity", "N/A")
-            elif "baseMetricV2" in cve_item["impact"]:
-                cvss_version = "CVSSv2"
-                cvss_data = cve_item["impact"]["baseMetricV2"]["cvssV2"]
-                vector_string = cvss_data.get("vectorString", "N/A")
-                base_score = cvss_data.get("baseScore", None)
-                impact_score = cve_item["impact"]["baseMetricV2"].get("impactScore", None)
-                exploitability_score = cve_item["impact"]["baseMetricV2"].get("exploitabilityScore", None)
-                severity = cve_item["impact"]["baseMetricV2"].get("severity", "N/A")
-        
-        cursor.execute("""
+            converted.append(datetime.strptime(value, NVD_DATE_FORMAT).strftime("%Y-%m-%d %H:%M:%S"))
+    return converted
+
+def extract_cve_fields(cve_item):
+    # Single pass over the item; dates are returned raw and converted per batch
+    cve = cve_item["cve"]
+
+    # Extract CWE ID (if available)
+    cwe_id = "N/A"
+    problemtype_data = cve["problemtype"]["problemtype_data"]
+    if problemtype_data and problemtype_data[0].get("description"):
+        cwe_id = problemtype_data[0]["description"][0].get("value", "N/A")
+
+    # Extract CVSS metrics (CVSSv3.1 preferred over CVSSv2)
+    cvss_version = "N/A"
+    vector_string = "N/A"
+    base_score = None
+    impact_score = None
+    exploitability_score = None
+    severity = "N/A"
+
+    impact = cve_item.get("impact", {})
+    if "baseMetricV3" in impact:
+        metric = impact["baseMetricV3"]
+        cvss_data = metric["cvssV3"]
+        cvss_version = "CVSSv3.1"
+        severity = cvss_data.get("baseSeverity", "N/A")
+    elif "baseMetricV2" in impact:
+        metric = impact["baseMetricV2"]
+        cvss_data = metric["cvssV2"]
+        cvss_version = "CVSSv2"
+        severity = metric.get("severity", "N/A")
+    else:
+        metric = None
+
+    if metric is not None:
+        vector_string = cvss_data.get("vectorString", "N/A")
+        base_score = cvss_data.get("baseScore", None)
+        impact_score = metric.get("impactScore", None)
+        exploitability_score = metric.get("exploitabilityScore", None)
+
+    return (
+        cve["CVE_data_meta"]["ID"],
+        cve_item.get("publishedDate", "N/A"),
+        cve_item.get("lastModifiedDate", "N/A"),
+        cwe_id,
+        severity,
+        cvss_version,
+        vector_string,
+        base_score,
+        impact_score,
+        exploitability_score
+    )
+
+def build_cve_rows(fields):
+    # Dates are converted per batch, after the fields of every item are extracted
+    published = convert_nvd_dates([row[1] for row in fields])
+    last_modified = convert_nvd_dates([row[2] for row in fields])
+    return [
+        (row[0], published_date, last_modified_date) + row[3:]
+        for row, published_date, last_modified_date in zip(fields, published, last_modified)
+    ]
+
+def parse_cve_item(cve_item):
+    return build_cve_rows([extract_cve_fields(cve_item)])[0]
+
+def iter_cve_row_batches(file_path, batch_size=BATCH_SIZE):
+    fields = []
+    for cve_item in iter_cve_items(file_path):
+        fields.append(extract_cve_fields(cve_item))
+        if len(fields) >= batch_size:
+            yield build_cve_rows(fields)
+            fields = []
+    if fields:
+        yield build_cve_rows(fields)
+
+def insert_cve_data(conn, cursor, json_file, upsert=False, existing=None, batch_size=BATCH_SIZE):
+    if upsert and existing is None:
+        ensure_row_hash_column(conn, cursor, "CVE_History")
+        existing = fetch_row_hashes(cursor, "CVE_History", NATURAL_KEYS["CVE_History"])
+
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0}
+    cursor.fast_executemany = True
+
+    for rows in iter_cve_row_batches(json_file, batch_size):
+        if upsert:
+            # Keyed on cve_id; the cached hashes can be shared across all the feeds of a run
+            result = upsert_rows(conn, cursor, "CVE_History", NATURAL_KEYS["CVE_History"], CVE_HISTORY_COLUMNS[1:], rows, existing)
+            for name, count in result.items():
+                stats[name] += count
+            continue
+
+        cursor.executemany("""
             INSERT INTO CVE_History (
                 cve_id, published_date, last_modified_date, cwe_id, severity,
                 cvss_version, vector_string, base_score, impact_score, exploitability_score
             )
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            cve_id,
-            published_date,
-            last_modified_date,
-            cwe_id,
-            severity,
-            cvss_version,
-            vector_string,
-            base_score,
-            impact_score,
-            exploitability_score
-        ))
-        
+        """, rows)
+        conn.commit()
+        stats["inserted"] += len(rows)
+
+    print_upsert_summary(f"CVE_History {os.path.basename(json_file)}", stats)
+    return stats
+
+def find_nvdcve_files(directory):
+    # Find all JSON feeds containing "nvdcve" in their names, compressed or not
+    nvdcve_files = glob.glob(os.path.join(directory, "*nvdcve*.json"))
+    nvdcve_files += glob.glob(os.path.join(directory, "*nvdcve*.json.gz"))
+    return sorted(nvdcve_files)
+
+def feed_name(file_path):
+    name = os.path.basename(file_path)
+    for suffix in (".json.gz", ".json"):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+def is_delta_feed(file_path):
+    name = feed_name(file_path)
+    return name.endswith("-modified") or name.endswith("-recent")
+
+def feed_order(file_path):
+    # Yearly feeds before the deltas, and "modified" (the larger window) after "recent"
+    return is_delta_feed(file_path), feed_name(file_path).endswith("-modified"), file_path
+
+def read_feed_meta(meta_path):
+    # NVD .meta files are "key:value" lines (lastModifiedDate, size, zipSize, gzSize, sha256)
+    meta = {}
+    with open(meta_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            if ":" in line:
+                key, value = line.strip().split(":", 1)
+                meta[key] = value
+    return meta
+
+def feed_fingerprint(file_path):
+    meta_path = os.path.join(os.path.dirname(file_path), feed_name(file_path) + ".meta")
+    if os.path.exists(meta_path):
+        meta = read_feed_meta(meta_path)
+        return meta.get("sha256", "").upper(), meta.get("lastModifiedDate")
+
+    # Without a .meta file fall back to hashing the uncompressed feed, which is what the meta sha256 covers.
+    # Raw bytes, not open_feed's text: newline and BOM handling would give a different digest for the same feed
+    digest = hashlib.sha256()
+    with (gzip.open(file_path, 'rb') if file_path.endswith(".gz") else open(file_path, 'rb')) as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest().upper(), None
+
+def ensure_feed_sync_table(conn, cursor):
+    cursor.execute("""
+        IF OBJECT_ID('NVD_Feed_Sync', 'U') IS NULL
+            CREATE TABLE NVD_Feed_Sync (
+                feed_name VARCHAR(100) NOT NULL PRIMARY KEY,
+                sha256 CHAR(64) NOT NULL,
+                last_modified_date VARCHAR(40) NULL,
+                synced_at DATETIME NOT NULL
+            )
+    """)
     conn.commit()
 
-def process_all_nvdcve_files(directory):
+def record_feed_sync(conn, cursor, name, sha256, last_modified_date):
+    cursor.execute("""
+        UPDATE NVD_Feed_Sync SET sha256 = ?, last_modified_date = ?, synced_at = GETDATE()
+        WHERE feed_name = ?
+    """, (sha256, last_modified_date, name))
+    if cursor.rowcount == 0:
+        cursor.execute("""
+            INSERT INTO NVD_Feed_Sync (feed_name, sha256, last_modified_date, synced_at)
+            VALUES (?, ?, ?, GETDATE())
+        """, (name, sha256, last_modified_date))
+    conn.commit()
+
+def fetch_cve_hashes(cursor, cve_ids, chunk_size=1000):
+    # Only look up the CVEs present in a delta feed instead of the whole table
+    existing = {}
+    cve_ids = list(cve_ids)
+    for i in range(0, len(cve_ids), chunk_size):
+        chunk = cve_ids[i:i + chunk_size]
+        placeholders = ", ".join("?" for _ in chunk)
+        existing.update(fetch_row_hashes(cursor, "CVE_History", NATURAL_KEYS["CVE_History"],
+                                         f"cve_id IN ({placeholders})", chunk))
+    return existing
+
+def sync_nvdcve_feeds(conn, cursor, directory):
+    """Apply only the feeds whose .meta sha256 changed since the last sync.
+
+    Yearly feeds are applied first and the "recent"/"modified" delta feeds last,
+    all as upserts into CVE_History, so a daily run only writes the CVEs that changed.
+    """
+    ensure_feed_sync_table(conn, cursor)
+    ensure_row_hash_column(conn, cursor, "CVE_History")
+
+    cursor.execute("SELECT feed_name, sha256 FROM NVD_Feed_Sync")
+    synced = {row[0]: row[1] for row in cursor.fetchall()}
+
+    changed = []
+    for file_path in find_nvdcve_files(directory):
+        sha256, last_modified_date = feed_fingerprint(file_path)
+        if synced.get(feed_name(file_path)) == sha256:
+            print(f"Skipping unchanged feed: {file_path}")
+            continue
+        changed.append((file_path, sha256, last_modified_date))
+
+    changed.sort(key=lambda item: feed_order(item[0]))
+
+    existing = None
+    if any(not is_delta_feed(file_path) for file_path, _, _ in changed):
+        existing = fetch_row_hashes(cursor, "CVE_History", NATURAL_KEYS["CVE_History"])
+
+    totals = {"inserted": 0, "updated": 0, "unchanged": 0}
+    for file_path, sha256, last_modified_date in changed:
+        print(f"Syncing feed: {file_path}")
+        try:
+            feed_existing = existing
+            if feed_existing is None:
+                cve_ids = [item["cve"]["CVE_data_meta"]["ID"] for item in iter_cve_items(file_path)]
+                feed_existing = fetch_cve_hashes(cursor, cve_ids)
+            stats = insert_cve_data(conn, cursor, file_path, upsert=True, existing=feed_existing)
+            record_feed_sync(conn, cursor, feed_name(file_path), sha256, last_modified_date)
+        except Exception as e:
+            print(f"Error processing file {file_path}: {e}")
+            continue
+        for name, count in stats.items():
+            totals[name] += count
+
+    print_upsert_summary("CVE_History sync", totals)
+    return totals
+
+def process_all_nvdcve_files(directory, upsert=False, sync=False):
     # Connect to the database
     server = 'DESKTOP-3FC1SUJ'
     database = 'SBOM'
@@ -87,15 +307,24 @@ def process_all_nvdcve_files(directory):
     conn = pyodbc.connect(f'DRIVER={{SQL Server}};SERVER={server};DATABASE={database};Trusted_Connection=yes;')
     cursor = conn.cursor()
 
-    # Find all JSON files containing "nvdcve" in their names
-    file_pattern = os.path.join(directory, "*nvdcve*.json")
-    nvdcve_files = glob.glob(file_pattern)
+    if sync:
+        sync_nvdcve_feeds(conn, cursor, directory)
+        cursor.close()
+        conn.close()
+        return
+
+    nvdcve_files = find_nvdcve_files(directory)
+
+    existing = None
+    if upsert:
+        ensure_row_hash_column(conn, cursor, "CVE_History")
+        existing = fetch_row_hashes(cursor, "CVE_History", NATURAL_KEYS["CVE_History"])
 
     # Process each file
     for file_path in nvdcve_files:
         print(f"Processing file: {file_path}")
         try:
-            insert_cve_data(conn, cursor, file_path)
+            insert_cve_data(conn, cursor, file_path, upsert=upsert, existing=existing)
         except Exception as e:
             print(f"Error processing file {file_path}: {e}")
 
@@ -103,6 +332,8 @@ def process_all_nvdcve_files(directory):
     cursor.close()
     conn.close()
 
-# Specify the directory containing the JSON files
-directory_path = "."
-process_all_nvdcve_files(directory_path)
\ No newline at end of file
+if __name__ == "__main__":
+    # Specify the directory containing the JSON files
+    directory_path = "."
+    # sync=True only re-applies feeds whose .meta checksum changed since the last run
+    process_all_nvdcve_files(directory_path, sync=True)
\ No newline at end of file
@@ -2,6 +2,8 @@ import pyodbc
 import pandas as pd
 import json
 import os
+import ArtifactStore
+from DatabaseUpsert import NATURAL_KEYS, ensure_row_hash_column, fetch_row_hashes, print_upsert_summary, row_hash, upsert_rows
 
 def commit_merge_insert(conn, cursor):
     # json_file = 'repo_merge_data.json'
@@ -22,22 +24,41 @@ def commit_merge_insert(conn, cursor):
 
     conn.commit()
 
-def security_advisories_insert(conn, cursor):
+def _package_name(vuln):
+    # The crawlers now keep {ecosystem, name}; older crawl files only have the ecosystem string
+    package = vuln['package']
+    return package.get('name') if isinstance(package, dict) else package
+
+def _insert_advisory_children(cursor, advisory_id, advisory):
+    for vuln in advisory.get('vulnerabilities', []):
+        cursor.execute("""
+            INSERT INTO VulnerablePackages (advisory_id, package_name, vulnerable_version_range)
+            VALUES (?, ?, ?)
+        """, (advisory_id, _package_name(vuln), vuln['vulnerable_version_range']))
+
+    for version in [3, 4]:
+        cvss_key = f'cvss_{version}'
+        if advisory.get(cvss_key):
+            cursor.execute("""
+                INSERT INTO CVSS_Scores (advisory_id, version, vector_string, score)
+                VALUES (?, ?, ?, ?)
+            """, (advisory_id, version, advisory[cvss_key]['vector_string'], advisory[cvss_key]['score']))
+
+def security_advisories_insert(conn, cursor, upsert=False):
 
     json_file = 'security_advisories.json'
     with open(json_file, 'r', encoding='utf-8') as file:
         data = json.load(file)
 
+    if upsert:
+        ensure_row_hash_column(conn, cursor, "SecurityAdvisories")
+        cursor.execute("SELECT ghsa_id, advisory_id, row_hash FROM SecurityAdvisories")
+        existing = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+        stats = {"inserted": 0, "updated": 0, "unchanged": 0}
 
     for repo_name, advisories in data.items():
         for advisory in advisories:
-
-            insert_advisory_query = """
-                INSERT INTO SecurityAdvisories (repo_id, repository_name, ghsa_id, cve_id, html_url, published_at, summary, severity, updated_at)
-                OUTPUT INSERTED.advisory_id
-                VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            cursor.execute(insert_advisory_query, (
+            values = (
                 repo_name,
                 advisory['ghsa_id'],
                 advisory.get('cve_id', None),
@@ -46,72 +67,127 @@ def security_advisories_insert(conn, cursor):
                 advisory['summary'],
                 advisory['severity'],
                 advisory['updated_at']
+            )
+
+            if not upsert:
+                cursor.execute("""
+                    INSERT INTO SecurityAdvisories (repo_id, repository_name, ghsa_id, cve_id, html_url, published_at, summary, severity, updated_at)
+                    OUTPUT INSERTED.advisory_id
+                    VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, values)
+                advisory_id = cursor.fetchone()[0]
+                _insert_advisory_children(cursor, advisory_id, advisory)
+                continue
+
+            # The hash also covers the child rows so a changed range or score is picked up
+            digest = row_hash(values + (
+                [(_package_name(vuln), vuln['vulnerable_version_range']) for vuln in advisory.get('vulnerabilities', [])],
+                [advisory.get(f'cvss_{version}') for version in [3, 4]],
             ))
-            advisory_id = cursor.fetchone()[0]
+            current = existing.get(advisory['ghsa_id'])
 
-            for vuln in advisory.get('vulnerabilities', []):
+            if current is None:
+                cursor.execute("""
+                    INSERT INTO SecurityAdvisories (repo_id, repository_name, ghsa_id, cve_id, html_url, published_at, summary, severity, updated_at, row_hash)
+                    OUTPUT INSERTED.advisory_id
+                    VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, values + (digest,))
+                advisory_id = cursor.fetchone()[0]
+                stats["inserted"] += 1
+            elif current[1] != digest:
+                advisory_id = current[0]
                 cursor.execute("""
-                    INSERT INTO VulnerablePackages (advisory_id, package_name, vulnerable_version_range)
-                    VALUES (?, ?, ?)
-                """, (advisory_id, vuln['package'], vuln['vulnerable_version_range']))
-
-            for version in [3, 4]:
-                cvss_key = f'cvss_{version}'
-                if advisory.get(cvss_key):
-                    cursor.execute("""
-                        INSERT INTO CVSS_Scores (advisory_id, version, vector_string, score)
-                        VALUES (?, ?, ?, ?)
-                    """, (advisory_id, version, advisory[cvss_key]['vector_string'], advisory[cvss_key]['score']))
+                    UPDATE SecurityAdvisories
+                    SET repository_name = ?, cve_id = ?, html_url = ?, published_at = ?, summary = ?, severity = ?, updated_at = ?, row_hash = ?
+                    WHERE advisory_id = ?
+                """, values[:1] + values[2:] + (digest, advisory_id))
+                cursor.execute("DELETE FROM VulnerablePackages WHERE advisory_id = ?", (advisory_id,))
+                cursor.execute("DELETE FROM CVSS_Scores WHERE advisory_id = ?", (advisory_id,))
+                stats["updated"] += 1
+            else:
+                stats["unchanged"] += 1
+                continue
+
+            existing[advisory['ghsa_id']] = (advisory_id, digest)
+            _insert_advisory_children(cursor, advisory_id, advisory)
 
     conn.commit()
 
+    if upsert:
+        print_upsert_summary("SecurityAdvisories", stats)
     print("Data successfully inserted into SQL Server.")
 
-def insert_cve_mapping(conn, cursor, tag_name, json_file):
-    with open(json_file, 'r', encoding='utf-8') as file:
-        data = json.load(file)
+def insert_cve_mapping(conn, cursor, tag_name, json_file, upsert=False, repo_id=1):
+    data = ArtifactStore.read_json(json_file)
 
+    rows = []
     for item in data:
         cve_id = item.get('cve_id')
         artifact_name = item.get('artifact_name')
         artifact_version = item.get('artifact_version')
         # You can process the URLs if needed, for now they are not inserted into the DB
         urls = item.get('urls')
-        
+
+        rows.append((repo_id, tag_name, cve_id, artifact_name, artifact_version))
+
+    if upsert:
+        ensure_row_hash_column(conn, cursor, "CVE_Mapping")
+        existing = fetch_row_hashes(cursor, "CVE_Mapping", NATURAL_KEYS["CVE_Mapping"],
+                                    "repo_id = ? AND tag_name = ?", (repo_id, tag_name))
+        stats = upsert_rows(conn, cursor, "CVE_Mapping", NATURAL_KEYS["CVE_Mapping"], ("artifact_version",), rows, existing)
+        print_upsert_summary(f"CVE_Mapping {tag_name}", stats)
+        return stats
+
+    for row in rows:
         cursor.execute("""
             INSERT INTO CVE_Mapping (repo_id, tag_name, cve_id, artifact_name, artifact_version)
-            VALUES (1, ?, ?, ?, ?)
-        """, (
-            tag_name,
-            cve_id,
-            artifact_name,
-            artifact_version
-        ))
+            VALUES (?, ?, ?, ?, ?)
+        """, row)
         
     conn.commit()
 
-def insert_repo_releases(conn, cursor, json_file):
-    with open(json_file, 'r') as file:
-        data = json.load(file)
+def insert_repo_releases(conn, cursor, json_file, upsert=False, repo_id=1):
+    data = ArtifactStore.read_json(json_file)
 
-    for release in data:
-        cursor.execute("""
-            INSERT INTO Repo_Releases (repo_id, tag_name, tarball_url, prerelease, published_at)
-            VALUES (1, ?, ?, ?, ?)
-        """, (
+    rows = [
+        (
+            repo_id,
             release["tag_name"],
             release["tarball_url"],
             1 if release["prerelease"] else 0,
             release["published_at"]
-        ))
+        )
+        for release in data
+    ]
+
+    if upsert:
+        ensure_row_hash_column(conn, cursor, "Repo_Releases")
+        existing = fetch_row_hashes(cursor, "Repo_Releases", NATURAL_KEYS["Repo_Releases"], "repo_id = ?", (repo_id,))
+        stats = upsert_rows(conn, cursor, "Repo_Releases", NATURAL_KEYS["Repo_Releases"],
+                            ("tarball_url", "prerelease", "published_at"), rows, existing)
+        print_upsert_summary("Repo_Releases", stats)
+        return stats
+
+    for row in rows:
+        cursor.execute("""
+            INSERT INTO Repo_Releases (repo_id, tag_name, tarball_url, prerelease, published_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, row)
 
     conn.commit()
 
-def process_cve_files(directory, conn, cursor):
+def process_cve_files(directory, conn, cursor, upsert=False, root=ArtifactStore.ARTIFACT_ROOT, repo_full_name=None, repo_id=1):
+    # Stored analyses come from the artifact index; {tag}.cve_analysis.json files left in directory are still loaded.
+    # Everything is written under repo_id, so the store must hold only that repo or repo_full_name must select it
+    for repo, tag_name, path in ArtifactStore.find_one_repo("cve_analysis", repo_full_name, root):
+        print(f"Processing: {repo}@{tag_name}")
+        insert_cve_mapping(conn, cursor, tag_name, path, upsert=upsert, repo_id=repo_id)
+
     for filename in os.listdir(directory):
         if "cve_analysis.json" in filename:
             print(f"Processing: {filename}")
-            insert_cve_mapping(conn, cursor, filename.replace(".cve_analysis.json", ""), os.path.join(directory, filename))
+            insert_cve_mapping(conn, cursor, filename.replace(".cve_analysis.json", ""), os.path.join(directory, filename),
+                               upsert=upsert, repo_id=repo_id)
 
 if __name__ == "__main__":
     server = 'DESKTOP-3FC1SUJ'
@@ -129,8 +205,11 @@ if __name__ == "__main__":
     #https://docs.github.com/en/rest/security-advisories/repository-advisories?apiVersion=2022-11-28#list-repository-security-advisories
     #security_advisories_insert(conn, cursor)
 
-    insert_repo_releases(conn, cursor, "repo_releases.json")
-    process_cve_files(".", conn, cursor)
+    # upsert=True makes re-runs idempotent: only new or changed rows are written
+    # Release list saved by the scan, or the old repo_releases.json
+    releases = ArtifactStore.find_one_repo("releases")
+    insert_repo_releases(conn, cursor, releases[0][2] if releases else "repo_releases.json", upsert=True)
+    process_cve_files(".", conn, cursor, upsert=True)
 
     cursor.close()
     conn.close()
@@ -0,0 +1,101 @@
+import hashlib
+import json
+
+# Natural keys used to match re-loaded rows against what is already stored
+NATURAL_KEYS = {
+    "Repo_Releases": ("repo_id", "tag_name"),
+    "CVE_Mapping": ("repo_id", "tag_name", "cve_id", "artifact_name"),
+    "CVE_History": ("cve_id",),
+    "SecurityAdvisories": ("ghsa_id",),
+}
+
+def row_hash(values):
+    # Stable sha256 over the row content, independent of the driver types
+    payload = json.dumps(list(values), default=str, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def ensure_row_hash_column(conn, cursor, table_name):
+    cursor.execute(f"""
+        IF COL_LENGTH('{table_name}', 'row_hash') IS NULL
+            ALTER TABLE {table_name} ADD row_hash CHAR(64) NULL
+    """)
+    conn.commit()
+
+_MISSING = object()
+
+def _key_condition(key_columns):
+    # NULL-safe equality so rows without an artifact name still match
+    return " AND ".join(f"({col} = ? OR ({col} IS NULL AND ? IS NULL))" for col in key_columns)
+
+def _key_params(key):
+    params = []
+    for value in key:
+        params.extend((value, value))
+    return params
+
+def fetch_row_hashes(cursor, table_name, key_columns, where=None, params=()):
+    query = f"SELECT {', '.join(key_columns)}, row_hash FROM {table_name}"
+    if where:
+        query += f" WHERE {where}"
+    cursor.execute(query, params)
+
+    existing = {}
+    for row in cursor.fetchall():
+        existing[tuple(row[:-1])] = row[-1]
+    return existing
+
+def upsert_rows(conn, cursor, table_name, key_columns, value_columns, rows, existing=None, commit=True, pending=None):
+    """Insert new rows, update changed ones and skip rows whose hash is unchanged.
+
+    `rows` are tuples ordered as key_columns + value_columns. `existing` is a
+    {key: row_hash} dict (see fetch_row_hashes) of what is committed; the new
+    hashes are merged into it only once the commit succeeds, so it can be reused
+    across several batches of the same table and survives a rolled back batch.
+    With commit=False the hashes of the rows written are added to `pending`
+    instead, for the caller to merge into `existing` after its own commit.
+    """
+    if existing is None:
+        existing = fetch_row_hashes(cursor, table_name, key_columns)
+    pending = {} if pending is None else pending
+
+    n_keys = len(key_columns)
+    inserts = []
+    updates = []
+    unchanged = 0
+    written = {}
+
+    for row in rows:
+        key = tuple(row[:n_keys])
+        values = tuple(row[n_keys:])
+        digest = row_hash(values)
+
+        # Rows written earlier in this transaction count as stored
+        stored = written.get(key, pending.get(key, existing.get(key, _MISSING)))
+        if stored is _MISSING:
+            inserts.append(key + values + (digest,))
+        elif stored != digest:
+            updates.append(values + (digest,) + tuple(_key_params(key)))
+        else:
+            unchanged += 1
+        written[key] = digest
+
+    columns = list(key_columns) + list(value_columns) + ["row_hash"]
+    if inserts:
+        placeholders = ", ".join("?" for _ in columns)
+        cursor.fast_executemany = True
+        cursor.executemany(f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})", inserts)
+
+    if updates:
+        assignments = ", ".join(f"{col} = ?" for col in list(value_columns) + ["row_hash"])
+        cursor.fast_executemany = True
+        cursor.executemany(f"UPDATE {table_name} SET {assignments} WHERE {_key_condition(key_columns)}", updates)
+
+    pending.update(written)
+    if commit:
+        conn.commit()
+        existing.update(pending)
+
+    return {"inserted": len(inserts), "updated": len(updates), "unchanged": unchanged}
+
+def print_upsert_summary(table_name, stats):
+    print(f"{table_name}: {stats['inserted']} inserted, {stats['updated']} updated, {stats['unchanged']} unchanged")
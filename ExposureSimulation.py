@@ -0,0 +1,114 @@
+import numpy as np
+
+import SimulationRandom
+
+MODEL_KEY = "8.8"
+
+# Bandas de severidad por puntuación CVSS: 0 = Bajo/Medio (< 7), 1 = Alto (7 - 9), 2 = Crítico (>= 9)
+BAND_EDGES = [7.0, 9.0]
+BAND_LABELS = ["Bajo/Medio", "Alto", "Crítico"]
+
+# Rangos [min, max) por banda, en el mismo orden que BAND_LABELS
+DEFAULT_PARAMS = {
+    "affected_no_sbom": [(1, 4), (3, 5), (4, 6)],
+    "affected_with_sbom": [(1, 2), (1, 3), (2, 4)],
+    "detection_no_sbom": [(120, 201), (90, 171), (80, 161)],
+    "detection_with_sbom": [(10, 26), (10, 26), (10, 26)],
+    "remediation_no_sbom": [(80, 161), (40, 101), (25, 76)],
+    "remediation_with_sbom": [(50, 151), (15, 61), (5, 21)],
+}
+
+VARIABLES = list(DEFAULT_PARAMS)
+
+BLOCK_ELEMENTS = 2_000_000
+
+# Métricas de simulate con un valor por réplica (las que SimulationRandom.run_replications concatena)
+PER_REPLICATION = tuple(["panorama_no_sbom", "panorama_with_sbom"] + VARIABLES[2:] + ["total_no_sbom", "total_with_sbom"]
+                        + [f"{metric}_improvement" for metric in ("panorama", "detection", "remediation", "total")])
+
+def score_bands(base_score):
+    scores = np.asarray(base_score, dtype=float)
+    bands = np.digitize(scores, BAND_EDGES)
+    # Las puntuaciones nulas no cumplen ninguna comparación en el script original: Bajo/Medio
+    bands[np.isnan(scores)] = 0
+    return bands.astype(np.int8)
+
+def _band_ranges(params, bands):
+    # Límites (filas, variables) para convertir los enteros de 53 bits de cada fila
+    low = np.stack([np.array([r[0] for r in params[name]])[bands] for name in VARIABLES], axis=1)
+    high = np.stack([np.array([r[1] for r in params[name]])[bands] for name in VARIABLES], axis=1)
+    return low, high
+
+def score_tenths(base_score):
+    # Las puntuaciones CVSS tienen un decimal: en décimas el panorama se acumula con enteros exactos.
+    # Las nulas no suman al panorama (igual que Series.sum)
+    return np.rint(np.nan_to_num(np.asarray(base_score, dtype=float)) * 10)
+
+def new_state(replications=1, seed=42, params=None, repo="", first_replication=0):
+    return {
+        "params": {**DEFAULT_PARAMS, **(params or {})},
+        "seed": seed,
+        "repo": repo,
+        "first_replication": first_replication,
+        "replications": replications,
+        "rows": 0,
+        # Sumas enteras por réplica y variable; las de sistemas afectados van ponderadas por la severidad en décimas
+        "sums": np.zeros((replications, len(VARIABLES)), dtype=np.int64),
+    }
+
+def accumulate(state, base_score, offset=None):
+    """Suma un bloque de filas que empieza en la fila `offset` (por defecto, a continuación del anterior)."""
+    scores = np.asarray(base_score, dtype=float)
+    offset = state["rows"] if offset is None else offset
+    n = len(scores)
+    low, high = _band_ranges(state["params"], score_bands(scores))
+    weights = score_tenths(scores)
+
+    block = max(1, BLOCK_ELEMENTS // max(n * len(VARIABLES), 1))
+    for start in range(0, state["replications"], block):
+        b = min(block, state["replications"] - start)
+        k = SimulationRandom.row_draws(state["seed"], MODEL_KEY, state["repo"], b, state["first_replication"] + start,
+                                       offset, n, len(VARIABLES))
+        draws = SimulationRandom.to_integers(k, low, high)
+
+        sums = draws.sum(axis=1)
+        # Panorama de vulnerabilidad: severidad * sistemas afectados
+        sums[:, 0] = np.rint(draws[:, :, 0] @ weights).astype(np.int64)
+        sums[:, 1] = np.rint(draws[:, :, 1] @ weights).astype(np.int64)
+        state["sums"][start:start + b] += sums
+
+    state["rows"] = max(state["rows"], offset + n)
+    return state
+
+def finalize(state):
+    sums = state["sums"]
+    rows = state["rows"]
+    results = {
+        "panorama_no_sbom": sums[:, 0] / 10,
+        "panorama_with_sbom": sums[:, 1] / 10,
+    }
+    for i, name in enumerate(VARIABLES[2:], start=2):
+        results[name] = sums[:, i] / rows
+
+    # Tiempo total desde la divulgación hasta la remediación
+    results["total_no_sbom"] = results["detection_no_sbom"] + results["remediation_no_sbom"]
+    results["total_with_sbom"] = results["detection_with_sbom"] + results["remediation_with_sbom"]
+
+    for metric in ("panorama", "detection", "remediation", "total"):
+        no_sbom = results[f"{metric}_no_sbom"]
+        results[f"{metric}_improvement"] = (no_sbom - results[f"{metric}_with_sbom"]) / no_sbom * 100
+
+    return results
+
+def simulate(base_score, replications=1, seed=42, params=None, repo="", first_replication=0):
+    """Simula sistemas afectados, detección y remediación para todos los CVE y réplicas.
+
+    Devuelve un arreglo por métrica con un valor por réplica. Los valores aleatorios dependen solo de
+    (réplica, fila), igual que en SimulationChunked.
+    """
+    scores = np.asarray(base_score, dtype=float)
+    state = new_state(replications, seed, params, repo, first_replication)
+    chunk = max(1, BLOCK_ELEMENTS // len(VARIABLES))
+    for start in range(0, len(scores), chunk):
+        accumulate(state, scores[start:start + chunk], offset=start)
+    return finalize(state)
@@ -0,0 +1,111 @@
+import contextlib
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import GitHubRequest
+import GitHubStandIn
+import RequestTelemetry
+
+# Fetch strategies for the activity crawl (GitHubRequest.main), measured against GitHubStandIn
+WORKERS = 8
+
+def fetch_separate(repo_full_name):
+    # What main() used to do: one walk for commits and another one for merges
+    return {
+        "commits": GitHubRequest.get_recent_commits(repo_full_name),
+        "merges": GitHubRequest.get_recent_merges(repo_full_name),
+        "advisories": GitHubRequest.get_public_security_advisories(repo_full_name),
+    }
+
+def fetch_single_pass(repo_full_name):
+    commits, merges = GitHubRequest.get_recent_activity(repo_full_name)
+    return {"commits": commits, "merges": merges,
+            "advisories": GitHubRequest.get_public_security_advisories(repo_full_name)}
+
+STRATEGIES = {
+    "separate": {"fetch": fetch_separate, "workers": 1},
+    "single_pass": {"fetch": fetch_single_pass, "workers": 1},
+    "threaded": {"fetch": fetch_single_pass, "workers": WORKERS},
+}
+
+def timed(fetch, repo_full_name):
+    start = time.perf_counter()
+    result = fetch(repo_full_name)
+    return repo_full_name, result, time.perf_counter() - start
+
+def run_strategy(server, name, repos, page_delay=0.0, rate_limit_delay=1.0):
+    """Wall time, requests/s and rate-limit budget of one strategy over `repos`."""
+    strategy = STRATEGIES[name]
+    GitHubRequest.GITHUB_API_URL = server.url
+    GitHubRequest.PAGE_DELAY = page_delay
+    GitHubRequest.RATE_LIMIT_DELAY = rate_limit_delay
+    server.reset_stats()
+    RequestTelemetry.TELEMETRY.reset()
+
+    start = time.perf_counter()
+    # The crawler prints a line per repo and page
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=strategy["workers"]) as executor:
+            fetched = list(executor.map(lambda repo: timed(strategy["fetch"], repo), repos))
+    wall = time.perf_counter() - start
+
+    per_repo = [seconds for _, _, seconds in fetched]
+    # Every request that was not throttled counts against the rate limit, across window resets
+    budget_used = server.stats["requests"] - server.stats["throttled"]
+    stats = {
+        "strategy": name,
+        "workers": strategy["workers"],
+        "repos": len(repos),
+        "wall_seconds": wall,
+        "requests": server.stats["requests"],
+        "requests_per_second": server.stats["requests"] / wall if wall else None,
+        "throttled": server.stats["throttled"],
+        "budget_used": budget_used,
+        "budget_per_repo": budget_used / len(repos) if repos else None,
+        "repo_seconds_mean": sum(per_repo) / len(per_repo) if per_repo else None,
+        "repo_seconds_max": max(per_repo, default=None),
+        "by_path": dict(server.stats["by_path"]),
+    }
+    # Where the time went: waiting on responses versus sleeping between them
+    telemetry = RequestTelemetry.TELEMETRY.snapshot()
+    stats["request_seconds"] = sum(endpoint["seconds_total"] for endpoint in telemetry["endpoints"])
+    stats["sleep_seconds"] = sum(entry["seconds"] for entry in telemetry["sleeps"])
+    return stats, {repo: result for repo, result, _ in fetched}
+
+def run_benchmark(strategies=None, repo_count=10, latency=0.05, jitter=0.0, page_delay=0.0,
+                  rate_limit=GitHubStandIn.RATE_LIMIT, rate_window=GitHubStandIn.RATE_WINDOW, rate_limit_delay=1.0,
+                  commits_per_repo=300, fixtures=None):
+    """Runs every strategy on the same stand-in and checks they fetch the same data.
+
+    A small rate_limit with a short rate_window shows how much each strategy loses waiting on 403s.
+    """
+    fixtures = fixtures or GitHubStandIn.load_fixtures(commits_per_repo=commits_per_repo)
+    repos = list(fixtures["repos"])[:repo_count]
+    server = GitHubStandIn.start_server(fixtures, latency=latency, jitter=jitter,
+                                         rate_limit=rate_limit, rate_window=rate_window)
+    original = GitHubRequest.GITHUB_API_URL, GitHubRequest.PAGE_DELAY, GitHubRequest.RATE_LIMIT_DELAY
+    try:
+        results = []
+        reference = None
+        for name in strategies or list(STRATEGIES):
+            stats, data = run_strategy(server, name, repos, page_delay, rate_limit_delay)
+            reference = reference if reference is not None else data
+            stats["same_data"] = data == reference
+            results.append(stats)
+            print(f"{name:>12}: {stats['wall_seconds']:.2f} s, {stats['requests']} requests "
+                  f"({stats['requests_per_second']:.1f}/s), {stats['budget_per_repo']:.1f} per repo, "
+                  f"{stats['throttled']} throttled, {stats['sleep_seconds']:.2f} s asleep, same data: {stats['same_data']}")
+        return results
+    finally:
+        GitHubRequest.GITHUB_API_URL, GitHubRequest.PAGE_DELAY, GitHubRequest.RATE_LIMIT_DELAY = original
+        GitHubStandIn.stop_server(server)
+
+def save_results(results, filename="fetch_benchmark.json"):
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(f"Fetch benchmark saved to {filename}")
+
+if __name__ == "__main__":
+    save_results(run_benchmark())
@@ -1,22 +1,34 @@
-import requests
+import os
 import time
 import json
 import csv
 from collections import defaultdict
 from datetime import datetime, timedelta
 
-GITHUB_API_URL = "https://api.github.com"
-GITHUB_TOKEN = ""
+import GitMirror
+import RequestTelemetry
+
+# GITHUB_API_URL can point to a GitHubStandIn server to run without touching GitHub
+GITHUB_API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN", "")
 HEADERS = {
     "Accept": "application/vnd.github.v3+json",
     "Authorization": f"Bearer { GITHUB_TOKEN }",
 }
 
+# Pauses in seconds between pages, between repos and after hitting the rate limit
+PAGE_DELAY = float(os.environ.get("GITHUB_PAGE_DELAY", 1))
+REPO_DELAY = float(os.environ.get("GITHUB_REPO_DELAY", 2))
+RATE_LIMIT_DELAY = float(os.environ.get("GITHUB_RATE_LIMIT_DELAY", 60))
+
+# "api" pages /repos/{repo}/commits; "git" counts from a local blob-less mirror (GitMirror) with no API budget
+COMMIT_BACKEND = os.environ.get("GITHUB_COMMIT_BACKEND", "api")
+
 TEN_DAYS_AGO = (datetime.now() - timedelta(days=10)).isoformat() + "Z"
 
 def get_top_repositories():
     url = f"{GITHUB_API_URL}/search/repositories?q=stars:>10000&sort=stars&order=desc&per_page=100"
-    response = requests.get(url, headers=HEADERS)
+    response = RequestTelemetry.traced_get(url, "github", headers=HEADERS)
 
     if response.status_code != 200:
         raise Exception(f"Error fetching repositories: {response.status_code}, {response.text}")
@@ -31,7 +43,7 @@ def get_top_mixed_repositories():
     repos = {}
 
     # Fetch repositories sorted by stars
-    response = requests.get(stars_url, headers=HEADERS)
+    response = RequestTelemetry.traced_get(stars_url, "github", headers=HEADERS)
     if response.status_code == 200:
         for repo in response.json()["items"]:
             repos[repo["full_name"]] = {
@@ -43,7 +55,7 @@ def get_top_mixed_repositories():
             }
 
     # Fetch repositories sorted by forks
-    response = requests.get(forks_url, headers=HEADERS)
+    response = RequestTelemetry.traced_get(forks_url, "github", headers=HEADERS)
     if response.status_code == 200:
         for repo in response.json()["items"]:
             if repo["full_name"] not in repos:
@@ -62,7 +74,7 @@ def get_top_mixed_repositories():
 
 def get_default_branch(repo_full_name):
     url = f"{GITHUB_API_URL}/repos/{repo_full_name}"
-    response = requests.get(url, headers=HEADERS)
+    response = RequestTelemetry.traced_get(url, "github", headers=HEADERS)
 
     if response.status_code == 200:
         return response.json().get("default_branch", "master")
@@ -71,6 +83,9 @@ def get_default_branch(repo_full_name):
         return "master"
 
 def get_recent_merges(repo_full_name):
+    if COMMIT_BACKEND == "git":
+        return GitMirror.merges_per_day(repo_full_name, TEN_DAYS_AGO)
+
     branch = get_default_branch(repo_full_name)
     print(f"Fetching merges for {repo_full_name} on branch: {branch}")
 
@@ -80,11 +95,11 @@ def get_recent_merges(repo_full_name):
     while True:
         url = (f"{GITHUB_API_URL}/repos/{repo_full_name}/commits?"
                f"per_page=100&page={page}&since={TEN_DAYS_AGO}&sha={branch}")
-        response = requests.get(url, headers=HEADERS)
+        response = RequestTelemetry.traced_get(url, "github", headers=HEADERS)
 
         if response.status_code == 403:
-            print("Rate limit reached. Sleeping for 60 seconds...")
-            time.sleep(60)
+            print(f"Rate limit reached. Sleeping for {RATE_LIMIT_DELAY:g} seconds...")
+            RequestTelemetry.traced_sleep(RATE_LIMIT_DELAY, "rate_limit", "github", repo_full_name)
             continue
         elif response.status_code == 409:
             return {}
@@ -104,22 +119,25 @@ def get_recent_merges(repo_full_name):
                 merges_per_day[merge_date] += 1
 
         page += 1
-        time.sleep(1)
+        RequestTelemetry.traced_sleep(PAGE_DELAY, "page_delay", "github", repo_full_name)
 
     return dict(merges_per_day)
 
 def get_recent_commits(repo_full_name):
+    if COMMIT_BACKEND == "git":
+        return GitMirror.commits_per_day(repo_full_name, TEN_DAYS_AGO)
+
     print(f"Fetching commits for {repo_full_name}")
     commits_per_day = defaultdict(int)
     page = 1
 
     while True:
         url = f"{GITHUB_API_URL}/repos/{repo_full_name}/commits?per_page=100&page={page}&since={TEN_DAYS_AGO}"
-        response = requests.get(url, headers=HEADERS)
+        response = RequestTelemetry.traced_get(url, "github", headers=HEADERS)
 
         if response.status_code == 403:  # Rate limit
-            print("Rate limit reached. Sleeping for 60 seconds...")
-            time.sleep(60)
+            print(f"Rate limit reached. Sleeping for {RATE_LIMIT_DELAY:g} seconds...")
+            RequestTelemetry.traced_sleep(RATE_LIMIT_DELAY, "rate_limit", "github", repo_full_name)
             continue
         elif response.status_code == 409:  # Empty repository
             return {}
@@ -137,21 +155,67 @@ def get_recent_commits(repo_full_name):
             commits_per_day[commit_date] += 1
 
         page += 1
-        time.sleep(1)
+        RequestTelemetry.traced_sleep(PAGE_DELAY, "page_delay", "github", repo_full_name)
 
     return dict(commits_per_day)
 
+def get_recent_activity(repo_full_name):
+    if COMMIT_BACKEND == "git":
+        return GitMirror.activity_per_day(repo_full_name, TEN_DAYS_AGO)
+
+    # Same counts as get_recent_commits + get_recent_merges, from a single walk over the default branch
+    branch = get_default_branch(repo_full_name)
+    print(f"Fetching commits and merges for {repo_full_name} on branch: {branch}")
+
+    commits_per_day = defaultdict(int)
+    merges_per_day = defaultdict(int)
+    page = 1
+
+    while True:
+        url = (f"{GITHUB_API_URL}/repos/{repo_full_name}/commits?"
+               f"per_page=100&page={page}&since={TEN_DAYS_AGO}&sha={branch}")
+        response = RequestTelemetry.traced_get(url, "github", headers=HEADERS)
+
+        if response.status_code == 403:
+            print(f"Rate limit reached. Sleeping for {RATE_LIMIT_DELAY:g} seconds...")
+            RequestTelemetry.traced_sleep(RATE_LIMIT_DELAY, "rate_limit", "github", repo_full_name)
+            continue
+        elif response.status_code == 409:
+            return {}, {}
+
+        if response.status_code != 200:
+            print(f"Error fetching commits for {repo_full_name}: {response.status_code}, {response.text}")
+            return None, None
+
+        commits = response.json()
+        if not commits:
+            break
+
+        for commit in commits:
+            commit_date = commit["commit"]["committer"]["date"][:10]
+            commits_per_day[commit_date] += 1
+            if len(commit.get("parents", [])) > 1:
+                merges_per_day[commit_date] += 1
+
+        page += 1
+        RequestTelemetry.traced_sleep(PAGE_DELAY, "page_delay", "github", repo_full_name)
+
+    return dict(commits_per_day), dict(merges_per_day)
+
 def get_all_commits(repo_full_name):
+    if COMMIT_BACKEND == "git":
+        return GitMirror.commits_per_day(repo_full_name)
+
     commits_per_day = defaultdict(int)
     page = 1
 
     while True:
         url = f"{GITHUB_API_URL}/repos/{repo_full_name}/commits?per_page=100&page={page}"
-        response = requests.get(url, headers=HEADERS)
+        response = RequestTelemetry.traced_get(url, "github", headers=HEADERS)
 
         if response.status_code == 403:
-            print("Rate limit reached. Sleeping for 60 seconds...")
-            time.sleep(60)
+            print(f"Rate limit reached. Sleeping for {RATE_LIMIT_DELAY:g} seconds...")
+            RequestTelemetry.traced_sleep(RATE_LIMIT_DELAY, "rate_limit", "github", repo_full_name)
             continue
         elif response.status_code == 409:
             return {}
@@ -169,13 +233,13 @@ def get_all_commits(repo_full_name):
             commits_per_day[commit_date] += 1
 
         page += 1
-        time.sleep(1)
+        RequestTelemetry.traced_sleep(PAGE_DELAY, "page_delay", "github", repo_full_name)
 
     return dict(commits_per_day)
 
 def get_public_security_advisories(repo_full_name):
     url = f"{GITHUB_API_URL}/repos/{repo_full_name}/security-advisories?per_page=10&sort=updated"
-    response = requests.get(url, headers=HEADERS)
+    response = RequestTelemetry.traced_get(url, "github", headers=HEADERS)
 
     if response.status_code == 403:
         print(f"Access denied for security advisories in {repo_full_name}. Requires admin access.")
@@ -198,7 +262,7 @@ def get_public_security_advisories(repo_full_name):
             "severity": advisory.get("severity"),
             "vulnerabilities": [
                 {
-                    "package": vuln.get("package", {}).get("ecosystem"),
+                    "package": {"ecosystem": (vuln.get("package") or {}).get("ecosystem"), "name": (vuln.get("package") or {}).get("name")},
                     "vulnerable_version_range": vuln.get("vulnerable_version_range"),
                     "vulnerable_functions": vuln.get("vulnerable_functions", [])
                 }
@@ -227,8 +291,7 @@ def main():
     repo_advisory_data = {}
 
     for repo in top_repos:
-        commits_per_day = get_recent_commits(repo["name"])
-        merges_per_day = get_recent_merges(repo["name"])
+        commits_per_day, merges_per_day = get_recent_activity(repo["name"])
         advisories = get_public_security_advisories(repo["name"])
 
         """if commits_per_day is not None:
@@ -243,10 +306,11 @@ def main():
         if advisories is not None:
             repo_advisory_data[repo["name"]] = advisories
 
-        time.sleep(2)
+        RequestTelemetry.traced_sleep(REPO_DELAY, "repo_delay", "github", repo["name"])
 
     save_to_json(repo_data, "repo_commit_merge_data.json")
     save_to_json(repo_advisory_data, "security_advisories.json")
+    RequestTelemetry.save()
                    
 if __name__ == "__main__":
     if not GITHUB_TOKEN:
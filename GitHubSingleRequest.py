@@ -1,22 +1,34 @@
-import requests
+import os
 import time
 import json
 import csv
 from collections import defaultdict
 from datetime import datetime, timedelta
 
-GITHUB_API_URL = "https://api.github.com"
-GITHUB_TOKEN = ""
+import GitMirror
+import RequestTelemetry
+
+# GITHUB_API_URL can point to a GitHubStandIn server to run without touching GitHub
+GITHUB_API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN", "")
 HEADERS = {
     "Accept": "application/vnd.github.v3+json",
     "Authorization": f"Bearer { GITHUB_TOKEN }",
 }
 
+# Pauses in seconds between pages, between repos and after hitting the rate limit
+PAGE_DELAY = float(os.environ.get("GITHUB_PAGE_DELAY", 1))
+REPO_DELAY = float(os.environ.get("GITHUB_REPO_DELAY", 2))
+RATE_LIMIT_DELAY = float(os.environ.get("GITHUB_RATE_LIMIT_DELAY", 60))
+
+# "api" pages /repos/{repo}/commits; "git" counts from a local blob-less mirror (GitMirror) with no API budget
+COMMIT_BACKEND = os.environ.get("GITHUB_COMMIT_BACKEND", "api")
+
 DAYS_AGO = (datetime.now() - timedelta(days=365)).isoformat() + "Z"
 
 def get_default_branch(repo_full_name):
     url = f"{GITHUB_API_URL}/repos/{repo_full_name}"
-    response = requests.get(url, headers=HEADERS)
+    response = RequestTelemetry.traced_get(url, "github", headers=HEADERS)
 
     if response.status_code == 200:
         return response.json().get("default_branch", "master")
@@ -25,6 +37,9 @@ def get_default_branch(repo_full_name):
         return "master"
     
 def get_all_merges(repo_full_name):
+    if COMMIT_BACKEND == "git":
+        return GitMirror.merges_per_day(repo_full_name)
+
     branch = get_default_branch(repo_full_name)
     print(f"Fetching merges for {repo_full_name} on branch: {branch}")
 
@@ -34,11 +49,11 @@ def get_all_merges(repo_full_name):
     while True:
         url = (f"{GITHUB_API_URL}/repos/{repo_full_name}/commits?"
                f"per_page=100&page={page}&sha={branch}")
-        response = requests.get(url, headers=HEADERS)
+        response = RequestTelemetry.traced_get(url, "github", headers=HEADERS)
 
         if response.status_code == 403:
-            print("Rate limit reached. Sleeping for 60 seconds...")
-            time.sleep(60)
+            print(f"Rate limit reached. Sleeping for {RATE_LIMIT_DELAY:g} seconds...")
+            RequestTelemetry.traced_sleep(RATE_LIMIT_DELAY, "rate_limit", "github", repo_full_name)
             continue
         elif response.status_code == 409:
             return {}
@@ -58,11 +73,14 @@ def get_all_merges(repo_full_name):
                 merges_per_day[merge_date] += 1
 
         page += 1
-        time.sleep(1)
+        RequestTelemetry.traced_sleep(PAGE_DELAY, "page_delay", "github", repo_full_name)
 
     return dict(merges_per_day)
     
 def get_recent_merges(repo_full_name):
+    if COMMIT_BACKEND == "git":
+        return GitMirror.merges_per_day(repo_full_name, DAYS_AGO)
+
     branch = get_default_branch(repo_full_name)
     print(f"Fetching merges for {repo_full_name} on branch: {branch}")
 
@@ -72,11 +90,11 @@ def get_recent_merges(repo_full_name):
     while True:
         url = (f"{GITHUB_API_URL}/repos/{repo_full_name}/commits?"
                f"per_page=100&page={page}&since={DAYS_AGO}&sha={branch}")
-        response = requests.get(url, headers=HEADERS)
+        response = RequestTelemetry.traced_get(url, "github", headers=HEADERS)
 
         if response.status_code == 403:
-            print("Rate limit reached. Sleeping for 60 seconds...")
-            time.sleep(60)
+            print(f"Rate limit reached. Sleeping for {RATE_LIMIT_DELAY:g} seconds...")
+            RequestTelemetry.traced_sleep(RATE_LIMIT_DELAY, "rate_limit", "github", repo_full_name)
             continue
         elif response.status_code == 409:
             return {}
@@ -96,22 +114,25 @@ def get_recent_merges(repo_full_name):
                 merges_per_day[merge_date] += 1
 
         page += 1
-        time.sleep(1)
+        RequestTelemetry.traced_sleep(PAGE_DELAY, "page_delay", "github", repo_full_name)
 
     return dict(merges_per_day)
 
 def get_all_commits(repo_full_name):
+    if COMMIT_BACKEND == "git":
+        return GitMirror.commits_per_day(repo_full_name)
+
     print(f"Fetching commits for {repo_full_name}")
     commits_per_day = defaultdict(int)
     page = 1
 
     while True:
         url = f"{GITHUB_API_URL}/repos/{repo_full_name}/commits?per_page=100&page={page}"
-        response = requests.get(url, headers=HEADERS)
+        response = RequestTelemetry.traced_get(url, "github", headers=HEADERS)
 
         if response.status_code == 403:
-            print("Rate limit reached. Sleeping for 60 seconds...")
-            time.sleep(60)
+            print(f"Rate limit reached. Sleeping for {RATE_LIMIT_DELAY:g} seconds...")
+            RequestTelemetry.traced_sleep(RATE_LIMIT_DELAY, "rate_limit", "github", repo_full_name)
             continue
         elif response.status_code == 409:
             return {}
@@ -129,23 +150,26 @@ def get_all_commits(repo_full_name):
             commits_per_day[commit_date] += 1
 
         page += 1
-        time.sleep(1)
+        RequestTelemetry.traced_sleep(PAGE_DELAY, "page_delay", "github", repo_full_name)
 
     return dict(commits_per_day)
 
 
 def get_recent_commits(repo_full_name):
+    if COMMIT_BACKEND == "git":
+        return GitMirror.commits_per_day(repo_full_name, DAYS_AGO)
+
     print(f"Fetching commits for {repo_full_name}")
     commits_per_day = defaultdict(int)
     page = 1
 
     while True:
         url = f"{GITHUB_API_URL}/repos/{repo_full_name}/commits?per_page=100&page={page}&since={DAYS_AGO}"
-        response = requests.get(url, headers=HEADERS)
+        response = RequestTelemetry.traced_get(url, "github", headers=HEADERS)
 
         if response.status_code == 403:  # Rate limit
-            print("Rate limit reached. Sleeping for 60 seconds...")
-            time.sleep(60)
+            print(f"Rate limit reached. Sleeping for {RATE_LIMIT_DELAY:g} seconds...")
+            RequestTelemetry.traced_sleep(RATE_LIMIT_DELAY, "rate_limit", "github", repo_full_name)
             continue
         elif response.status_code == 409:  # Empty repository
             return {}
@@ -163,7 +187,7 @@ def get_recent_commits(repo_full_name):
             commits_per_day[commit_date] += 1
 
         page += 1
-        time.sleep(1)
+        RequestTelemetry.traced_sleep(PAGE_DELAY, "page_delay", "github", repo_full_name)
 
     return dict(commits_per_day)
 
@@ -175,7 +199,7 @@ def get_all_security_advisories(repo_full_name):
 
     while page <= 43:
         url = f"{GITHUB_API_URL}/repos/{repo_full_name}/security-advisories?per_page=100&sort=updated&page={page}"
-        response = requests.get(url, headers=HEADERS)
+        response = RequestTelemetry.traced_get(url, "github", headers=HEADERS)
 
         if response.status_code == 403:
             print(f"Access denied for security advisories in {repo_full_name}. Requires admin access.")
@@ -201,7 +225,7 @@ def get_all_security_advisories(repo_full_name):
                 "severity": advisory.get("severity"),
                 "vulnerabilities": [
                     {
-                        "package": vuln.get("package", {}).get("ecosystem"),
+                        "package": {"ecosystem": (vuln.get("package") or {}).get("ecosystem"), "name": (vuln.get("package") or {}).get("name")},
                         "vulnerable_version_range": vuln.get("vulnerable_version_range"),
                         "vulnerable_functions": vuln.get("vulnerable_functions", [])
                     }
@@ -220,14 +244,14 @@ def get_all_security_advisories(repo_full_name):
             })
 
         page += 1  # Go to the next page
-        time.sleep(1)  # Avoid hitting API rate limits
+        RequestTelemetry.traced_sleep(PAGE_DELAY, "page_delay", "github", repo_full_name)  # Avoid hitting API rate limits
 
     return advisories
 
 def get_recent_security_advisories(repo_full_name):
     print(f"Fetching Security Advisories of: {repo_full_name}")
     url = f"{GITHUB_API_URL}/repos/{repo_full_name}/security-advisories?per_page=100&sort=published"
-    response = requests.get(url, headers=HEADERS)
+    response = RequestTelemetry.traced_get(url, "github", headers=HEADERS)
 
     if response.status_code == 403:
         print(f"Access denied for security advisories in {repo_full_name}. Requires admin access.")
@@ -252,7 +276,7 @@ def get_recent_security_advisories(repo_full_name):
                 "severity": advisory.get("severity"),
                 "vulnerabilities": [
                     {
-                        "package": vuln.get("package", {}).get("ecosystem"),
+                        "package": {"ecosystem": (vuln.get("package") or {}).get("ecosystem"), "name": (vuln.get("package") or {}).get("name")},
                         "vulnerable_version_range": vuln.get("vulnerable_version_range"),
                         "vulnerable_functions": vuln.get("vulnerable_functions", [])
                     }
@@ -276,7 +300,7 @@ def get_recent_security_advisories(repo_full_name):
 def get_most_forked_repos():
     print("Fetching most forked repositories on GitHub...")
     url = f"{GITHUB_API_URL}/search/repositories?q=stars:>0&sort=forks&order=desc&per_page=100"
-    response = requests.get(url, headers=HEADERS)
+    response = RequestTelemetry.traced_get(url, "github", headers=HEADERS)
     
     if response.status_code != 200:
         print(f"Error fetching most forked repositories: {response.status_code}, {response.text}")
@@ -343,10 +367,11 @@ def main():
                 "merges": merges_per_day
             }
         """
-        time.sleep(2)
+        RequestTelemetry.traced_sleep(REPO_DELAY, "repo_delay", "github", repo["name"])
 
     #save_to_json(repo_data, "repo_commits_merges_data.json")
     #save_to_json(repo_advisory_data, "security_advisories.json")
+    RequestTelemetry.save()
 
 if __name__ == "__main__":
     if not GITHUB_TOKEN:
@@ -0,0 +1,355 @@
+import copy
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+# Local replacement for api.github.com: replays the recorded fixtures and synthetic commit and advisory
+# pages with GitHub's pagination, rate-limit headers and error codes. Point GITHUB_API_URL at it.
+HOST = "127.0.0.1"
+PORT = 8765
+RATE_LIMIT = 5000
+RATE_WINDOW = 3600
+MAX_PER_PAGE = 100
+DEFAULT_PER_PAGE = 30
+TARBALL_SIZE = 1 << 20
+RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+def load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def iso(moment):
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def synthetic_commits(count, days=10, merge_share=0.1, seed=0, now=None):
+    """Commits of the last `days` days, newest first, shaped like GET /repos/{repo}/commits."""
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    moments = sorted((now - timedelta(seconds=rng.uniform(0, days * 86400)) for _ in range(count)), reverse=True)
+    commits = []
+    for i, moment in enumerate(moments):
+        sha = f"{rng.getrandbits(160):040x}"
+        parents = [{"sha": f"{rng.getrandbits(160):040x}"} for _ in range(2 if rng.random() < merge_share else 1)]
+        commits.append({
+            "sha": sha,
+            "commit": {
+                "message": f"Synthetic commit {i}",
+                "author": {"name": "octocat", "date": iso(moment)},
+                "committer": {"name": "octocat", "date": iso(moment)},
+            },
+            "parents": parents,
+        })
+    return commits
+
+def synthetic_advisories(templates, count, repo_full_name, seed=0):
+    # Copies of the recorded advisories (prueba.json) with their own GHSA and CVE ids
+    rng = random.Random(seed)
+    advisories = []
+    for i in range(count):
+        advisory = copy.deepcopy(templates[i % len(templates)])
+        ghsa = "-".join(f"{rng.getrandbits(16):04x}" for _ in range(3))
+        advisory["ghsa_id"] = f"GHSA-{ghsa}"
+        advisory["cve_id"] = f"CVE-{2015 + i % 10}-{10000 + i}"
+        advisory["html_url"] = f"https://github.com/{repo_full_name}/security/advisories/GHSA-{ghsa}"
+        advisories.append(advisory)
+    return advisories
+
+def releases_for(templates, repo_full_name):
+    # Recorded releases re-pointed at another repo
+    releases = copy.deepcopy(templates)
+    for release in releases:
+        release["tarball_url"] = f"https://api.github.com/repos/{repo_full_name}/tarball/{release['tag_name']}"
+    return releases
+
+def load_fixtures(repos_path="top_repos.json", releases_path="repo_releases.json", advisories_path="prueba.json",
+                  commits_per_repo=300, advisories_per_repo=20, merge_share=0.1, days=10, seed=0):
+    """Repos of top_repos.json plus tensorflow/tensorflow, each with releases, commits and advisories."""
+    top_repos = load_json(repos_path)
+    releases = load_json(releases_path)
+    advisories = load_json(advisories_path)
+
+    search = [dict(repo, stargazers_count=repo.get("stargazers_count", 0)) for repo in top_repos]
+    names = [repo["full_name"] for repo in top_repos]
+    if "tensorflow/tensorflow" not in names:
+        names.append("tensorflow/tensorflow")
+
+    repos = {}
+    for i, name in enumerate(names):
+        repos[name] = {
+            "default_branch": "master",
+            "releases": releases_for(releases, name),
+            "commits": synthetic_commits(commits_per_repo, days, merge_share, seed + i),
+            "advisories": synthetic_advisories(advisories, advisories_per_repo, name, seed + i),
+        }
+    return {"search": search, "repos": repos}
+
+def tarball_bytes(repo_full_name, ref, size):
+    # Deterministic pseudo-random content, so a resumed or segmented download can be checked byte for byte
+    return random.Random(f"{repo_full_name}@{ref}").randbytes(size)
+
+def path_kind(path):
+    # /repos/owner/name/commits -> repos/*/*/commits, to count requests per endpoint
+    segments = path.strip("/").split("/")
+    if segments[0] == "repos" and len(segments) >= 3:
+        segments[1:3] = ["*", "*"]
+    return "/".join(segments)
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        if server.latency or server.jitter:
+            time.sleep(server.latency + random.uniform(0, server.jitter))
+
+        parts = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        path = parts.path.rstrip("/")
+
+        if path == "/rate_limit":
+            # Does not count against the budget, like on GitHub
+            self.send_json(200, {"resources": {"core": server.rate_status(self.token())}})
+            return
+
+        allowed, status = server.consume(self.token(), path)
+        if not allowed:
+            self.send_json(403, {"message": "API rate limit exceeded",
+                                 "documentation_url": "https://docs.github.com/rest/overview/resources-in-the-rest-api#rate-limiting"},
+                           status)
+            return
+
+        segments = path.strip("/").split("/")
+        if len(segments) == 5 and segments[0] == "repos" and segments[3] == "tarball":
+            self.send_tarball(f"{segments[1]}/{segments[2]}", segments[4], status)
+            return
+
+        status_code, body, total = self.route(path, query)
+        headers = dict(status)
+        if total is not None:
+            headers.update(self.link_header(parts.path, query, total))
+        self.send_json(status_code, body, headers)
+
+    def token(self):
+        return self.headers.get("Authorization", "").removeprefix("Bearer ").strip() or None
+
+    def route(self, path, query):
+        # (status, body, total items when the body is one page of a list)
+        server = self.server
+        segments = path.strip("/").split("/")
+
+        if segments == ["search", "repositories"]:
+            key = "forks_count" if query.get("sort") == "forks" else "stargazers_count"
+            items = sorted(server.fixtures["search"], key=lambda repo: repo[key], reverse=True)
+            page = self.page(items, query)
+            return 200, {"total_count": len(items), "incomplete_results": False, "items": page}, len(items)
+
+        if len(segments) < 3 or segments[0] != "repos":
+            return 404, {"message": "Not Found"}, None
+        name = f"{segments[1]}/{segments[2]}"
+        repo = server.fixtures["repos"].get(name)
+        if repo is None:
+            return 404, {"message": "Not Found"}, None
+
+        resource = segments[3:]
+        if not resource:
+            return 200, {"full_name": name, "default_branch": repo["default_branch"]}, None
+        if resource == ["commits"]:
+            if name in server.empty_repos:
+                return 409, {"message": "Git Repository is empty."}, None
+            commits = repo["commits"]
+            if "since" in query:
+                since = query["since"][:19]
+                commits = [commit for commit in commits if commit["commit"]["committer"]["date"][:19] >= since]
+            return 200, self.page(commits, query), len(commits)
+        if resource == ["security-advisories"]:
+            if name in server.restricted_advisories:
+                return 403, {"message": "Must have admin rights to Repository."}, None
+            return 200, self.page(repo["advisories"], query), len(repo["advisories"])
+        if resource == ["releases"]:
+            # The fixtures keep GitHub's URLs; served releases point their tarballs back at this server
+            page = [dict(release, tarball_url=f"{server.url}/repos/{name}/tarball/{release['tag_name']}")
+                    for release in self.page(repo["releases"], query)]
+            return 200, page, len(repo["releases"])
+        return 404, {"message": "Not Found"}, None
+
+    @staticmethod
+    def per_page(query):
+        return max(1, min(int(query.get("per_page", DEFAULT_PER_PAGE)), MAX_PER_PAGE))
+
+    def page(self, items, query):
+        size = self.per_page(query)
+        page = max(1, int(query.get("page", 1)))
+        return items[(page - 1) * size:page * size]
+
+    def link_header(self, path, query, total):
+        size = self.per_page(query)
+        page = max(1, int(query.get("page", 1)))
+        last = max(1, -(-total // size))
+
+        def url(number):
+            return f"{self.server.url}{path}?{urlencode(dict(query, page=number))}"
+
+        links = []
+        if page < last:
+            links += [f'<{url(page + 1)}>; rel="next"', f'<{url(last)}>; rel="last"']
+        if page > 1:
+            links += [f'<{url(1)}>; rel="first"', f'<{url(min(page - 1, last))}>; rel="prev"']
+        return {"Link": ", ".join(links)} if links else {}
+
+    def send_json(self, status_code, body, headers=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def send_tarball(self, repo_full_name, ref, headers):
+        # Honours single Range requests like codeload; with drop_after the connection is cut after that many body bytes
+        if repo_full_name not in self.server.fixtures["repos"]:
+            self.send_json(404, {"message": "Not Found"}, headers)
+            return
+        content = self.server.tarball(repo_full_name, ref)
+        size = len(content)
+        start, end = 0, size - 1
+        status_code = 200
+        match = RANGE.match(self.headers.get("Range", ""))
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(0, size - int(match.group(2)))
+            if start >= size or start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status_code = 206
+
+        body = content[start:end + 1]
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/x-gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", f'"{hashlib.sha1(content).hexdigest()}"')
+        if status_code == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+
+        if self.server.drop_after is not None and len(body) > self.server.drop_after:
+            self.wfile.write(body[:self.server.drop_after])
+            self.wfile.flush()
+            self.close_connection = True
+            with self.server.lock:
+                self.server.stats["dropped"] += 1
+            return
+        self.wfile.write(body)
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, fixtures, host=HOST, port=0, latency=0.0, jitter=0.0, rate_limit=RATE_LIMIT,
+                 rate_window=RATE_WINDOW, empty_repos=(), restricted_advisories=(), tarball_size=TARBALL_SIZE,
+                 drop_after=None):
+        super().__init__((host, port), StandInHandler)
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.empty_repos = set(empty_repos)
+        self.restricted_advisories = set(restricted_advisories)
+        self.tarball_size = tarball_size
+        self.drop_after = drop_after
+        self.tarballs = {}
+        self.lock = threading.Lock()
+        self.windows = {}
+        self.stats = {"requests": 0, "throttled": 0, "dropped": 0, "by_path": {}}
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def rate_status(self, token):
+        # Budget of one token (or of anonymous callers) in the current window
+        with self.lock:
+            reset, used = self.windows.get(token, (time.time() + self.rate_window, 0))
+        return {"limit": self.rate_limit, "used": used, "remaining": max(0, self.rate_limit - used), "reset": int(reset)}
+
+    def consume(self, token, path):
+        with self.lock:
+            now = time.time()
+            reset, used = self.windows.get(token, (now + self.rate_window, 0))
+            if now >= reset:
+                reset, used = now + self.rate_window, 0
+            allowed = used < self.rate_limit
+            if allowed:
+                used += 1
+            self.windows[token] = (reset, used)
+
+            self.stats["requests"] += 1
+            self.stats["throttled"] += not allowed
+            kind = path_kind(path)
+            self.stats["by_path"][kind] = self.stats["by_path"].get(kind, 0) + 1
+
+        headers = {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(max(0, self.rate_limit - used)),
+            "X-RateLimit-Used": str(used),
+            "X-RateLimit-Reset": str(int(reset)),
+            "X-RateLimit-Resource": "core",
+        }
+        return allowed, headers
+
+    def reset_stats(self):
+        with self.lock:
+            self.windows = {}
+            self.stats = {"requests": 0, "throttled": 0, "dropped": 0, "by_path": {}}
+
+    def tarball(self, repo_full_name, ref):
+        with self.lock:
+            key = (repo_full_name, ref)
+            if key not in self.tarballs:
+                self.tarballs[key] = tarball_bytes(repo_full_name, ref, self.tarball_size)
+            return self.tarballs[key]
+
+def start_server(fixtures=None, **kwargs):
+    """Serves on a background thread; server.url goes into GITHUB_API_URL."""
+    server = StandInServer(fixtures if fixtures is not None else load_fixtures(), **kwargs)
+    server.thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server.thread.start()
+    return server
+
+def stop_server(server):
+    server.shutdown()
+    server.server_close()
+
+def main(port=PORT, latency=0.0, rate_limit=RATE_LIMIT):
+    server = StandInServer(load_fixtures(), port=port, latency=latency, rate_limit=rate_limit)
+    print(f"GitHub stand-in listening on {server.url} (export GITHUB_API_URL={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import fnmatch
+import os
+import shutil
+import subprocess
+import tarfile
+from collections import defaultdict
+from datetime import datetime, timezone
+
+# Bare, blob-less mirrors (git clone --filter=blob:none) used to count commits and merges without the REST API.
+# Only commits and trees are downloaded, so a full history fetch is a fraction of a normal clone.
+MIRROR_ROOT = "mirrors"
+CLONE_BASE_URL = os.environ.get("GITHUB_CLONE_URL", "https://github.com")
+
+# Dependency manifests and lock files read by syft; with manifests_only a release tree holds just these
+MANIFEST_PATTERNS = [
+    "package.json", "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml",
+    "requirements*.txt", "setup.py", "setup.cfg", "pyproject.toml", "Pipfile", "Pipfile.lock", "poetry.lock",
+    "go.mod", "go.sum", "Cargo.toml", "Cargo.lock", "pom.xml", "*.gradle", "*.gradle.kts", "gradle.lockfile",
+    "Gemfile", "Gemfile.lock", "*.gemspec", "composer.json", "composer.lock", "*.csproj", "packages.config",
+    "packages.lock.json", "Package.swift", "Package.resolved", "Podfile.lock", "mix.lock", "pubspec.lock",
+    "conanfile.txt", "conanfile.py", "vcpkg.json", "WORKSPACE", "MODULE.bazel",
+]
+PREFETCH_BATCH = 5000
+
+def mirror_path(repo_full_name, root=MIRROR_ROOT):
+    owner, name = repo_full_name.split("/", 1)
+    return os.path.join(root, owner, f"{name}.git")
+
+def clone_url(repo_full_name, base_url=CLONE_BASE_URL):
+    return f"{base_url.rstrip('/')}/{repo_full_name}.git"
+
+def git(*args, cwd=None):
+    return subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=True).stdout
+
+def ensure_mirror(repo_full_name, root=MIRROR_ROOT, url=None, refresh=True):
+    """Clones the mirror the first time and fetches new commits afterwards; returns its path."""
+    path = mirror_path(repo_full_name, root)
+    if not os.path.isdir(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        git("clone", "--bare", "--filter=blob:none", "--quiet", url or clone_url(repo_full_name), path)
+        # A bare clone has no fetch refspec; keep the branches in sync with the remote
+        git("config", "remote.origin.fetch", "+refs/heads/*:refs/heads/*", cwd=path)
+    elif refresh:
+        git("fetch", "--prune", "--tags", "--quiet", "origin", cwd=path)
+    return path
+
+def default_branch(path):
+    return git("symbolic-ref", "--short", "HEAD", cwd=path).strip()
+
+def has_commits(path, branch):
+    return subprocess.run(["git", "rev-parse", "--verify", "--quiet", f"{branch}^{{commit}}"], cwd=path,
+                          capture_output=True).returncode == 0
+
+def parse_since(since):
+    # The crawlers pass ISO 8601 strings such as "2025-03-01T10:00:00.123456Z", meant as UTC
+    if since is None:
+        return None
+    moment = datetime.fromisoformat(since.rstrip("Z"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+def iter_log(path, branch, since=None):
+    """(committer timestamp, parent count) of every commit reachable from `branch`, streamed from git log."""
+    # Filtered here instead of with --since, which stops early when committer dates are out of order
+    since_ts = parse_since(since)
+    process = subprocess.Popen(["git", "log", "--format=%ct %P", branch, "--"], cwd=path,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        for line in process.stdout:
+            timestamp, _, parents = line.partition(" ")
+            timestamp = int(timestamp)
+            if since_ts is None or timestamp >= since_ts:
+                yield timestamp, len(parents.split())
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.stderr.close()
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, "git log", stderr=stderr)
+
+def activity_per_day(repo_full_name, since=None, root=MIRROR_ROOT, url=None, refresh=True, branch=None):
+    """(commits per day, merges per day) keyed by UTC date, same shape as the REST API crawlers.
+
+    An empty repository gives ({}, {}) like the API's 409; a failed clone or fetch gives (None, None).
+    """
+    try:
+        path = ensure_mirror(repo_full_name, root, url, refresh)
+        branch = branch or default_branch(path)
+        commits_per_day = defaultdict(int)
+        merges_per_day = defaultdict(int)
+        if not has_commits(path, branch):
+            return {}, {}
+        # Counted by UTC day number, formatted once per day at the end
+        for timestamp, parents in iter_log(path, branch, since):
+            day = timestamp // 86400
+            commits_per_day[day] += 1
+            # Merge commit: 2+ parents
+            if parents > 1:
+                merges_per_day[day] += 1
+    except subprocess.CalledProcessError as e:
+        print(f"Error reading the git history of {repo_full_name}: {e.stderr.strip() if e.stderr else e}")
+        return None, None
+    return day_keys(commits_per_day), day_keys(merges_per_day)
+
+def day_keys(counts):
+    return {datetime.fromtimestamp(day * 86400, timezone.utc).strftime("%Y-%m-%d"): count for day, count in counts.items()}
+
+def commits_per_day(repo_full_name, since=None, root=MIRROR_ROOT, url=None, refresh=True):
+    return activity_per_day(repo_full_name, since, root, url, refresh)[0]
+
+def merges_per_day(repo_full_name, since=None, root=MIRROR_ROOT, url=None, refresh=True):
+    return activity_per_day(repo_full_name, since, root, url, refresh)[1]
+
+def release_files(path, tag, patterns=None):
+    """(mode, blob id, path) of the files of `tag`, all of them or those whose name matches one of `patterns`.
+
+    Trees are in the mirror, so listing does not download anything.
+    """
+    listing = git("ls-tree", "-r", "-z", "--full-tree", tag, cwd=path)
+    files = []
+    for entry in filter(None, listing.split("\0")):
+        info, _, name = entry.partition("\t")
+        mode, kind, oid = info.split()
+        if kind != "blob":
+            continue
+        if patterns is None or any(fnmatch.fnmatchcase(os.path.basename(name), pattern) for pattern in patterns):
+            files.append((mode, oid, name))
+    return files
+
+def missing_objects(path, tag):
+    # --missing=print lists the blobs the partial clone has not downloaded yet, without fetching them
+    listing = git("rev-list", "--objects", "--no-walk", "--missing=print", tag, cwd=path)
+    return {line[1:] for line in listing.splitlines() if line.startswith("?")}
+
+def prefetch_blobs(path, tag, patterns=None):
+    """Downloads in a few batched fetches the blobs of `tag` that are still missing; returns how many.
+
+    Blobs already fetched for an earlier release are reused, so consecutive releases only transfer what changed.
+    """
+    missing = missing_objects(path, tag)
+    wanted = sorted({oid for _, oid, _ in release_files(path, tag, patterns) if oid in missing})
+    for start in range(0, len(wanted), PREFETCH_BATCH):
+        subprocess.run(["git", "-c", "fetch.negotiationAlgorithm=noop", "fetch", "origin", "--no-tags",
+                        "--no-write-fetch-head", "--recurse-submodules=no", "--filter=blob:none", "--stdin", "--quiet"],
+                       cwd=path, input="\n".join(wanted[start:start + PREFETCH_BATCH]) + "\n",
+                       capture_output=True, text=True, check=True)
+    return len(wanted)
+
+def export_files(path, files, dest):
+    # Writes the given blobs with git cat-file --batch, one request and one answer at a time
+    process = subprocess.Popen(["git", "cat-file", "--batch"], cwd=path, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    try:
+        for mode, oid, name in files:
+            process.stdin.write(f"{oid}\n".encode("ascii"))
+            process.stdin.flush()
+            size = int(process.stdout.readline().split()[2])
+            content = process.stdout.read(size)
+            process.stdout.read(1)
+
+            target = os.path.join(dest, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if mode == "120000":
+                os.symlink(content.decode("utf-8"), target)
+                continue
+            with open(target, "wb") as f:
+                f.write(content)
+            if mode == "100755":
+                os.chmod(target, 0o755)
+    finally:
+        process.stdin.close()
+        process.stdout.close()
+        process.wait()
+
+def archive_release(path, tag, dest, patterns=None):
+    """Plain files of the tag in dest: git archive for the whole tree, cat-file for the matching files.
+
+    git archive reads every blob of the tree before applying a pathspec, which in a blob-less mirror
+    would download the whole release just to keep a few manifests.
+    """
+    os.makedirs(dest, exist_ok=True)
+    if patterns:
+        export_files(path, release_files(path, tag, patterns), dest)
+        return
+
+    process = subprocess.Popen(["git", "archive", "--format=tar", tag], cwd=path, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    with tarfile.open(fileobj=process.stdout, mode="r|") as archive:
+        if hasattr(tarfile, "data_filter"):
+            archive.extractall(dest, filter="data")
+        else:
+            archive.extractall(dest)
+    process.stdout.close()
+    stderr = process.stderr.read().decode("utf-8", "replace")
+    process.stderr.close()
+    if process.wait() != 0:
+        raise subprocess.CalledProcessError(process.returncode, "git archive", stderr=stderr)
+
+def worktree_release(path, tag, dest, patterns=None):
+    # Detached worktree of the tag; with patterns a non-cone sparse checkout that only contains the matching files
+    dest = os.path.abspath(dest)
+    git("worktree", "add", "--detach", "--no-checkout", "--quiet", dest, tag, cwd=path)
+    if patterns:
+        git("sparse-checkout", "set", "--no-cone", *patterns, cwd=dest)
+    git("checkout", "--quiet", "--detach", tag, cwd=dest)
+
+def materialize_release(repo_full_name, tag, dest, method="archive", manifests_only=False, patterns=None,
+                        root=MIRROR_ROOT, url=None, refresh=True):
+    """Source tree of a release tag in dest, built from the shared mirror instead of downloading its tarball.
+
+    method is "archive" (plain files) or "worktree" (a git worktree, remove it with remove_release).
+    Returns the number of blobs that had to be downloaded for this release.
+    """
+    if manifests_only and patterns is None:
+        patterns = MANIFEST_PATTERNS
+    path = ensure_mirror(repo_full_name, root, url, refresh)
+    fetched = prefetch_blobs(path, tag, patterns)
+    if method == "worktree":
+        worktree_release(path, tag, dest, patterns)
+    elif method == "archive":
+        archive_release(path, tag, dest, patterns)
+    else:
+        raise ValueError(f"Unknown method {method}, expected archive or worktree")
+    print(f"Materialized {repo_full_name}@{tag} in {dest} ({method}, {fetched} blobs fetched)")
+    return fetched
+
+def remove_release(repo_full_name, dest, root=MIRROR_ROOT):
+    path = mirror_path(repo_full_name, root)
+    if os.path.isdir(path) and os.path.exists(os.path.join(dest, ".git")):
+        git("worktree", "remove", "--force", os.path.abspath(dest), cwd=path)
+    else:
+        shutil.rmtree(dest, ignore_errors=True)
+        if os.path.isdir(path):
+            # Forget worktrees whose directory was deleted by hand, or the same path cannot be added again
+            git("worktree", "prune", cwd=path)
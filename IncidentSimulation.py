@@ -0,0 +1,147 @@
+import numpy as np
+
+import SimulationRandom
+
+MODEL_KEY = "5.7"
+
+# Mismos cortes que pd.cut(bins=[0, 4, 7, 9, 10], include_lowest=True) del script 5.7
+SEVERITY_BINS = [0, 4, 7, 9, 10]
+SEVERITY_LABELS = ["Critical", "High", "Medium", "Low"]
+
+DEFAULT_PARAMS = {
+    # Probabilidades de incidentes
+    "prob_no_sbom": {"Critical": 0.95, "High": 0.80, "Medium": 0.40, "Low": 0.10},
+    "prob_with_sbom": {"Critical": 0.85, "High": 0.60, "Medium": 0.25, "Low": 0.05},
+    # Rangos [min, max) de los tiempos medios de reparación en días
+    "mean_time_no_sbom": {"Critical": (25, 76), "High": (40, 101), "Medium": (80, 161), "Low": (80, 161)},
+    "mean_time_with_sbom": {"Critical": (5, 21), "High": (15, 61), "Medium": (50, 151), "Low": (50, 151)},
+    # Variación de +-20% alrededor del tiempo medio
+    "jitter": 0.4,
+}
+
+# Cantidad máxima de valores aleatorios por bloque de réplicas
+BLOCK_ELEMENTS = 2_000_000
+
+# Métricas de simulate con un valor por réplica (las que SimulationRandom.run_replications concatena)
+PER_REPLICATION = ("incidents_no_sbom", "incidents_with_sbom", "mttr_no_sbom", "mttr_with_sbom",
+                   "incident_reduction", "mttr_improvement")
+
+# Valores por fila: incidente (mismo número para ambos escenarios, como el script original que reinicia
+# la semilla), variación del tiempo sin SBOM y con SBOM
+ROW_VARIABLES = 3
+# Los enteros de 53 bits se suman en dos mitades para que las sumas parciales en float64 sean exactas
+LOW_BITS = 26
+
+def severity_codes(base_score):
+    # 0..3 en el orden de SEVERITY_LABELS, -1 para puntuaciones nulas o fuera de rango
+    scores = np.asarray(base_score, dtype=float)
+    codes = np.searchsorted(np.asarray(SEVERITY_BINS[1:-1], dtype=float), scores, side="left")
+    valid = (scores >= SEVERITY_BINS[0]) & (scores <= SEVERITY_BINS[-1])
+    return np.where(valid, codes, -1).astype(np.int8)
+
+def _by_severity(mapping, default):
+    # El último elemento es el valor para severidad desconocida (código -1)
+    return np.array([mapping.get(label, default) for label in SEVERITY_LABELS] + [default], dtype=float)
+
+def _time_ranges(mapping):
+    low = np.array([mapping[label][0] for label in SEVERITY_LABELS])
+    high = np.array([mapping[label][1] for label in SEVERITY_LABELS])
+    return low, high
+
+def new_state(replications=1000, seed=42, params=None, repo="", first_replication=0):
+    """Acumuladores por réplica, escenario (sin / con SBOM) y severidad.
+
+    Los tiempos medios se sortean una vez por réplica; lo que depende de las filas se suma con accumulate.
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    low_no, high_no = _time_ranges(params["mean_time_no_sbom"])
+    low_with, high_with = _time_ranges(params["mean_time_with_sbom"])
+
+    streams = SimulationRandom.replication_streams(seed, MODEL_KEY, repo, replications, first_replication)
+    mean_times = np.empty((replications, 2, len(SEVERITY_LABELS)), dtype=np.int64)
+    for i, stream in enumerate(streams):
+        mean_times[i, 0] = stream.integers(low_no, high_no)
+        mean_times[i, 1] = stream.integers(low_with, high_with)
+
+    shape = (replications, 2, len(SEVERITY_LABELS))
+    return {
+        "params": params,
+        "seed": seed,
+        "repo": repo,
+        "first_replication": first_replication,
+        "replications": replications,
+        "mean_times": mean_times,
+        "rows": 0,
+        # Conteos enteros exactos: incidentes y suma de los enteros de 53 bits de la variación
+        "incidents": np.zeros(shape, dtype=np.int64),
+        "factor_high": np.zeros(shape, dtype=np.int64),
+        "factor_low": np.zeros(shape, dtype=np.int64),
+    }
+
+def accumulate(state, codes, offset=None):
+    """Suma un bloque de filas que empieza en la fila `offset` (por defecto, a continuación del anterior)."""
+    params = state["params"]
+    codes = np.asarray(codes, dtype=np.intp)
+    offset = state["rows"] if offset is None else offset
+    replications = state["replications"]
+    n = len(codes)
+
+    prob_no = _by_severity(params["prob_no_sbom"], 0)[codes]
+    prob_with = _by_severity(params["prob_with_sbom"], 0)[codes]
+
+    # Matriz indicadora fila x severidad: las sumas por severidad quedan como un producto de matrices
+    one_hot = np.zeros((n, len(SEVERITY_LABELS)))
+    known = codes >= 0
+    one_hot[np.flatnonzero(known), codes[known]] = 1
+
+    block = max(1, BLOCK_ELEMENTS // max(n * ROW_VARIABLES, 1))
+    low_mask = np.uint64((1 << LOW_BITS) - 1)
+    for start in range(0, replications, block):
+        b = min(block, replications - start)
+        rows = slice(start, start + b)
+        k = SimulationRandom.row_draws(state["seed"], MODEL_KEY, state["repo"], b, state["first_replication"] + start,
+                                       offset, n, ROW_VARIABLES)
+
+        u = SimulationRandom.to_uniform(k[:, :, 0])
+        for scenario, prob in enumerate((prob_no, prob_with)):
+            incident = u < prob
+            factor = k[:, :, 1 + scenario] * incident
+            # Sumas de enteros < 2^53 en float64: exactas en cualquier orden
+            state["incidents"][rows, scenario] += np.rint(incident @ one_hot).astype(np.int64)
+            state["factor_high"][rows, scenario] += np.rint((factor >> np.uint64(LOW_BITS)) @ one_hot).astype(np.int64)
+            state["factor_low"][rows, scenario] += np.rint((factor & low_mask) @ one_hot).astype(np.int64)
+
+    state["rows"] = max(state["rows"], offset + n)
+    return state
+
+def finalize(state):
+    """Métricas por réplica a partir de los acumuladores."""
+    jitter = state["params"]["jitter"]
+    incidents = state["incidents"].astype(float)
+    # Suma de u de las filas con incidente y de sus factores 1 + (u - 0.5) * jitter
+    sum_u = state["factor_high"] * 2.0 ** (LOW_BITS - 53) + state["factor_low"] * SimulationRandom.UNIFORM_SCALE
+    factor_sum = incidents + jitter * (sum_u - 0.5 * incidents)
+    times = (factor_sum * state["mean_times"]).sum(axis=2)
+    counts = incidents.sum(axis=2)
+
+    results = {"incidents_no_sbom": counts[:, 0], "incidents_with_sbom": counts[:, 1]}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        results["mttr_no_sbom"] = times[:, 0] / counts[:, 0]
+        results["mttr_with_sbom"] = times[:, 1] / counts[:, 1]
+        results["incident_reduction"] = (results["incidents_no_sbom"] - results["incidents_with_sbom"]) / results["incidents_no_sbom"] * 100
+        results["mttr_improvement"] = (results["mttr_no_sbom"] - results["mttr_with_sbom"]) / results["mttr_no_sbom"] * 100
+
+    return results
+
+def simulate(codes, replications=1000, seed=42, params=None, repo="", first_replication=0):
+    """Simula incidentes y tiempos de remediación para todas las filas y réplicas a la vez.
+
+    Devuelve un arreglo por métrica con un valor por réplica. Los valores aleatorios dependen solo de
+    (réplica, fila), así que SimulationChunked da exactamente lo mismo leyendo la tabla por bloques.
+    """
+    codes = np.asarray(codes)
+    state = new_state(replications, seed, params, repo, first_replication)
+    chunk = max(1, BLOCK_ELEMENTS // ROW_VARIABLES)
+    for start in range(0, len(codes), chunk):
+        accumulate(state, codes[start:start + chunk], offset=start)
+    return finalize(state)
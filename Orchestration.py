@@ -1,14 +1,20 @@
-import requests
 import os
 import subprocess
-import json
 import time
 
-github_api_url = "https://api.github.com"
+import requests
+
+import ArtifactStore
+import ComponentCatalog
+import GitMirror
+import RangedDownload
+import RequestTelemetry
+
+github_api_url = os.environ.get("GITHUB_API_URL", "https://api.github.com")
 nvd_api_url = "https://services.nvd.nist.gov/rest/json/cves/2.0"
 headers = {
     "Accept": "application/vnd.github+json",
-    "Authorization": "Bearer "
+    "Authorization": "Bearer " + os.environ.get("GITHUB_TOKEN", "")
 }
 
 nvd_headers = {
@@ -18,7 +24,7 @@ nvd_headers = {
 
 def get_recent_releases(repo_full_name, per_page=25):
     url = f"{github_api_url}/repos/{repo_full_name}/releases?per_page={per_page}"
-    response = requests.get(url, headers=headers)
+    response = RequestTelemetry.traced_get(url, "github", headers=headers)
     
     if response.status_code != 200:
         print(f"Error fetching releases: {response.status_code}, {response.text}")
@@ -34,22 +40,17 @@ def get_recent_releases(repo_full_name, per_page=25):
         for release in response.json()
     ]
     
-    with open("repo_releases.json", "w") as f:
-        json.dump(releases, f, indent=4)
-    
-    print("Release data saved to repo_releases.json")
+    entry = ArtifactStore.put(repo_full_name, None, "releases", releases)
+    print(f"Release data saved to {entry['path']}")
     return releases
 
 def download_tarball(tarball_url, save_path):
-    response = requests.get(tarball_url, headers=headers, stream=True)
-    if response.status_code == 200:
-        with open(save_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        print(f"Downloaded {save_path}")
+    # Ranged, resumable download: a failed attempt keeps save_path.part and the next call continues from it
+    try:
+        RangedDownload.download(tarball_url, save_path, headers=headers)
         return True
-    else:
-        print(f"Failed to download tarball: {response.status_code}, {response.text}")
+    except (requests.RequestException, OSError) as e:
+        print(f"Failed to download tarball: {e}")
         return False
 
 def extract_tarball(tar_path, extract_to):
@@ -72,7 +73,7 @@ def get_cve_details(cve_id, retries=3):
     for attempt in range(retries):
         # https://nvd.nist.gov/developers/vulnerabilities
         # https://nvd.nist.gov/vuln/detail/CVE-2020-7765
-        response = requests.get(f"{nvd_api_url}?cveId={cve_id}&resultsPerPage=1", headers=nvd_headers)
+        response = RequestTelemetry.traced_get(f"{nvd_api_url}?cveId={cve_id}&resultsPerPage=1", "nvd", headers=nvd_headers)
         
         if response.status_code == 200:
             try:
@@ -91,13 +92,12 @@ def get_cve_details(cve_id, retries=3):
         
         elif response.status_code == 403:
             print(f"403 Forbidden: {cve_id} Attempt {attempt+1}/{retries} - Retrying...")
-            time.sleep(20)
+            RequestTelemetry.traced_sleep(20, "rate_limit", "nvd")
 
     return {}
 
-def analyze_vulnerabilities(grype_output, tag):
-    with open(grype_output, "r", encoding='utf-8') as f:
-        data = json.load(f)
+def analyze_vulnerabilities(grype_output, tag, repo_full_name):
+    data = ArtifactStore.read_json(grype_output)
     
     cve_analysis = {}  # Dictionary to store CVE details with additional information
     
@@ -134,29 +134,61 @@ def analyze_vulnerabilities(grype_output, tag):
                     for cve_id, details in cve_analysis.items()]
     
     # Save the CVE analysis with the added details
-    with open(f"{tag}.cve_analysis.json", "w", encoding='utf-8') as f:
-        json.dump(cve_ids_list, f, indent=4)
+    entry = ArtifactStore.put(repo_full_name, tag, "cve_analysis", cve_ids_list)
     
-    print(f"CVE analysis saved to {tag}.cve_analysis.json")
+    print(f"CVE analysis saved to {entry['path']}")
     return cve_ids_list
 
-def main():
-    repo_full_name = "tensorflow/tensorflow" # vercel/next.js - tensorflow/tensorflow
-    releases = get_recent_releases(repo_full_name)
+def materialize_release(repo_full_name, tag, extract_to, source, manifests_only):
+    # Release tree from the shared blob-less mirror: blobs already fetched for another release are reused
+    try:
+        GitMirror.materialize_release(repo_full_name, tag, extract_to, method=source, manifests_only=manifests_only, refresh=False)
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"Failed to materialize {tag} from the mirror: {e.stderr.strip() if e.stderr else e}")
+        return False
+
+def main(repo_full_name="tensorflow/tensorflow", per_page=25, source="tarball", manifests_only=False): # vercel/next.js - tensorflow/tensorflow
+    # source: "tarball" downloads each release archive; "archive" or "worktree" build it from one local mirror
+    releases = get_recent_releases(repo_full_name, per_page)
+    if source != "tarball":
+        GitMirror.ensure_mirror(repo_full_name)
     
     for release in releases:
         tag = release["tag_name"]
         tarball_url = release["tarball_url"]
         tar_path = f"{tag}.tar.gz"
         extract_to = f"{tag}"
-        sbom_file = f"{tag}.sbom.json"
-        grype_output = f"{tag}.grype.json"
+        # syft and grype write into a scratch directory; the outputs are compressed into the artifact store
+        workdir = ArtifactStore.release_workdir(repo_full_name, tag)
+        sbom_file = os.path.join(workdir, "sbom.json")
+        grype_output = os.path.join(workdir, "grype.json")
         
-        if download_tarball(tarball_url, tar_path):
-            extract_tarball(tar_path, extract_to)
-            generate_sbom(extract_to, sbom_file)
-            scan_vulnerabilities(sbom_file, grype_output)
-            analyze_vulnerabilities(grype_output, tag)
+        if source == "tarball":
+            ready = download_tarball(tarball_url, tar_path)
+            if ready:
+                extract_tarball(tar_path, extract_to)
+        else:
+            # A tree left behind by an interrupted run would make git worktree add fail
+            GitMirror.remove_release(repo_full_name, extract_to)
+            ready = materialize_release(repo_full_name, tag, extract_to, source, manifests_only)
+
+        try:
+            if ready:
+                generate_sbom(extract_to, sbom_file)
+                scan_vulnerabilities(sbom_file, grype_output)
+                analyze_vulnerabilities(grype_output, tag, repo_full_name)
+                ArtifactStore.put_file(repo_full_name, tag, "sbom", sbom_file)
+                ArtifactStore.put_file(repo_full_name, tag, "grype", grype_output)
+        finally:
+            # Trees built from the mirror are only needed for the scan; worktrees also have to be unregistered
+            if source != "tarball":
+                GitMirror.remove_release(repo_full_name, extract_to)
+            ArtifactStore.remove_workdir(repo_full_name, tag)
+
+    # Intern the new SBOMs' components and store each release as a delta of component ids
+    ComponentCatalog.build(repo_full_name)
+    RequestTelemetry.save()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,230 @@
+import functools
+import glob
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pyodbc
+
+import ArtifactStore
+from DatabaseCVEHistory import CVE_HISTORY_COLUMNS, feed_order, find_nvdcve_files, is_delta_feed, iter_cve_row_batches
+from DatabaseUpsert import NATURAL_KEYS, ensure_row_hash_column, fetch_row_hashes, upsert_rows
+
+TABLE_COLUMNS = {
+    "CVE_Mapping": ("repo_id", "tag_name", "cve_id", "artifact_name", "artifact_version"),
+    "CVE_History": CVE_HISTORY_COLUMNS,
+}
+
+BATCH_SIZE = 5000
+
+# Parsing runs in the worker processes, these must stay module level so they can be pickled
+def parse_cve_analysis_file(file_path, repo_id=1, tag_name=None):
+    # Loose files carry the tag in their name, store artifacts get it from the index
+    tag_name = tag_name or os.path.basename(file_path).replace(".cve_analysis.json", "")
+    data = ArtifactStore.read_json(file_path)
+
+    rows = [
+        (repo_id, tag_name, item.get('cve_id'), item.get('artifact_name'), item.get('artifact_version'))
+        for item in data
+    ]
+    return "CVE_Mapping", rows
+
+def parse_nvdcve_file(file_path):
+    # The worker reads the feed in batches but returns all of its rows at once: a process pool result
+    # cannot be streamed, so each feed in flight is held in full (tens of thousands of rows per yearly feed)
+    rows = []
+    for batch in iter_cve_row_batches(file_path):
+        rows.extend(batch)
+    return "CVE_History", rows
+
+def find_ingest_files(directory, root=ArtifactStore.ARTIFACT_ROOT, repo_full_name=None, repo_id=1):
+    # CVE analyses are written under repo_id, so the store must hold only that repo or repo_full_name must select it
+    jobs = []
+    for _, tag_name, file_path in ArtifactStore.find_one_repo("cve_analysis", repo_full_name, root):
+        jobs.append((functools.partial(parse_cve_analysis_file, repo_id=repo_id, tag_name=tag_name), file_path))
+    for file_path in sorted(glob.glob(os.path.join(directory, "*cve_analysis.json"))):
+        jobs.append((functools.partial(parse_cve_analysis_file, repo_id=repo_id), file_path))
+    # Same order as sync_nvdcve_feeds: yearly feeds first, then "recent", then "modified"
+    for file_path in sorted(find_nvdcve_files(directory), key=feed_order):
+        jobs.append((parse_nvdcve_file, file_path))
+    return jobs
+
+def _run_parse(parser, file_path):
+    return parser(file_path)
+
+def _new_file_counts():
+    return {"rows": 0, "inserted": 0, "updated": 0, "unchanged": 0}
+
+def _writer(conn, batches, stats, upsert, repo_id):
+    # Each file is one transaction: its batches are written uncommitted and the last one commits,
+    # so a failure rolls back the whole file instead of leaving it half ingested
+    cursor = conn.cursor()
+    cursor.fast_executemany = True
+    existing = {}
+    failed_files = set()
+    pending = {}
+    counts = _new_file_counts()
+
+    while True:
+        item = batches.get()
+        if item is None:
+            break
+
+        file_path, table_name, rows, last = item
+        if file_path in failed_files:
+            continue
+
+        try:
+            if upsert:
+                if table_name not in existing:
+                    ensure_row_hash_column(conn, cursor, table_name)
+                    if table_name == "CVE_Mapping":
+                        existing[table_name] = fetch_row_hashes(cursor, table_name, NATURAL_KEYS[table_name], "repo_id = ?", (repo_id,))
+                    else:
+                        existing[table_name] = fetch_row_hashes(cursor, table_name, NATURAL_KEYS[table_name])
+                keys = NATURAL_KEYS[table_name]
+                result = upsert_rows(conn, cursor, table_name, keys, TABLE_COLUMNS[table_name][len(keys):], rows, existing[table_name],
+                                     commit=False, pending=pending)
+                for name, count in result.items():
+                    counts[name] += count
+            else:
+                columns = TABLE_COLUMNS[table_name]
+                placeholders = ", ".join("?" for _ in columns)
+                cursor.executemany(f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+                counts["inserted"] += len(rows)
+            counts["rows"] += len(rows)
+
+            if last:
+                conn.commit()
+                # Only committed hashes reach the cache shared by the next files
+                if upsert:
+                    existing[table_name].update(pending)
+                for name, count in counts.items():
+                    stats[name] += count
+        except Exception as e:
+            # A failed batch drops its whole file, the other files keep going
+            failed_files.add(file_path)
+            stats["errors"].append((file_path, f"write: {e}"))
+            try:
+                conn.rollback()
+            except Exception as rollback_error:
+                stats["errors"].append((file_path, f"rollback: {rollback_error}"))
+            last = True
+
+        if last:
+            pending = {}
+            counts = _new_file_counts()
+
+    cursor.close()
+
+def _hand_off(batches, writer, item):
+    # The queue is bounded: if the writer thread died, a plain put would block forever
+    while writer.is_alive():
+        try:
+            batches.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def parallel_ingest(conn, directory, workers=None, queue_size=8, batch_size=BATCH_SIZE, upsert=False, repo_id=1,
+                    root=ArtifactStore.ARTIFACT_ROOT, repo_full_name=None):
+    """Parse cve_analysis / nvdcve files and stored CVE analyses in a process pool and write them through one connection.
+
+    Parsed files are split into batches and handed to a single writer thread over a
+    bounded queue, so parsing of the next files overlaps with the inserts. Each file is
+    parsed whole, so memory grows with the files in flight (two per worker) rather than
+    with the queue; use DatabaseCVEHistory.process_all_nvdcve_files to stream large feeds.
+    The "recent"/"modified" delta feeds are written after every yearly feed, as in sync_nvdcve_feeds.
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = find_ingest_files(directory, root, repo_full_name, repo_id)
+    stats = {"files": len(jobs), "rows": 0, "inserted": 0, "updated": 0, "unchanged": 0, "errors": []}
+
+    batches = queue.Queue(maxsize=queue_size)
+    writer = threading.Thread(target=_writer, args=(conn, batches, stats, upsert, repo_id))
+    writer.start()
+
+    start = time.perf_counter()
+    # A yearly feed that finishes parsing after a delta feed would overwrite the delta's newer CVE_History rows,
+    # so the deltas are held back until every yearly feed has reached the writer, then handed over in job order
+    deltas = [file_path for parser, file_path in jobs if parser is parse_nvdcve_file and is_delta_feed(file_path)]
+    yearly_left = sum(1 for parser, file_path in jobs if parser is parse_nvdcve_file and not is_delta_feed(file_path))
+    held = {}
+    writer_alive = True
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        job_iter = iter(jobs)
+
+        def submit_next():
+            job = next(job_iter, None)
+            if job is not None:
+                parser, file_path = job
+                pending[executor.submit(_run_parse, parser, file_path)] = (parser, file_path)
+
+        def write_file(file_path, table_name, rows):
+            print(f"Parsed {file_path}: {len(rows)} rows")
+            # The writer commits when it gets the file's last batch
+            for i in range(0, len(rows), batch_size):
+                if not _hand_off(batches, writer, (file_path, table_name, rows[i:i + batch_size], i + batch_size >= len(rows))):
+                    return False
+            return True
+
+        # Keep only a couple of parsed files in flight per worker
+        for _ in range(workers * 2):
+            submit_next()
+
+        while pending and writer_alive:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                parser, file_path = pending.pop(future)
+                submit_next()
+                try:
+                    result = future.result()
+                except Exception as e:
+                    stats["errors"].append((file_path, f"parse: {e}"))
+                    result = None
+
+                if file_path in deltas:
+                    held[file_path] = result
+                    continue
+                if parser is parse_nvdcve_file:
+                    yearly_left -= 1
+                if result is not None and writer_alive:
+                    writer_alive = write_file(file_path, *result)
+
+            while writer_alive and yearly_left == 0 and deltas and deltas[0] in held:
+                file_path = deltas.pop(0)
+                result = held.pop(file_path)
+                if result is not None:
+                    writer_alive = write_file(file_path, *result)
+
+        if not writer_alive:
+            # The writer thread died: stop parsing instead of blocking on the full queue
+            for future in pending:
+                future.cancel()
+            stats["errors"].append((directory, "write: writer thread stopped, remaining files skipped"))
+
+    _hand_off(batches, writer, None)
+    writer.join()
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = elapsed
+    stats["rows_per_second"] = stats["rows"] / elapsed if elapsed else 0.0
+
+    print(f"Ingested {stats['rows']} rows from {stats['files']} files in {elapsed:.1f}s "
+          f"({stats['rows_per_second']:.0f} rows/s)")
+    for file_path, error in stats["errors"]:
+        print(f"Error processing file {file_path}: {error}")
+
+    return stats
+
+if __name__ == "__main__":
+    server = 'DESKTOP-3FC1SUJ'
+    database = 'SBOM'
+
+    conn = pyodbc.connect(f'DRIVER={{SQL Server}};SERVER={server};DATABASE={database};Trusted_Connection=yes;')
+    parallel_ingest(conn, ".", upsert=True)
+    conn.close()
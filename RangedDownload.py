@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import RequestTelemetry
+
+# Downloads with HTTP Range requests: large files are split into parallel segments and an interrupted
+# download continues from the bytes already on disk (<dest>.part plus the <dest>.part.json sidecar).
+CHUNK_SIZE = 1 << 20
+WRITE_BUFFER = 4 << 20
+SEGMENT_MIN = 8 << 20
+WORKERS = 4
+RETRIES = 5
+RETRY_DELAY = 2.0
+# The sidecar is rewritten at most this often while segments are in flight
+STATE_INTERVAL = 1.0
+
+CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+def part_path(dest):
+    return f"{dest}.part"
+
+def state_path(dest):
+    return f"{dest}.part.json"
+
+def probe(url, headers=None, source="github"):
+    """Size, validator and Range support of `url`, from a one-byte ranged GET (works where HEAD is not allowed)."""
+    response = RequestTelemetry.traced_get(url, source, headers={**(headers or {}), "Range": "bytes=0-0"}, stream=True)
+    try:
+        response.raise_for_status()
+        match = CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+        if response.status_code == 206 and match and match.group(3) != "*":
+            size, ranges = int(match.group(3)), True
+        else:
+            length = response.headers.get("Content-Length")
+            size, ranges = (int(length) if length and not response.headers.get("Content-Encoding") else None), False
+        return {
+            # Final URL after redirects (tarball_url redirects to codeload)
+            "url": response.url,
+            "size": size,
+            "ranges": ranges,
+            "validator": response.headers.get("ETag") or response.headers.get("Last-Modified"),
+        }
+    finally:
+        response.close()
+
+def split_segments(size, workers=WORKERS, segment_min=SEGMENT_MIN):
+    # [start, end] inclusive, like the Range header
+    count = max(1, min(workers, size // segment_min))
+    bounds = [size * i // count for i in range(count + 1)]
+    return [[bounds[i], bounds[i + 1] - 1, 0] for i in range(count) if bounds[i + 1] > bounds[i]]
+
+def load_state(dest, info):
+    # Resume only if the sidecar describes the same file (size and ETag / Last-Modified)
+    path = state_path(dest)
+    if not (os.path.exists(path) and os.path.exists(part_path(dest))):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("size") != info["size"] or state.get("validator") != info["validator"]:
+        return None
+    return state
+
+def save_state(dest, state):
+    temporary = f"{state_path(dest)}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(temporary, state_path(dest))
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(WRITE_BUFFER), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class Progress:
+    # Shared by the segment threads: bytes written per segment and periodic sidecar saves
+    def __init__(self, dest, state):
+        self.dest = dest
+        self.state = state
+        self.lock = threading.Lock()
+        self.saved = time.monotonic()
+
+    def advance(self, index, count):
+        with self.lock:
+            self.state["segments"][index][2] += count
+            if time.monotonic() - self.saved >= STATE_INTERVAL:
+                save_state(self.dest, self.state)
+                self.saved = time.monotonic()
+
+    def save(self):
+        with self.lock:
+            save_state(self.dest, self.state)
+
+def flush(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+def fetch_segment(url, headers, dest, progress, index, source):
+    """Downloads what is left of one segment, retrying from the last byte written."""
+    for attempt in range(RETRIES + 1):
+        start, end, done = progress.state["segments"][index]
+        if start + done > end:
+            return
+        try:
+            response = RequestTelemetry.traced_get(url, source, headers={**headers, "Range": f"bytes={start + done}-{end}"},
+                                                   stream=True, timeout=60)
+            try:
+                if response.status_code != 206:
+                    raise requests.HTTPError(f"Expected 206 for a ranged request, got {response.status_code}", response=response)
+                with open(part_path(dest), "r+b", buffering=WRITE_BUFFER) as f:
+                    f.seek(start + done)
+                    # Only bytes flushed to disk are counted, so the sidecar never claims data still in the
+                    # write buffer; a broken stream keeps what was written, a killed process fetches it again
+                    buffered = 0
+                    try:
+                        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                            f.write(chunk)
+                            buffered += len(chunk)
+                            if buffered >= WRITE_BUFFER:
+                                flush(f)
+                                progress.advance(index, buffered)
+                                buffered = 0
+                    finally:
+                        flush(f)
+                        progress.advance(index, buffered)
+            finally:
+                response.close()
+            if start + progress.state["segments"][index][2] > end:
+                return
+        except (requests.RequestException, OSError) as e:
+            if attempt == RETRIES:
+                raise
+            print(f"Segment {index} of {os.path.basename(dest)} interrupted ({e}), retrying...")
+            progress.save()
+            RequestTelemetry.traced_sleep(RETRY_DELAY * (attempt + 1), "retry", source)
+    raise IOError(f"Segment {index} of {dest} is still incomplete after {RETRIES} retries")
+
+def fetch_whole(url, headers, dest, source):
+    # No Range support: a plain stream, restarted from zero on failure
+    for attempt in range(RETRIES + 1):
+        try:
+            response = RequestTelemetry.traced_get(url, source, headers=headers, stream=True, timeout=60)
+            try:
+                response.raise_for_status()
+                with open(part_path(dest), "wb", buffering=WRITE_BUFFER) as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+            finally:
+                response.close()
+            return
+        except (requests.RequestException, OSError) as e:
+            if attempt == RETRIES or (isinstance(e, requests.HTTPError) and e.response is not None and e.response.status_code < 500):
+                raise
+            print(f"Download of {os.path.basename(dest)} interrupted ({e}), restarting...")
+            RequestTelemetry.traced_sleep(RETRY_DELAY * (attempt + 1), "retry", source)
+
+def download(url, dest, headers=None, sha256=None, workers=WORKERS, source="github"):
+    """Downloads `url` to `dest`, resuming a previous attempt if possible; returns size, time and throughput.
+
+    Raises IOError when a segment is incomplete, or the size or the SHA-256 do not match.
+    """
+    headers = dict(headers or {})
+    start = time.perf_counter()
+    info = probe(url, headers, source)
+    # The redirect target (codeload) is accounted apart from the API
+    fetch_source = RequestTelemetry.host_source(info["url"], source)
+    resumed = 0
+
+    if info["ranges"] and info["size"]:
+        state = load_state(dest, info)
+        if state is None:
+            state = {"url": info["url"], "size": info["size"], "validator": info["validator"],
+                     "segments": split_segments(info["size"], workers)}
+            with open(part_path(dest), "wb") as f:
+                f.truncate(info["size"])
+            save_state(dest, state)
+        else:
+            resumed = sum(done for _, _, done in state["segments"])
+            print(f"Resuming {os.path.basename(dest)} from {resumed} of {info['size']} bytes")
+
+        progress = Progress(dest, state)
+        try:
+            with ThreadPoolExecutor(max_workers=len(state["segments"])) as executor:
+                futures = [executor.submit(fetch_segment, info["url"], headers, dest, progress, index, fetch_source)
+                           for index in range(len(state["segments"]))]
+                for future in futures:
+                    future.result()
+        finally:
+            progress.save()
+        # .part was created at full size, so its length proves nothing: every segment must be complete
+        for first, last, done in state["segments"]:
+            if done != last - first + 1:
+                raise IOError(f"Segment {first}-{last} of {dest} has {done} bytes, expected {last - first + 1}")
+        segments = len(state["segments"])
+        size = info["size"]
+    else:
+        fetch_whole(info["url"], headers, dest, fetch_source)
+        segments = 1
+        size = os.path.getsize(part_path(dest))
+        if info["size"] is not None and size != info["size"]:
+            raise IOError(f"Downloaded {size} bytes of {dest}, expected {info['size']}")
+
+    digest = sha256_file(part_path(dest))
+    if sha256 and digest != sha256.lower():
+        os.remove(part_path(dest))
+        if os.path.exists(state_path(dest)):
+            os.remove(state_path(dest))
+        raise IOError(f"SHA-256 mismatch for {dest}: got {digest}, expected {sha256}")
+
+    os.replace(part_path(dest), dest)
+    if os.path.exists(state_path(dest)):
+        os.remove(state_path(dest))
+
+    seconds = time.perf_counter() - start
+    transferred = size - resumed
+    stats = {
+        "path": dest,
+        "bytes": size,
+        "resumed_bytes": resumed,
+        "segments": segments,
+        "seconds": seconds,
+        "mb_per_second": transferred / seconds / 1e6 if seconds else None,
+        "sha256": digest,
+    }
+    print(f"Downloaded {dest}: {size / 1e6:.1f} MB in {seconds:.1f} s ({stats['mb_per_second']:.1f} MB/s, "
+          f"{segments} segments, {resumed / 1e6:.1f} MB resumed)")
+    return stats
@@ -0,0 +1,250 @@
+import json
+import math
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+
+# Every outbound GitHub / NVD request goes through traced_get and every pause through traced_sleep.
+# The collector keeps running aggregates (safe to share between threads) and the most recent raw records.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, math.inf)
+MAX_RECORDS = 100_000
+METRIC_PREFIX = "sbom_http"
+
+# Path segments that identify an object rather than an endpoint, replaced by a placeholder
+REF_SEGMENTS = {"commits": "{sha}", "security-advisories": "{ghsa_id}", "releases": "{release_id}"}
+# Archive refs may contain "/" (refs/tags/v1.0), so everything after them is one placeholder
+ARCHIVE_SEGMENTS = {"tarball", "zipball", "legacy.tar.gz", "legacy.zip", "tar.gz", "zip"}
+# Named sub-paths of /releases: releases/tags/{tag}, releases/assets/{asset_id}, releases/latest
+RELEASE_SUBPATHS = {"tags": "{tag}", "assets": "{asset_id}", "latest": None}
+
+# tarball_url redirects to codeload, which serves the archive outside the REST API rate limit
+CODELOAD_HOST = "codeload.github.com"
+
+def host_source(url, source):
+    """Source a request is accounted under: codeload downloads get their own, whatever the caller passed."""
+    return "codeload" if urlsplit(url).hostname == CODELOAD_HOST else source
+
+def endpoint_template(url):
+    """(endpoint, repo) of a request: /repos/{owner}/{repo}/commits and the owner/name it targets."""
+    parts = urlsplit(url)
+    segments = [segment for segment in parts.path.split("/") if segment]
+    repo = None
+    first = 3
+    # codeload paths are /{owner}/{repo}/legacy.tar.gz/{ref}, without the /repos prefix
+    if parts.hostname == CODELOAD_HOST and len(segments) >= 2:
+        repo = f"{segments[0]}/{segments[1]}"
+        segments[0:2] = ["{owner}", "{repo}"]
+        first = 2
+    elif len(segments) >= 3 and segments[0] == "repos":
+        repo = f"{segments[1]}/{segments[2]}"
+        segments[1:3] = ["{owner}", "{repo}"]
+    else:
+        return "/" + "/".join(segments), repo
+
+    i = first
+    while i < len(segments) - 1:
+        segment, following = segments[i], segments[i + 1]
+        if segment in ARCHIVE_SEGMENTS:
+            segments[i + 1:] = ["{ref}"]
+            break
+        if segment == "releases" and following in RELEASE_SUBPATHS:
+            if RELEASE_SUBPATHS[following] and i + 2 < len(segments):
+                segments[i + 2] = RELEASE_SUBPATHS[following]
+            i += 3
+        elif segment in REF_SEGMENTS:
+            segments[i + 1] = REF_SEGMENTS[segment]
+            i += 2
+        else:
+            i += 1
+    return "/" + "/".join(segments), repo
+
+def labels(**values):
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(values, escaped)) + "}"
+
+def cache_outcome(response):
+    # requests-cache sets from_cache; a 304 answers a conditional request from the local copy
+    if getattr(response, "from_cache", False):
+        return "hit"
+    if response.status_code == 304:
+        return "revalidated"
+    return "miss"
+
+def response_bytes(response, stream):
+    if stream:
+        return int(response.headers.get("Content-Length", 0) or 0)
+    return len(response.content)
+
+def rate_limit_remaining(response):
+    value = response.headers.get("X-RateLimit-Remaining")
+    return int(value) if value is not None and value.isdigit() else None
+
+class Telemetry:
+    def __init__(self, max_records=MAX_RECORDS):
+        self.lock = threading.Lock()
+        self.max_records = max_records
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.records = deque(maxlen=self.max_records)
+            self.requests = {}
+            self.latency = {}
+            self.budget = {}
+            self.sleeps = {}
+            self.cache = {}
+            self.remaining = {}
+            self.started = time.time()
+
+    def record_request(self, source, method, url, status, seconds, size, cache, remaining):
+        endpoint, repo = endpoint_template(url)
+        record = {
+            "time": time.time(),
+            "source": source,
+            "method": method,
+            "endpoint": endpoint,
+            "repo": repo,
+            "status": status,
+            "seconds": seconds,
+            "bytes": size,
+            "cache": cache,
+            "rate_limit_remaining": remaining,
+        }
+        with self.lock:
+            self.records.append(record)
+            key = (source, endpoint, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            histogram = self.latency.setdefault((source, endpoint), {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0, "bytes": 0})
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    histogram["buckets"][i] += 1
+                    break
+            histogram["sum"] += seconds
+            histogram["count"] += 1
+            histogram["bytes"] += size
+
+            # Cache hits do not reach the server and GitHub does not charge a 304 to a conditional request
+            if cache == "miss":
+                key = (source, repo or "", endpoint)
+                self.budget[key] = self.budget.get(key, 0) + 1
+            self.cache[(source, cache)] = self.cache.get((source, cache), 0) + 1
+            if remaining is not None:
+                self.remaining[source] = remaining
+        return record
+
+    def record_sleep(self, source, reason, seconds, repo=None):
+        with self.lock:
+            self.records.append({"time": time.time(), "source": source, "sleep": reason, "repo": repo, "seconds": seconds})
+            entry = self.sleeps.setdefault((source, reason, repo or ""), {"count": 0, "seconds": 0.0})
+            entry["count"] += 1
+            entry["seconds"] += seconds
+
+    def snapshot(self):
+        """Aggregates as plain dicts, ready for JSON."""
+        with self.lock:
+            endpoints = []
+            for (source, endpoint), histogram in sorted(self.latency.items()):
+                statuses = {status: count for (s, e, status), count in self.requests.items() if (s, e) == (source, endpoint)}
+                endpoints.append({
+                    "source": source,
+                    "endpoint": endpoint,
+                    "requests": histogram["count"],
+                    "statuses": statuses,
+                    "seconds_total": histogram["sum"],
+                    "seconds_mean": histogram["sum"] / histogram["count"],
+                    "bytes": histogram["bytes"],
+                    "latency_buckets": {("+Inf" if math.isinf(bound) else str(bound)): count
+                                        for bound, count in zip(LATENCY_BUCKETS, histogram["buckets"])},
+                })
+            return {
+                "started": self.started,
+                "elapsed": time.time() - self.started,
+                "endpoints": endpoints,
+                "budget": [{"source": source, "repo": repo or None, "endpoint": endpoint, "requests": count}
+                           for (source, repo, endpoint), count in sorted(self.budget.items())],
+                "sleeps": [{"source": source, "reason": reason, "repo": repo or None, **entry}
+                           for (source, reason, repo), entry in sorted(self.sleeps.items())],
+                "cache": [{"source": source, "outcome": outcome, "requests": count}
+                          for (source, outcome), count in sorted(self.cache.items())],
+                "rate_limit_remaining": dict(self.remaining),
+            }
+
+    def prometheus(self):
+        """Aggregates in the Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            name = f"{METRIC_PREFIX}_requests_total"
+            lines += [f"# HELP {name} Outbound requests by endpoint and status.", f"# TYPE {name} counter"]
+            lines += [f"{name}{labels(source=s, endpoint=e, status=status)} {count}" for (s, e, status), count in sorted(self.requests.items())]
+
+            name = f"{METRIC_PREFIX}_request_duration_seconds"
+            lines += [f"# HELP {name} Request latency.", f"# TYPE {name} histogram"]
+            for (s, e), histogram in sorted(self.latency.items()):
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, histogram["buckets"]):
+                    cumulative += count
+                    le = "+Inf" if math.isinf(bound) else repr(bound)
+                    lines.append(f"{name}_bucket{labels(source=s, endpoint=e, le=le)} {cumulative}")
+                lines.append(f"{name}_sum{labels(source=s, endpoint=e)} {histogram['sum']}")
+                lines.append(f"{name}_count{labels(source=s, endpoint=e)} {histogram['count']}")
+
+            name = f"{METRIC_PREFIX}_response_bytes_total"
+            lines += [f"# HELP {name} Response body bytes.", f"# TYPE {name} counter"]
+            lines += [f"{name}{labels(source=s, endpoint=e)} {histogram['bytes']}" for (s, e), histogram in sorted(self.latency.items())]
+
+            name = f"{METRIC_PREFIX}_budget_requests_total"
+            lines += [f"# HELP {name} Requests that counted against the rate limit, by repo and endpoint.", f"# TYPE {name} counter"]
+            lines += [f"{name}{labels(source=s, repo=repo, endpoint=e)} {count}" for (s, repo, e), count in sorted(self.budget.items())]
+
+            name = f"{METRIC_PREFIX}_cache_requests_total"
+            lines += [f"# HELP {name} Requests by cache outcome.", f"# TYPE {name} counter"]
+            lines += [f"{name}{labels(source=s, outcome=outcome)} {count}" for (s, outcome), count in sorted(self.cache.items())]
+
+            name = f"{METRIC_PREFIX}_sleep_seconds_total"
+            lines += [f"# HELP {name} Time spent sleeping between requests, by reason.", f"# TYPE {name} counter"]
+            lines += [f"{name}{labels(source=s, reason=reason, repo=repo)} {entry['seconds']}" for (s, reason, repo), entry in sorted(self.sleeps.items())]
+
+            name = f"{METRIC_PREFIX}_rate_limit_remaining"
+            lines += [f"# HELP {name} Last X-RateLimit-Remaining seen.", f"# TYPE {name} gauge"]
+            lines += [f"{name}{labels(source=s)} {remaining}" for s, remaining in sorted(self.remaining.items())]
+        return "\n".join(lines) + "\n"
+
+# Process-wide collector used by the crawlers
+TELEMETRY = Telemetry()
+
+def traced_get(url, source, telemetry=None, **kwargs):
+    """requests.get that records endpoint, status, latency, bytes, cache outcome and rate-limit remaining."""
+    telemetry = telemetry or TELEMETRY
+    source = host_source(url, source)
+    start = time.perf_counter()
+    try:
+        response = requests.get(url, **kwargs)
+    except requests.RequestException:
+        telemetry.record_request(source, "GET", url, "error", time.perf_counter() - start, 0, "miss", None)
+        raise
+    telemetry.record_request(source, "GET", url, response.status_code, time.perf_counter() - start,
+                             response_bytes(response, kwargs.get("stream", False)), cache_outcome(response),
+                             rate_limit_remaining(response))
+    return response
+
+def traced_sleep(seconds, reason, source, repo=None, telemetry=None):
+    (telemetry or TELEMETRY).record_sleep(source, reason, seconds, repo)
+    time.sleep(seconds)
+
+def save_json(filename="request_telemetry.json", telemetry=None):
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump((telemetry or TELEMETRY).snapshot(), f, indent=4)
+    print(f"Request telemetry saved to {filename}")
+
+def save_prometheus(filename="request_telemetry.prom", telemetry=None):
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write((telemetry or TELEMETRY).prometheus())
+    print(f"Request metrics saved to {filename}")
+
+def save(prefix="request_telemetry", telemetry=None):
+    save_json(f"{prefix}.json", telemetry)
+    save_prometheus(f"{prefix}.prom", telemetry)
@@ -0,0 +1,136 @@
+import numpy as np
+
+import SimulationRandom
+
+MODEL_KEY = "5.9"
+
+# Orden de los niveles de riesgo, el código es la posición (0 = Crítico ... 3 = Bajo)
+RISK_LEVELS = ['Crítico', 'Alto', 'Medio', 'Bajo']
+
+DEFAULT_PARAMS = {
+    # Probabilidad base de bajar un nivel de riesgo, se multiplica por el factor SBOM
+    "transition_probs": {'Crítico': 0.85, 'Alto': 0.75, 'Medio': 0.65, 'Bajo': 0.0},
+    # Efectividad según la antigüedad de la versión: > 2 años, > 1 año, reciente
+    "age_factors": (0.90, 0.75, 0.50),
+    # Efectividad cuando no hay parche disponible
+    "no_patch_factor": 0.40,
+    # La probabilidad de parche crece con los días desde la liberación hasta este máximo
+    "patch_days": 1000,
+    "patch_cap": 0.9,
+    # Rangos del factor por modelo SBOM
+    "model_factors": {'basic': (0.3, 0.4), 'advanced': (0.5, 0.7)},
+    "model": 'advanced',
+}
+
+BLOCK_ELEMENTS = 2_000_000
+ROW_VARIABLES = 3
+
+# simulate devuelve un solo arreglo (réplicas, versiones, niveles): se concatena entero
+PER_REPLICATION = None
+
+def risk_codes(base_score):
+    # Mismo criterio que categorize_risk; las puntuaciones nulas quedan como 'Bajo'
+    scores = np.asarray(base_score, dtype=float)
+    codes = np.full(scores.shape, 3, dtype=np.int8)
+    codes[scores >= 4.0] = 2
+    codes[scores >= 7.0] = 1
+    codes[scores >= 9.0] = 0
+    return codes
+
+def release_age_days(release_date, today):
+    # Días completos desde la liberación, NaN si la fecha no es válida
+    release = np.asarray(release_date, dtype="datetime64[ns]")
+    today = np.datetime64(today, "ns")
+    age = (today - release).astype("timedelta64[D]").astype(float)
+    age[np.isnat(release)] = np.nan
+    return age
+
+def tag_risk_counts(tag_codes, risk, n_tags):
+    # Tabla cruzada versión x nivel de riesgo a partir de los códigos enteros
+    tag_codes = np.asarray(tag_codes, dtype=np.int64)
+    valid = tag_codes >= 0
+    flat = tag_codes[valid] * len(RISK_LEVELS) + np.asarray(risk)[valid]
+    return np.bincount(flat, minlength=n_tags * len(RISK_LEVELS)).reshape(n_tags, len(RISK_LEVELS))
+
+def new_state(n_tags, replications=1, seed=42, params=None, repo="", first_replication=0, keep_replications=True):
+    """Acumuladores de conteos por versión y nivel de riesgo.
+
+    Con keep_replications=False solo se guardan los totales por versión (sumados sobre las réplicas)
+    y los totales por réplica y nivel, así la memoria no crece con réplicas x versiones.
+    """
+    n_levels = len(RISK_LEVELS)
+    return {
+        "params": {**DEFAULT_PARAMS, **(params or {})},
+        "seed": seed,
+        "repo": repo,
+        "first_replication": first_replication,
+        "replications": replications,
+        "n_tags": n_tags,
+        "rows": 0,
+        "counts": np.zeros((replications, n_tags, n_levels), dtype=np.int64) if keep_replications else None,
+        "tag_totals": np.zeros((n_tags, n_levels), dtype=np.int64),
+        "level_counts": np.zeros((replications, n_levels), dtype=np.int64),
+    }
+
+def accumulate(state, risk, age_days, tag_codes, offset=None):
+    """Suma un bloque de filas que empieza en la fila `offset` (por defecto, a continuación del anterior)."""
+    params = state["params"]
+    risk = np.asarray(risk, dtype=np.int64)
+    age_days = np.asarray(age_days, dtype=float)
+    tag_codes = np.asarray(tag_codes, dtype=np.int64)
+    offset = state["rows"] if offset is None else offset
+    n = len(risk)
+    n_tags = state["n_tags"]
+    n_levels = len(RISK_LEVELS)
+
+    # Todo lo que depende solo de la fila se calcula una vez fuera de las réplicas
+    patch_prob = np.fmin(params["patch_cap"], age_days / params["patch_days"])
+    years = age_days / 365
+    older, old, recent = params["age_factors"]
+    factor_with_patch = np.where(years > 2, older, np.where(years > 1, old, recent))
+    base_transition = np.array([params["transition_probs"].get(level, 0.0) for level in RISK_LEVELS])[risk]
+    low, high = params["model_factors"].get(params["model"], (0.0, 0.0))
+
+    valid = tag_codes >= 0
+    flat_offset = np.where(valid, tag_codes, 0) * n_levels
+
+    # Valores por fila: disponibilidad de parche, factor del modelo SBOM y transición
+    block = max(1, BLOCK_ELEMENTS // max(n * ROW_VARIABLES, 1))
+    for start in range(0, state["replications"], block):
+        b = min(block, state["replications"] - start)
+        k = SimulationRandom.row_draws(state["seed"], MODEL_KEY, state["repo"], b, state["first_replication"] + start,
+                                       offset, n, ROW_VARIABLES)
+        u = SimulationRandom.to_uniform(k)
+
+        patch_available = u[:, :, 0] < patch_prob
+        effect = np.where(patch_available, factor_with_patch, params["no_patch_factor"])
+        sbom_factor = effect * (low + (high - low) * u[:, :, 1])
+        moves = u[:, :, 2] < sbom_factor * base_transition
+
+        # Si la reducción se activa, se baja un nivel de riesgo
+        new_risk = np.minimum(risk + moves, n_levels - 1)
+
+        flat = (np.arange(b)[:, None] * (n_tags * n_levels) + flat_offset + new_risk)[:, valid]
+        counts = np.bincount(flat.ravel(), minlength=b * n_tags * n_levels).reshape(b, n_tags, n_levels)
+        if state["counts"] is not None:
+            state["counts"][start:start + b] += counts
+        state["tag_totals"] += counts.sum(axis=0)
+        state["level_counts"][start:start + b] += counts.sum(axis=1)
+
+    state["rows"] = max(state["rows"], offset + n)
+    return state
+
+def simulate(risk, age_days, tag_codes, n_tags, replications=1, seed=42, params=None, repo="", first_replication=0):
+    """Aplica el efecto SBOM a todos los CVE en todas las réplicas.
+
+    Devuelve un arreglo (réplicas, versiones, niveles de riesgo) con el conteo de CVE. Los valores
+    aleatorios dependen solo de (réplica, fila), igual que en SimulationChunked.
+    """
+    risk = np.asarray(risk)
+    age_days = np.asarray(age_days)
+    tag_codes = np.asarray(tag_codes)
+    state = new_state(n_tags, replications, seed, params, repo, first_replication)
+    chunk = max(1, BLOCK_ELEMENTS // ROW_VARIABLES)
+    for start in range(0, len(risk), chunk):
+        accumulate(state, risk[start:start + chunk], age_days[start:start + chunk], tag_codes[start:start + chunk], offset=start)
+    return state["counts"]
@@ -0,0 +1,313 @@
+# Punto de entrada único: crawl, scan, load, simulate, report, benchmarks y el
+# servidor local que reemplaza a la API de GitHub.
+# Solo argparse se importa al inicio; pandas, numpy, matplotlib, pyodbc y requests se importan
+# dentro del subcomando que los usa, así --help responde sin cargar nada pesado.
+import argparse
+import json
+import sys
+
+SERVER = 'DESKTOP-3FC1SUJ'
+DATABASE = 'SBOM'
+
+MODELS = ("5.7", "5.9", "5.19", "8.8")
+LOAD_TARGETS = ("releases", "cve", "advisories", "nvd", "ingest", "analytics", "features")
+
+def connect(args):
+    import pyodbc
+
+    return pyodbc.connect(f'DRIVER={{SQL Server}};SERVER={args.server};DATABASE={args.database};Trusted_Connection=yes;')
+
+def cmd_crawl(args):
+    if args.mode == "advisories":
+        import GitHubSingleRequest as crawler
+    else:
+        import GitHubRequest as crawler
+
+    if not crawler.GITHUB_TOKEN:
+        raise Exception("GitHub token not found! Set GITHUB_TOKEN environment variable.")
+    crawler.COMMIT_BACKEND = args.commits_from
+    crawler.main()
+
+def cmd_scan(args):
+    import Orchestration
+
+    Orchestration.main(args.repo, args.per_page, args.source, args.manifests_only)
+
+def stored_releases(args):
+    import ArtifactStore
+
+    # Release list saved by scan for --repo, or the old repo_releases.json
+    found = ArtifactStore.find("releases", args.repo, args.artifacts) if args.repo else []
+    return found[0][2] if found else "repo_releases.json"
+
+def cmd_load(args):
+    if args.target == "nvd":
+        import DatabaseCVEHistory
+
+        # Abre su propia conexión; sync solo vuelve a aplicar los feeds cuyo .meta cambió
+        DatabaseCVEHistory.process_all_nvdcve_files(args.directory, upsert=True, sync=not args.full)
+        return
+
+    if args.target == "features":
+        import SimulationFeatures
+
+        SimulationFeatures.refresh_features(csv_path=args.csv or "Data.csv")
+        return
+
+    if args.target == "analytics" and args.csv:
+        import AnalyticsStore
+
+        AnalyticsStore.import_csv(args.csv)
+        return
+
+    conn = connect(args)
+    try:
+        if args.target == "ingest":
+            import ParallelIngest
+
+            stats = ParallelIngest.parallel_ingest(conn, args.directory, workers=args.workers, upsert=True, repo_id=args.repo_id,
+                                                   root=args.artifacts, repo_full_name=args.repo)
+            if stats["errors"]:
+                sys.exit(1)
+        elif args.target == "analytics":
+            import AnalyticsStore
+
+            AnalyticsStore.refresh_from_database(conn, full=args.full)
+        else:
+            import DatabaseConnection
+
+            cursor = conn.cursor()
+            if args.target == "releases":
+                DatabaseConnection.insert_repo_releases(conn, cursor, args.file or stored_releases(args), upsert=True, repo_id=args.repo_id)
+            elif args.target == "cve":
+                DatabaseConnection.process_cve_files(args.directory, conn, cursor, upsert=True, root=args.artifacts,
+                                                     repo_full_name=args.repo, repo_id=args.repo_id)
+            else:
+                DatabaseConnection.security_advisories_insert(conn, cursor, upsert=True)
+            cursor.close()
+    finally:
+        conn.close()
+
+def cmd_simulate(args):
+    import BatchReport
+    import SimulationFeatures
+
+    module = BatchReport.load_script(args.model)
+    features = SimulationFeatures.load_features(args.repo, csv_path=args.csv)
+
+    kwargs = {"seed": args.seed}
+    if args.replications:
+        kwargs["replications"] = args.replications
+    results = module.run(features, args.repo, **kwargs)
+    if hasattr(module, "report"):
+        module.report(results)
+
+def cmd_report(args):
+    import BatchReport
+
+    stats = BatchReport.run_batch(repos=args.repos, models=args.models, root=args.output, csv_path=args.csv,
+                                  workers=args.workers, replications=args.replications, seed=args.seed, force=args.force)
+    if stats["errors"]:
+        sys.exit(1)
+
+def cmd_benchmark(args):
+    import SimulationBenchmark
+
+    kwargs = {"sizes": args.sizes, "models": args.models, "repeat": args.repeat, "csv_path": args.csv,
+              "output": args.output, "baseline": args.baseline, "tolerance": args.tolerance}
+    if args.replications:
+        kwargs["replications"] = args.replications
+    if not SimulationBenchmark.main(**kwargs):
+        sys.exit(1)
+
+def cmd_artifacts(args):
+    import ArtifactStore
+
+    if args.action == "import":
+        ArtifactStore.import_loose(args.repo, args.directory, args.artifacts, remove=args.remove)
+        return
+
+    for kind, total in sorted(ArtifactStore.footprint(args.artifacts).items()):
+        print(f"{kind:>14}: {total['artifacts']} artifacts, {total['bytes'] / 1e6:.1f} MB stored, "
+              f"{total['raw_bytes'] / 1e6:.1f} MB as JSON ({total['ratio'] or 0:.1f}x)")
+
+def cmd_components(args):
+    import ComponentCatalog
+
+    if args.action == "build":
+        ComponentCatalog.build(args.repo, args.artifacts, rebuild=args.rebuild)
+        stats = ComponentCatalog.storage(args.repo, args.artifacts)
+        print(f"{stats['releases']} releases, {stats['stored_ids']} ids stored for {stats['full_ids']} in full ({stats['ratio'] or 0:.1f}x)")
+    elif args.action == "which":
+        for tag in ComponentCatalog.releases_containing(args.repo, args.name, args.version, args.ecosystem, args.artifacts):
+            print(tag)
+    else:
+        changes = ComponentCatalog.diff(args.repo, args.tags[0], args.tags[1], args.artifacts)
+        for sign, key in (("+", "added"), ("-", "removed")):
+            for component in changes[key]:
+                print(f"{sign} {component['ecosystem']}/{component['name']}@{component['version']}")
+
+def cmd_lifecycle(args):
+    import AnalyticsStore
+    import CVELifecycleIndex
+
+    if args.action == "build":
+        AnalyticsStore.rebuild_lifecycle(args.repo and [args.repo], artifacts=args.artifacts)
+        return
+
+    # Checked here so a missing option is a usage error rather than a failure inside the index
+    required = {"affected": "cve", "open": "tag", "window": "cve"}[args.action]
+    if not args.repo:
+        args.parser.error(f"lifecycle {args.action} requires --repo")
+    if not getattr(args, required):
+        args.parser.error(f"lifecycle {args.action} requires --{required}")
+
+    index = CVELifecycleIndex.load_index(args.repo)
+    if args.action == "affected":
+        print("\n".join(index.releases_affected(args.cve)))
+    elif args.action == "open":
+        print("\n".join(index.open_at(args.tag)))
+    else:
+        print(json.dumps(index.exposure_window(args.cve), indent=4))
+
+def cmd_advisory_match(args):
+    import VersionRanges
+
+    index = VersionRanges.load_advisories(args.advisories)
+    for tag, advisories in VersionRanges.match_releases(args.repo, index, args.artifacts).items():
+        print(f"{tag}: {len(advisories)} advisories" + (f" ({', '.join(sorted(advisories))})" if advisories else ""))
+
+def cmd_standin(args):
+    import GitHubStandIn
+
+    GitHubStandIn.main(args.port, args.latency, args.rate_limit)
+
+def cmd_fetch_benchmark(args):
+    import GitHubFetchBenchmark
+
+    results = GitHubFetchBenchmark.run_benchmark(args.strategies, args.repos, args.latency, page_delay=args.page_delay,
+                                                 rate_limit=args.rate_limit, rate_window=args.rate_window)
+    GitHubFetchBenchmark.save_results(results, args.output)
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="SBOMCli", description="SBOM toolkit")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    crawl = subparsers.add_parser("crawl", help="Fetch commits, merges and security advisories from GitHub")
+    crawl.add_argument("--mode", choices=("activity", "advisories"), default="activity",
+                       help="activity: commits, merges and advisories of the top repos; advisories: all advisories of one repo")
+    crawl.add_argument("--commits-from", choices=("api", "git"), default="api",
+                       help="git: count commits and merges from local blob-less mirrors instead of the REST API")
+    crawl.set_defaults(handler=cmd_crawl)
+
+    scan = subparsers.add_parser("scan", help="Download releases, generate SBOMs with syft and scan them with grype")
+    scan.add_argument("--repo", default="tensorflow/tensorflow")
+    scan.add_argument("--per-page", type=int, default=25)
+    scan.add_argument("--source", choices=("tarball", "archive", "worktree"), default="tarball",
+                      help="archive/worktree: build every release from one local blob-less mirror instead of downloading tarballs")
+    scan.add_argument("--manifests-only", action="store_true", help="with archive/worktree, only check out dependency manifests")
+    scan.set_defaults(handler=cmd_scan)
+
+    load = subparsers.add_parser("load", help="Load crawled and scanned data into SQL Server or the analytics store")
+    load.add_argument("target", choices=LOAD_TARGETS)
+    load.add_argument("--directory", default=".")
+    load.add_argument("--file", help="JSON file for the releases target")
+    load.add_argument("--repo", help="releases / cve / ingest: only this repo's stored artifacts")
+    load.add_argument("--repo-id", type=int, default=1, help="releases / cve / ingest: repo_id the rows are written under")
+    load.add_argument("--artifacts", default="artifacts", help="artifact store root")
+    load.add_argument("--csv", help="analytics: import this exported CSV instead of the database; features: source when there is no store")
+    load.add_argument("--workers", type=int)
+    load.add_argument("--full", action="store_true", help="nvd: reload every feed; analytics: re-export every repo")
+    load.add_argument("--server", default=SERVER)
+    load.add_argument("--database", default=DATABASE)
+    load.set_defaults(handler=cmd_load)
+
+    simulate = subparsers.add_parser("simulate", help="Run one model for one repo and print its results")
+    simulate.add_argument("model", choices=MODELS)
+    simulate.add_argument("--repo", default="tensorflow/tensorflow")
+    simulate.add_argument("--csv", default="Data.csv", help="used when the analytics store has not been exported")
+    simulate.add_argument("--replications", type=int)
+    simulate.add_argument("--seed", type=int, default=42)
+    simulate.set_defaults(handler=cmd_simulate)
+
+    report = subparsers.add_parser("report", help="Render every model for every repo to PNG/SVG")
+    report.add_argument("--repos", nargs="+")
+    report.add_argument("--models", nargs="+", choices=MODELS)
+    report.add_argument("--output", default="reports")
+    report.add_argument("--csv", default="Data.csv", help="used when the analytics store has not been exported")
+    report.add_argument("--workers", type=int)
+    report.add_argument("--replications", type=int)
+    report.add_argument("--seed", type=int, default=42)
+    report.add_argument("--force", action="store_true", help="render even if the input data did not change")
+    report.set_defaults(handler=cmd_report)
+
+    benchmark = subparsers.add_parser("benchmark", help="Time and memory-profile every model on synthetic tables of several sizes")
+    benchmark.add_argument("--sizes", nargs="+", type=int, default=[1_000, 100_000, 1_000_000, 10_000_000])
+    benchmark.add_argument("--models", nargs="+", choices=MODELS)
+    benchmark.add_argument("--replications", type=int)
+    benchmark.add_argument("--repeat", type=int, default=3, help="timed runs per measurement, the best one is kept")
+    benchmark.add_argument("--csv", default="Data.csv", help="reference table for the score and severity distributions")
+    benchmark.add_argument("--output", help="results file, benchmarks/<commit>.json by default (<commit>-dirty-<time>.json with uncommitted changes)")
+    benchmark.add_argument("--baseline", help="earlier results file to compare against; exits with 1 on regressions")
+    benchmark.add_argument("--tolerance", type=float, default=0.2)
+    benchmark.set_defaults(handler=cmd_benchmark)
+
+    artifacts = subparsers.add_parser("artifacts", help="Import loose scan outputs into the artifact store or show its footprint")
+    artifacts.add_argument("action", choices=("import", "stats"))
+    artifacts.add_argument("--repo", default="tensorflow/tensorflow", help="import: repo the loose files belong to")
+    artifacts.add_argument("--directory", default=".", help="import: where the {tag}.*.json files are")
+    artifacts.add_argument("--remove", action="store_true", help="import: delete the loose files once stored")
+    artifacts.add_argument("--artifacts", default="artifacts", help="artifact store root")
+    artifacts.set_defaults(handler=cmd_artifacts)
+
+    components = subparsers.add_parser("components", help="Deduplicated component catalog built from the stored SBOMs")
+    components.add_argument("action", choices=("build", "which", "diff"),
+                            help="build: add new SBOMs; which: releases containing --name [--version]; diff: changes between two --tags")
+    components.add_argument("--repo", default="tensorflow/tensorflow")
+    components.add_argument("--name")
+    components.add_argument("--version")
+    components.add_argument("--ecosystem", help="purl type such as npm or pypi")
+    components.add_argument("--tags", nargs=2, metavar=("FROM", "TO"))
+    components.add_argument("--rebuild", action="store_true", help="build: re-read every stored SBOM")
+    components.add_argument("--artifacts", default="artifacts", help="artifact store root")
+    components.set_defaults(handler=cmd_components)
+
+    lifecycle = subparsers.add_parser("lifecycle", help="When CVEs appeared and were fixed across a repo's releases")
+    lifecycle.add_argument("action", choices=("build", "affected", "open", "window"),
+                           help="build: index exported partitions; affected/window: --cve; open: CVEs present in --tag")
+    lifecycle.add_argument("--repo", help="required except for build, which defaults to every repo")
+    lifecycle.add_argument("--cve")
+    lifecycle.add_argument("--tag")
+    lifecycle.add_argument("--artifacts", default="artifacts", help="build: artifact store with the repos' release lists")
+    lifecycle.set_defaults(handler=cmd_lifecycle, parser=lifecycle)
+
+    advisory_match = subparsers.add_parser("advisory-match", help="Check every stored release against the crawled advisories' version ranges")
+    advisory_match.add_argument("--repo", default="tensorflow/tensorflow")
+    advisory_match.add_argument("--advisories", default="security_advisories.json", help="crawl output with the advisories to check")
+    advisory_match.add_argument("--artifacts", default="artifacts", help="artifact store root")
+    advisory_match.set_defaults(handler=cmd_advisory_match)
+
+    standin = subparsers.add_parser("standin", help="Serve recorded and synthetic GitHub API responses locally")
+    standin.add_argument("--port", type=int, default=8765)
+    standin.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    standin.add_argument("--rate-limit", type=int, default=5000, help="requests per token and hour")
+    standin.set_defaults(handler=cmd_standin)
+
+    fetch_benchmark = subparsers.add_parser("fetch-benchmark", help="Compare crawl fetch strategies against the local stand-in")
+    fetch_benchmark.add_argument("--strategies", nargs="+", choices=("separate", "single_pass", "threaded"))
+    fetch_benchmark.add_argument("--repos", type=int, default=10)
+    fetch_benchmark.add_argument("--latency", type=float, default=0.05)
+    fetch_benchmark.add_argument("--page-delay", type=float, default=0.0)
+    fetch_benchmark.add_argument("--rate-limit", type=int, default=5000)
+    fetch_benchmark.add_argument("--rate-window", type=float, default=3600)
+    fetch_benchmark.add_argument("--output", default="fetch_benchmark.json")
+    fetch_benchmark.set_defaults(handler=cmd_fetch_benchmark)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,9 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import json
+import SimulationRandom
 
-np.random.seed(42)
+rng = SimulationRandom.generator(42, "SBOMProject")
 """
 # Example GitHub data (deployments)
 github_data = [{"repo": "example-repo", "commits": 50, "workflows": 20}]
@@ -34,9 +35,9 @@ environments = ["DEV", "UAT", "PROD"]
 
 # Generate synthetic deployment frequencies
 data = {
-    "Environment": np.random.choice(environments, 1000),
-    "Deployments_per_day": np.random.poisson(lam=5, size=1000),  # Avg 5 deployments per day
-    "Vulnerabilities_found": np.random.poisson(lam=3, size=1000),  # Avg 3 vulnerabilities per deployment
+    "Environment": rng.choice(environments, 1000),
+    "Deployments_per_day": rng.poisson(lam=5, size=1000),  # Avg 5 deployments per day
+    "Vulnerabilities_found": rng.poisson(lam=3, size=1000),  # Avg 3 vulnerabilities per deployment
 }
 
 df = pd.DataFrame(data)
@@ -46,8 +47,8 @@ df["Risk_Level"] = pd.cut(df["Vulnerabilities_found"], bins=[-1,1,3,10], labels=
 
 print(df.head())
 
-df["SBOM_Used"] = np.random.choice([True, False], size=1000)
-df["Time_to_fix"] = np.where(df["SBOM_Used"], np.random.uniform(1, 5, size=1000), np.random.uniform(5, 20, size=1000))
+df["SBOM_Used"] = rng.choice([True, False], size=1000)
+df["Time_to_fix"] = np.where(df["SBOM_Used"], rng.uniform(1, 5, size=1000), rng.uniform(5, 20, size=1000))
 
 sns.boxplot(x="Environment", y="Time_to_fix", hue="SBOM_Used", data=df)
 plt.title("Time to Fix Vulnerabilities with vs Without SBOM")
@@ -63,12 +64,12 @@ with open("gitlab_data.json") as f:
 
 # Create DataFrame
 df = pd.DataFrame([
-    {"Platform": "GitHub", "Deployments": github_data["workflows"], "Vulnerabilities": np.random.randint(1, 10)},
+    {"Platform": "GitHub", "Deployments": github_data["workflows"], "Vulnerabilities": rng.integers(1, 10)},
     {"Platform": "GitLab", "Deployments": gitlab_data["pipelines"], "Vulnerabilities": gitlab_data["vulnerabilities"]}
 ])
 
 # Add SBOM impact simulation (reduces vulnerabilities)
-df["SBOM_Used"] = np.random.choice([True, False], size=len(df))
+df["SBOM_Used"] = rng.choice([True, False], size=len(df))
 df["Reduced_Vulnerabilities"] = df.apply(lambda x: x["Vulnerabilities"] * 0.5 if x["SBOM_Used"] else x["Vulnerabilities"], axis=1)
 
 print(df)
@@ -1,169 +1,71 @@
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
-
-df = pd.read_csv("vercel.csv")
-
-df['release_date'] = pd.to_datetime(df.get('published_at'), errors='coerce')
-if 'tag_name' in df.columns and 'version' not in df.columns:
-    df.rename(columns={'tag_name': 'version'}, inplace=True)
-if 'artifact_name' not in df.columns:
-    raise ValueError("Column 'artifact_name' not found.")
-
-# Todo aquel artefacto diferente al repo se considera como tercero
-repo_root = "next"
-df['artifact_name'] = df['artifact_name'].astype(str)
-df['is_third_party'] = ~df['artifact_name'].str.lower().str.contains(repo_root)
-
-df = df.dropna(subset=['release_date'])
-df = df.sort_values('release_date')
-
-third_party_artifacts = (
-    df.loc[df['is_third_party'], 'artifact_name']
-    .dropna()
-    .unique()
-)
-n_artifacts = len(third_party_artifacts)
-if n_artifacts == 0:
-    raise ValueError("No third-party artifacts found to simulate agreements.")
-
-# Creacion del set de acuerdos
-rng = np.random.default_rng(42)
-n_agreements = max(12, min(60, int(np.ceil(n_artifacts * 0.6))))
-agreement_ids = [f"AGR-{i:04d}" for i in range(1, n_agreements+1)]
-
-categories = ["Open Source", "Commercial", "Contractor"]
-cat_probs = [0.55, 0.30, 0.15]  # Probabilidades de seleccion de categorias
-
-agreements_df = pd.DataFrame({
-    "agreement_id": agreement_ids,
-    "category": rng.choice(categories, size=n_agreements, p=cat_probs),
-})
-
-# Se establecen los niveles de cumplimiento de cada categoria
-required_total = rng.integers(8, 26, size=n_agreements)
-base_rates = []
-for cat in agreements_df['category']:
-    if cat in ("Commercial"):
-        base_rates.append(rng.uniform(0.75, 0.95))
-    elif cat == "Open Source":
-        base_rates.append(rng.uniform(0.60, 0.90))
-    else:  # Contractor
-        base_rates.append(rng.uniform(0.65, 0.92))
-base_rates = np.array(base_rates)
-
-# Calculo del cumplimiento
-addr_total = np.minimum(required_total, np.floor(required_total * base_rates)).astype(int)
-
-agreements_df['required_total'] = required_total
-agreements_df['addressed_total'] = addr_total
-
-# Calculo de la metrica B31.
-agreements_df['b31_pct'] = 100 * agreements_df['addressed_total'] / agreements_df['required_total']
-
-# Mapeo de los acuerdos a artefactos de manera aleatoria
-artifact_to_agreement = pd.DataFrame({
-    "artifact_name": third_party_artifacts,
-    "agreement_id": rng.choice(agreement_ids, size=n_artifacts, replace=True)
-})
-
-# Se mapea el acuerdo con los CVE
-df = df.merge(artifact_to_agreement, on='artifact_name', how='left')
-
-# Separacion de fechas a semestral
-df['year'] = df['release_date'].dt.year
-df['half'] = np.where(df['release_date'].dt.month <= 6, 'H1', 'H2')
-
-# Acuerdos activos en mitades
-agreements_by_half = (
-    df.loc[df['is_third_party'] & df['agreement_id'].notna(), 
-           ['year', 'half', 'agreement_id']]
-    .drop_duplicates()
-    .merge(agreements_df[['agreement_id', 'b31_pct']], on='agreement_id', how='left')
-)
-np.random.seed(42)
-
-# Calculo del promedio B.31 semestralmente
-b31_by_half = (agreements_by_half
-               .groupby(['year', 'half'], as_index=False)['b31_pct']
-               .mean()
-               .rename(columns={'b31_pct': 'b31_pct_avg'})
-               .sort_values(['year', 'half']))
-
-# Conteo de vulnerabilidades por version y fecha
-third_party_df = df[df['is_third_party']].copy()
-vuln_count = (third_party_df
-              .groupby('version', as_index=False)['cve_id']
-              .count()
-              .rename(columns={'cve_id': 'vulnerabilities'}))
-
-release_dates = (df.groupby('version', as_index=False)['release_date'].min())
-vuln_count = vuln_count.merge(release_dates, on='version', how='left').sort_values('release_date')
-
-# Combinacion de datos de vulnerabilidades con metricas B.31
-vuln_count['year'] = vuln_count['release_date'].dt.year
-vuln_count['half'] = np.where(vuln_count['release_date'].dt.month <= 6, 'H1', 'H2')
-
-# Se agregan las metricas al set de vulnerabilidades
-vuln_count = vuln_count.merge(b31_by_half[['year', 'half', 'b31_pct_avg']], 
-                              on=['year', 'half'], how='left')
-
-# Se llenan valores vacios con el promedio en general
-overall_b31_avg = b31_by_half['b31_pct_avg'].mean()
-vuln_count['b31_pct_avg'].fillna(overall_b31_avg, inplace=True)
-
-def calculate_vulnerability_reduction(vulnerabilities, b31_pct, sbom_level):
-    # Factor de reduccion en base al nivdel de madurez del SBOM
-    base_reductions = {
-        'basic': np.random.uniform(0.10, 0.20),
-        'mature': np.random.uniform(0.20, 0.30),
-        'advanced': np.random.uniform(0.30, 0.40)
-    }
-
-    # B.31 como multiplicador de efectividad
-    b31_multiplier = 0.5 + (b31_pct / 100)
-    
-    # Calculo de reduccion
-    reduction = base_reductions[sbom_level] * b31_multiplier
-    
-    # Metodo para asegurarse que la reduccion este en un rango razonable
-    reduction = min(reduction, 0.60)
-    
-    return int(vulnerabilities * (1 - reduction))
-
-# Aplicacion de la reduccion de la vulnerabilidades basado en el cumplimiento de la metrica B.31 y el nivel de SBOM
-rng = np.random.default_rng(123)
-for idx, row in vuln_count.iterrows():
-    vuln_count.at[idx, 'sbom_basic'] = calculate_vulnerability_reduction(
-        row['vulnerabilities'], row['b31_pct_avg'], 'basic')
-    vuln_count.at[idx, 'sbom_mature'] = calculate_vulnerability_reduction(
-        row['vulnerabilities'], row['b31_pct_avg'], 'mature')
-    vuln_count.at[idx, 'sbom_advanced'] = calculate_vulnerability_reduction(
-        row['vulnerabilities'], row['b31_pct_avg'], 'advanced')
-
-print("Acuerdos sintéticos")
-print(agreements_df.sample(5, random_state=7))
-
-print("Número de vulnerabilidades por escenario")
-print(vuln_count[['release_date', 'version', 'vulnerabilities', 'sbom_basic', 'sbom_mature', 'sbom_advanced']].head(10))
-
-plt.figure(figsize=(15, 8))
-
-plt.plot(vuln_count['release_date'], vuln_count['vulnerabilities'], 
-         marker='o', color='red', label='Sin SBOM')
-plt.plot(vuln_count['release_date'], vuln_count['sbom_basic'], 
-         marker='o', color="blue", linestyle='--', label='SBOM Básico')
-plt.plot(vuln_count['release_date'], vuln_count['sbom_mature'], 
-         marker='o', color="green", linestyle='--', label='SBOM Intermedio')
-plt.plot(vuln_count['release_date'], vuln_count['sbom_advanced'], 
-         marker='o', color="purple", linestyle='--', label='SBOM Avanzado')
-plt.title('Impacto del SBOM en Vulnerabilidades de Terceros')
-plt.ylabel('Número de Vulnerabilidades')
-plt.legend()
-plt.grid(True, linestyle='--')
-
-plt.tight_layout()
-plt.show()
+import SimulationFeatures
+import ThirdPartySimulation
+
+REPO_NAME = "vercel/next.js"
+CSV_PATH = "vercel.csv"
+
+def run(features, repo_name=REPO_NAME, replications=1000, seed=42):
+    # La tabla de features ya trae release_date y is_third_party (artefactos que no llevan el nombre del repo)
+    df = features.rename(columns={'tag_name': 'version'})
+
+    # Arreglos enteros por artefacto, semestre y version para el motor vectorizado
+    inputs = ThirdPartySimulation.prepare_inputs(df)
+
+    # Creacion del set de acuerdos, mapeo a artefactos y aplicacion de la reduccion de vulnerabilidades
+    # basado en el cumplimiento de la metrica B.31 y el nivel de SBOM, para todas las réplicas a la vez
+    result = ThirdPartySimulation.simulate(inputs, replications=replications, seed=seed, repo=repo_name)
+    agreements_df = pd.DataFrame(result["agreements"])
+
+    # Promedio de las réplicas por version y nivel de SBOM
+    remaining = result["remaining"].mean(axis=0)
+    vuln_count = pd.DataFrame({
+        'version': inputs["versions"],
+        'release_date': inputs["release_dates"],
+        'vulnerabilities': inputs["vulnerabilities"],
+        'b31_pct_avg': result["version_b31"],
+    })
+    for i, level in enumerate(ThirdPartySimulation.SBOM_LEVELS):
+        vuln_count[f'sbom_{level}'] = remaining[:, i]
+    return {'agreements': agreements_df, 'vuln_count': vuln_count}
+
+def report(results):
+    print("Acuerdos sintéticos")
+    print(results['agreements'].sample(5, random_state=7))
+
+    print("Número de vulnerabilidades por escenario")
+    print(results['vuln_count'][['release_date', 'version', 'vulnerabilities', 'sbom_basic', 'sbom_mature', 'sbom_advanced']].head(10))
+
+def plot(results):
+    vuln_count = results['vuln_count']
+    fig = plt.figure(figsize=(15, 8))
+
+    plt.plot(vuln_count['release_date'], vuln_count['vulnerabilities'], 
+             marker='o', color='red', label='Sin SBOM')
+    plt.plot(vuln_count['release_date'], vuln_count['sbom_basic'], 
+             marker='o', color="blue", linestyle='--', label='SBOM Básico')
+    plt.plot(vuln_count['release_date'], vuln_count['sbom_mature'], 
+             marker='o', color="green", linestyle='--', label='SBOM Intermedio')
+    plt.plot(vuln_count['release_date'], vuln_count['sbom_advanced'], 
+             marker='o', color="purple", linestyle='--', label='SBOM Avanzado')
+    plt.title('Impacto del SBOM en Vulnerabilidades de Terceros')
+    plt.ylabel('Número de Vulnerabilidades')
+    plt.legend()
+    plt.grid(True, linestyle='--')
+
+    plt.tight_layout()
+    return {'third_party': fig}
+
+def main():
+    features = SimulationFeatures.load_features(REPO_NAME, csv_path=CSV_PATH)
+    results = run(features)
+    report(results)
+    plot(results)
+    plt.show()
+
+if __name__ == "__main__":
+    main()
 
 """
 Se utilizan distintos valores debido al nivel de adopcion y esto depende mucho de las herramientas que se esten utilizando.
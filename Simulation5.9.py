@@ -1,121 +1,71 @@
 # Being used
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-
-df = pd.read_csv('tensorflow.csv')
-
-# Convierte published_at a datetime y se ordena por fecha de liberación
-df['release_date'] = pd.to_datetime(df['published_at'], errors='coerce')
-df.sort_values('release_date', inplace=True)
-
-# Categorize risk levels based on CVSS scores
-def categorize_risk(cvss_score):
-    if cvss_score >= 9.0:
-        return 'Crítico'
-    elif cvss_score >= 7.0:
-        return 'Alto'
-    elif cvss_score >= 4.0:
-        return 'Medio'
-    else:
-        return 'Bajo'
-
-df['Risk_Level'] = df['base_score'].apply(categorize_risk)
-
-# Escenario sin SBOM
-df['Risk_Level_No_SBOM'] = df['Risk_Level']
-
-# Función para determinar la efectividad de SBOM según la antigüedad de liberación
-def get_sbom_effect_factor(release_date, patch_availability=True):
-    years_since_release = (pd.to_datetime('today') - release_date).days / 365
-    if patch_availability:
-        if years_since_release > 2:
-            return 0.90  # Se asume: Las versiones antigüas tienen parches disponibles
-        elif years_since_release > 1:
-            return 0.75
-        else:
-            return 0.50  # Versiones recientes posiblemente carezcan de correcciones disponibles
-    else:
-        return 0.40  # Si no hay ningún parche disponible, se reduce el impacto de SBOM
-
-# Función para simular la probabilidad de disponibilidad del parche en función de la antigüedad de la vulnerabilidad
-def has_patch_available(release_date):
-    # Siendo el minimo 0.9 (90%) o en caso de que hayan transcurrido mas de 1000 dias
-    return np.random.rand() < min(0.9, (pd.to_datetime('today') - release_date).days / 1000)
-
-# Función para aplicar diferentes modelos SBOM
-def get_sbom_model_factor(model='basic'):
-    if model == 'basic':
-        return np.random.uniform(0.3, 0.4)
-    elif model == 'advanced':
-        return np.random.uniform(0.5, 0.7)
-    return 0  # Caso sin SBOM
-
-# Función para simular dinámicamente el efecto SBOM
-def simulate_sbom_effect(risk, release_date, model='advanced'):
-    patch_available = has_patch_available(release_date)
-    sbom_factor = get_sbom_effect_factor(release_date, patch_availability=patch_available) * get_sbom_model_factor(model)
-    
-    # Se definen probabilidades de transicion de riesgos, e.g. pasar de Critico a Alto/Medio
-    transition_probs = {
-        'Crítico': sbom_factor * 0.85,
-        'Alto': sbom_factor * 0.75,
-        'Medio': sbom_factor * 0.65,
-        'Bajo': 0.0
-    }
-    """
-    'Crítico': [sbom_factor * 0.85, 1 - sbom_factor * 0.85],
-        'Alto': [sbom_factor * 0.75, 1 - sbom_factor * 0.75],
-        'Medio': [sbom_factor * 0.65, 1 - sbom_factor * 0.65],
-        'Bajo': [1.0, 0.0]
-    
-    if risk in transition_probs:
-        # Se asigna un nivel de riesgo de forma aleatoria basado en las probabilidades de transicion
-        return np.random.choice(['Bajo', 'Medio', 'Alto', 'Crítico'][:len(transition_probs[risk])], 
-                                p=transition_probs[risk])
-    """
-
-    if risk in transition_probs:
-        if np.random.rand() < transition_probs[risk]:
-            # If the reduction triggers, move down one risk level
-            severity_levels = ['Crítico', 'Alto', 'Medio', 'Bajo']
-            current_index = severity_levels.index(risk)
-            new_index = min(current_index + 1, len(severity_levels) - 1) # Se mueve un nivel hacia abajo
-            return severity_levels[new_index]
-        
-    return risk
-
-# Aplicar el efecto SBOM considerando la disponibilidad de parches
-df['Risk_Level_SBOM'] = df.apply(lambda row: simulate_sbom_effect(row['Risk_Level'], row['release_date'], model='advanced'), axis=1)
-
-# Asegúrarse que el tag_name esté ordenado por fecha de lanzamiento
-df_sorted = df[['tag_name', 'release_date']].drop_duplicates().sort_values('release_date')
-df['tag_name'] = pd.Categorical(df['tag_name'], categories=df_sorted['tag_name'], ordered=True)
-
-# Se define el orden de nivel de riesgo
-risk_levels = ['Crítico', 'Alto', 'Medio', 'Bajo']
-
-# Se agregan datos y se ordenan en el orden correcto
-heatmap_data_no_sbom = pd.crosstab(df['tag_name'], df['Risk_Level_No_SBOM'])
-heatmap_data_no_sbom = heatmap_data_no_sbom.reindex(columns=risk_levels, fill_value=0)
-
-heatmap_data_sbom = pd.crosstab(df['tag_name'], df['Risk_Level_SBOM'])
-heatmap_data_sbom = heatmap_data_sbom.reindex(columns=risk_levels, fill_value=0)
-
-# Visualización
-fig, axes = plt.subplots(1, 2, figsize=(18, 8), sharey=True)
-
-# https://seaborn.pydata.org/generated/seaborn.heatmap.html
-sns.heatmap(heatmap_data_no_sbom, annot=True, cmap='Reds', ax=axes[0], fmt=".0f")
-axes[0].set_title('Niveles de riesgo por Release (No SBOM)', fontsize=14)
-axes[0].set_ylabel("Versión", fontsize=12)
-axes[0].set_xlabel("Nivel de riesgo No SBOM", fontsize=12)
-
-sns.heatmap(heatmap_data_sbom, annot=True, cmap='Greens', ax=axes[1], fmt=".0f")
-axes[1].set_title('Niveles de riesgo por Release  (SBOM)', fontsize=14)
-axes[1].set_ylabel("Versión", fontsize=12)
-axes[1].set_xlabel("Nivel de riesgo SBOM", fontsize=12)
-
-plt.tight_layout()
-plt.show()
\ No newline at end of file
+import RiskTransitionSimulation
+import SimulationFeatures
+
+REPO_NAME = 'tensorflow/tensorflow'
+CSV_PATH = 'tensorflow.csv'
+
+def run(features, repo_name=REPO_NAME, replications=1000, seed=42, today=None):
+    # Niveles de riesgo por puntuación CVSS (códigos enteros 0 = Crítico ... 3 = Bajo), precalculados
+    risk_codes = features['risk_code'].to_numpy()
+    risk_levels = RiskTransitionSimulation.RISK_LEVELS
+
+    # Antigüedad de cada versión en días a la fecha de la corrida
+    age_days = SimulationFeatures.release_age(features, today)
+
+    # tag_name ya viene como categoría ordenada por fecha de lanzamiento
+    tag_order = features['tag_name'].cat.categories.astype(str)
+    tag_codes = SimulationFeatures.tag_codes(features)
+
+    # Escenario sin SBOM
+    heatmap_data_no_sbom = pd.DataFrame(
+        RiskTransitionSimulation.tag_risk_counts(tag_codes, risk_codes, len(tag_order)),
+        index=pd.Index(tag_order, name='tag_name'), columns=risk_levels)
+
+    # Aplicar el efecto SBOM considerando la disponibilidad de parches, promedio de varias réplicas
+    counts_sbom = RiskTransitionSimulation.simulate(risk_codes, age_days, tag_codes, len(tag_order),
+                                                    replications=replications, seed=seed, params={'model': 'advanced'},
+                                                    repo=repo_name)
+    heatmap_data_sbom = pd.DataFrame(counts_sbom.mean(axis=0), index=pd.Index(tag_order, name='tag_name'), columns=risk_levels)
+    return {'no_sbom': heatmap_data_no_sbom, 'sbom': heatmap_data_sbom}
+
+def report(results):
+    # Total de vulnerabilidades por nivel de riesgo, sin SBOM y con SBOM (media de las réplicas)
+    totals = pd.DataFrame({'No SBOM': results['no_sbom'].sum(), 'SBOM': results['sbom'].sum()})
+    print("Vulnerabilidades por nivel de riesgo")
+    print(totals.round(1))
+
+    print("Niveles de riesgo por versión (SBOM)")
+    print(results['sbom'].tail(10).round(1))
+
+def plot(results):
+    # Visualización, la altura crece con la cantidad de versiones
+    n_tags = len(results['no_sbom'])
+    fig, axes = plt.subplots(1, 2, figsize=(18, max(8, 0.25 * n_tags)), sharey=True)
+
+    # https://seaborn.pydata.org/generated/seaborn.heatmap.html
+    sns.heatmap(results['no_sbom'], annot=True, cmap='Reds', ax=axes[0], fmt=".0f")
+    axes[0].set_title('Niveles de riesgo por Release (No SBOM)', fontsize=14)
+    axes[0].set_ylabel("Versión", fontsize=12)
+    axes[0].set_xlabel("Nivel de riesgo No SBOM", fontsize=12)
+
+    sns.heatmap(results['sbom'], annot=True, cmap='Greens', ax=axes[1], fmt=".0f")
+    axes[1].set_title('Niveles de riesgo por Release  (SBOM)', fontsize=14)
+    axes[1].set_ylabel("Versión", fontsize=12)
+    axes[1].set_xlabel("Nivel de riesgo SBOM", fontsize=12)
+
+    plt.tight_layout()
+    return {'risk_heatmap': fig}
+
+def main():
+    features = SimulationFeatures.load_features(REPO_NAME, csv_path=CSV_PATH)
+    results = run(features)
+    report(results)
+    plot(results)
+    plt.show()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+import gc
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import AnalyticsStore
+import BatchReport
+import SimulationFeatures
+import SimulationRandom
+import ThirdPartySimulation
+
+BENCHMARK_DIR = "benchmarks"
+SIZES = (1_000, 100_000, 1_000_000, 10_000_000)
+REPLICATIONS = 20
+REPEAT = 3
+# Una corrida es más lenta que la base si tarda o reserva más de (1 + TOLERANCE) veces lo mismo
+TOLERANCE = 0.20
+
+SYNTHETIC_REPO = "synthetic/benchmark"
+# Fecha fija para que la antigüedad de las versiones de 5.9 no cambie entre corridas
+BENCHMARK_TODAY = "2026-01-01"
+RELEASE_SPAN_DAYS = 3 * 365
+# Como en el crawl, cada repo trae a lo sumo unas cuantas decenas de versiones por página
+MAX_TAGS = 500
+
+SCORE_COLUMNS = ["severity", "cvss_version", "vector_string", "base_score", "impact_score", "exploitability_score"]
+
+def reference_profile(csv_path="Data.csv"):
+    """Distribuciones de Data.csv que reproduce el generador.
+
+    Las columnas de severidad y puntuación se sortean como combinaciones completas (severity, cvss_version,
+    vector_string, base_score, ...) con su frecuencia observada, así las puntuaciones nulas y las bandas
+    quedan igual que en los datos reales.
+    """
+    df = AnalyticsStore.read_export_csv(csv_path)
+    scores = df[SCORE_COLUMNS].astype({column: "object" for column in SCORE_COLUMNS[:3]})
+    combos = scores.value_counts(dropna=False, normalize=True).reset_index()
+
+    rows_per_tag = df.groupby(["repo_name", "tag_name"], observed=True).size()
+    first_party = np.mean([
+        artifact_name.lower().find(ThirdPartySimulation.repo_root_from_name(repo_name)) >= 0
+        for repo_name, artifact_name in zip(df["repo_name"].astype(str), df["artifact_name"].astype(str))
+    ])
+    return {
+        "scores": combos.drop(columns=["proportion"]),
+        "weights": combos["proportion"].to_numpy(),
+        "rows_per_tag": float(rows_per_tag.mean()),
+        "cves_per_row": df["cve_id"].nunique() / len(df),
+        "artifacts_per_row": df["artifact_name"].nunique() / len(df),
+        "prerelease": float(df["prerelease"].mean()),
+        "first_party": float(first_party),
+    }
+
+def _categorical(labels, codes):
+    return pd.Categorical.from_codes(codes, categories=pd.Index(labels).astype(str))
+
+def synthetic_dataset(rows, profile, seed=0, repo_name=SYNTHETIC_REPO):
+    """Tabla releases x CVE con el esquema de Data.csv (tipos de AnalyticsStore.normalize_dtypes).
+
+    Los textos son categorías construidas desde códigos, así 10M de filas caben en memoria.
+    """
+    rng = SimulationRandom.generator(seed, f"SimulationBenchmark:{rows}")
+    n_tags = int(np.clip(round(rows / profile["rows_per_tag"]), 1, MAX_TAGS))
+    n_cves = max(1, round(rows * profile["cves_per_row"]))
+    n_artifacts = max(2, round(rows * profile["artifacts_per_row"]))
+    repo_root = ThirdPartySimulation.repo_root_from_name(repo_name)
+
+    # Versiones ordenadas por fecha; cada fila cae en una versión al azar
+    tag_days = np.sort(rng.integers(0, RELEASE_SPAN_DAYS, size=n_tags))
+    tag_dates = pd.Timestamp(BENCHMARK_TODAY) - pd.to_timedelta(RELEASE_SPAN_DAYS - tag_days, unit="D")
+    tag_prerelease = (rng.random(n_tags) < profile["prerelease"]).astype(np.int8)
+    tag_codes = rng.integers(0, n_tags, size=rows)
+
+    # Artefactos: una parte lleva el nombre del repo (propios), el resto son de terceros
+    artifact_names = [f"{repo_root}-module-{i}" if i < round(n_artifacts * profile["first_party"]) else f"library-{i}"
+                      for i in range(n_artifacts)]
+    artifact_codes = rng.integers(0, n_artifacts, size=rows)
+    versions_per_artifact = 4
+    version_codes = artifact_codes * versions_per_artifact + rng.integers(0, versions_per_artifact, size=rows)
+    version_labels = [f"{i // versions_per_artifact}.{i % versions_per_artifact}.0" for i in range(n_artifacts * versions_per_artifact)]
+
+    cve_codes = rng.integers(0, n_cves, size=rows)
+    cve_labels = [f"CVE-{2015 + i % 10}-{10000 + i}" for i in range(n_cves)]
+
+    scores = profile["scores"]
+    picks = rng.choice(len(scores), size=rows, p=profile["weights"])
+
+    df = pd.DataFrame({
+        "id": np.ones(rows, dtype=np.int32),
+        "repo_name": _categorical([repo_name], np.zeros(rows, dtype=np.int8)),
+        "tag_name": _categorical([f"v{i // 100}.{i % 100}.0" for i in range(n_tags)], tag_codes),
+        "prerelease": tag_prerelease[tag_codes],
+        "published_at": tag_dates[tag_codes],
+        "cve_id": _categorical(cve_labels, cve_codes),
+        "artifact_name": _categorical(artifact_names, artifact_codes),
+        "artifact_version": _categorical(version_labels, version_codes),
+    })
+    for column in SCORE_COLUMNS:
+        values = scores[column].to_numpy()[picks]
+        if column in AnalyticsStore.NUMERIC_DTYPES:
+            df[column] = values.astype(AnalyticsStore.NUMERIC_DTYPES[column])
+        else:
+            df[column] = pd.Categorical(values)
+    return df[AnalyticsStore.EXPORT_COLUMNS]
+
+def measure(function, repeat=REPEAT):
+    """Mejor tiempo de `repeat` corridas y pico de memoria (tracemalloc) de una corrida aparte.
+
+    El pico se mide aparte porque tracemalloc vuelve lentas las reservas de memoria.
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(times), "mean_seconds": float(np.mean(times)), "peak_bytes": int(peak)}
+
+def run_model(model, features, replications, seed):
+    # El cálculo de cada script sin graficar
+    module = BatchReport.load_script(model)
+    kwargs = {"replications": replications, "seed": seed}
+    if BatchReport.MODELS[model]["dated"]:
+        kwargs["today"] = BENCHMARK_TODAY
+    return module.run(features, SYNTHETIC_REPO, **kwargs)
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=BatchReport.BASE_DIR, check=True).stdout.strip()
+        # Cambios sin commitear: el código medido no es el del commit
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                                    text=True, cwd=BatchReport.BASE_DIR, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+def run_benchmarks(sizes=SIZES, models=None, replications=REPLICATIONS, seed=42, repeat=REPEAT, csv_path="Data.csv"):
+    """Tiempo y memoria de las features y de cada modelo en cada tamaño de la tabla sintética."""
+    models = models or list(BatchReport.MODELS)
+    profile = reference_profile(csv_path)
+    entries = []
+
+    def record(stage, rows, stats):
+        entry = {"stage": stage, "rows": rows, "replications": replications if stage != "features" else None, **stats}
+        entries.append(entry)
+        print(f"{stage:>8} {rows:>10} rows: {stats['seconds']:.3f} s, peak {stats['peak_bytes'] / 2**20:.1f} MiB")
+
+    for rows in sizes:
+        source = synthetic_dataset(rows, profile, seed)
+        record("features", rows, measure(lambda: SimulationFeatures.build_features(source, SYNTHETIC_REPO), repeat))
+        features = SimulationFeatures.build_features(source, SYNTHETIC_REPO)
+        del source
+        for model in models:
+            record(model, rows, measure(lambda: run_model(model, features, replications, seed), repeat))
+        del features
+
+    return {"environment": environment(), "seed": seed, "repeat": repeat, "results": entries}
+
+def entry_key(entry):
+    return entry["stage"], entry["rows"], entry["replications"]
+
+def compare(current, baseline, tolerance=TOLERANCE):
+    """Cociente actual / base de tiempo y memoria para las mediciones presentes en ambas corridas."""
+    base = {entry_key(entry): entry for entry in baseline["results"]}
+    rows = []
+    for entry in current["results"]:
+        reference = base.get(entry_key(entry))
+        if reference is None:
+            continue
+        time_ratio = entry["seconds"] / reference["seconds"] if reference["seconds"] else np.nan
+        memory_ratio = entry["peak_bytes"] / reference["peak_bytes"] if reference["peak_bytes"] else np.nan
+        rows.append({
+            "stage": entry["stage"],
+            "rows": entry["rows"],
+            "replications": entry["replications"],
+            "seconds": entry["seconds"],
+            "baseline_seconds": reference["seconds"],
+            "time_ratio": time_ratio,
+            "memory_ratio": memory_ratio,
+            "regression": bool(time_ratio > 1 + tolerance or memory_ratio > 1 + tolerance),
+        })
+    return pd.DataFrame(rows)
+
+def results_path(env, path=None):
+    # benchmarks/<commit>.json; con el árbol modificado o sin git se agrega la hora para no pisar otra corrida
+    if path is None:
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        if env["commit"] is None:
+            label = timestamp
+        elif env["dirty"]:
+            label = f"{env['commit']}-dirty-{timestamp}"
+        else:
+            label = env["commit"]
+        path = os.path.join(BENCHMARK_DIR, f"{label}.json")
+    return path
+
+def save_results(results, path=None):
+    path = results_path(results["environment"], path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(f"Benchmark results saved to {path}")
+    return path
+
+def load_results(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def main(sizes=SIZES, models=None, replications=REPLICATIONS, seed=42, repeat=REPEAT, csv_path="Data.csv",
+         output=None, baseline=None, tolerance=TOLERANCE):
+    # La base se lee antes de correr y nunca se sobrescribe con la corrida que se compara contra ella
+    reference = load_results(baseline) if baseline is not None else None
+    output = results_path(environment(), output)
+    if baseline is not None and os.path.abspath(output) == os.path.abspath(baseline):
+        raise ValueError(f"Results would overwrite the baseline {baseline}, pass a different output path")
+
+    results = run_benchmarks(sizes, models, replications, seed, repeat, csv_path)
+    save_results(results, output)
+    if baseline is None:
+        return True
+
+    comparison = compare(results, reference, tolerance)
+    if comparison.empty:
+        print(f"No measurements in common with {baseline}")
+        return True
+    print(comparison.to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+    regressions = comparison[comparison["regression"]]
+    print(f"{len(regressions)} regressions over {tolerance:.0%} against {baseline}")
+    return regressions.empty
+
+if __name__ == "__main__":
+    main()
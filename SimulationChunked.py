@@ -0,0 +1,101 @@
+import os
+
+import pyarrow.parquet as pq
+
+import ExposureSimulation
+import IncidentSimulation
+import RiskTransitionSimulation
+import SimulationFeatures
+import SimulationStats
+import ThirdPartySimulation
+
+# Filas por bloque leído de los parquet de features; la memoria depende de esto y no del tamaño de la tabla
+CHUNK_ROWS = 1 << 20
+
+def feature_paths(repos=None, root=SimulationFeatures.FEATURE_ROOT):
+    # (repo, ruta) en orden fijo; el orden define la posición de cada fila y por ende sus valores aleatorios
+    if repos is None:
+        repos = sorted(SimulationFeatures.load_manifest(root)["repos"])
+    elif isinstance(repos, str):
+        repos = [repos]
+    paths = [(repo_name, SimulationFeatures.feature_path(root, repo_name)) for repo_name in repos]
+    missing = [repo_name for repo_name, path in paths if not os.path.exists(path)]
+    if missing:
+        raise FileNotFoundError(f"No features found for {', '.join(missing)}")
+    return paths
+
+def stream_key(paths, repo=None):
+    # Mismo flujo aleatorio que el script de un repo; "fleet" cuando se simulan varios repos juntos
+    if repo is not None:
+        return repo
+    return paths[0][0] if len(paths) == 1 else "fleet"
+
+def iter_feature_chunks(paths, columns, chunk_rows=CHUNK_ROWS):
+    """Bloques (repo, DataFrame) con solo las columnas pedidas, grupo de filas por grupo de filas."""
+    for repo_name, path in paths:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield repo_name, batch.to_pandas()
+
+def tag_keys(repo_name, tags, fleet):
+    # Con varios repos las versiones se distinguen por repo ("v1.0" existe en muchos)
+    tags = tags.astype(str)
+    return (repo_name + "@" + tags) if fleet else tags
+
+def scan_tag_order(paths, chunk_rows=CHUNK_ROWS):
+    """Primera pasada, solo sobre tag_name: versiones en orden de liberación (orden de aparición en cada parquet)."""
+    fleet = len(paths) > 1
+    order = {}
+    for repo_name, chunk in iter_feature_chunks(paths, ["tag_name"], chunk_rows):
+        for key in tag_keys(repo_name, chunk["tag_name"], fleet).unique():
+            order.setdefault(key, len(order))
+    return order
+
+def run_incident(repos=None, replications=1000, seed=42, params=None, repo=None, root=SimulationFeatures.FEATURE_ROOT, chunk_rows=CHUNK_ROWS):
+    paths = feature_paths(repos, root)
+    state = IncidentSimulation.new_state(replications, seed, params, stream_key(paths, repo))
+    for _, chunk in iter_feature_chunks(paths, ["incident_code"], chunk_rows):
+        IncidentSimulation.accumulate(state, chunk["incident_code"].to_numpy())
+    return IncidentSimulation.finalize(state)
+
+def run_exposure(repos=None, replications=1000, seed=42, params=None, repo=None, root=SimulationFeatures.FEATURE_ROOT, chunk_rows=CHUNK_ROWS):
+    paths = feature_paths(repos, root)
+    state = ExposureSimulation.new_state(replications, seed, params, stream_key(paths, repo))
+    for _, chunk in iter_feature_chunks(paths, ["base_score"], chunk_rows):
+        ExposureSimulation.accumulate(state, chunk["base_score"].to_numpy())
+    return ExposureSimulation.finalize(state)
+
+def run_risk(repos=None, replications=1000, seed=42, params=None, repo=None, today=None,
+             root=SimulationFeatures.FEATURE_ROOT, chunk_rows=CHUNK_ROWS):
+    """Conteos por versión y nivel de riesgo sumados sobre las réplicas, más los totales por réplica y nivel.
+
+    tag_totals / replications es el promedio que grafica 5.9.
+    """
+    paths = feature_paths(repos, root)
+    order = scan_tag_order(paths, chunk_rows)
+    fleet = len(paths) > 1
+    state = RiskTransitionSimulation.new_state(len(order), replications, seed, params, stream_key(paths, repo),
+                                               keep_replications=False)
+    for repo_name, chunk in iter_feature_chunks(paths, ["tag_name", "release_date", "risk_code"], chunk_rows):
+        codes = tag_keys(repo_name, chunk["tag_name"], fleet).map(order).to_numpy()
+        RiskTransitionSimulation.accumulate(state, chunk["risk_code"].to_numpy(),
+                                            SimulationFeatures.release_age(chunk, today), codes)
+    return {"tags": list(order), "tag_totals": state["tag_totals"], "level_counts": state["level_counts"]}
+
+def run_third_party(repos=None, replications=1000, seed=42, params=None, repo=None,
+                    root=SimulationFeatures.FEATURE_ROOT, chunk_rows=CHUNK_ROWS):
+    paths = feature_paths(repos, root)
+    fleet = len(paths) > 1
+    inputs_state = ThirdPartySimulation.new_inputs_state()
+    columns = ["tag_name", "release_date", "cve_id", "artifact_name", "is_third_party"]
+    for repo_name, chunk in iter_feature_chunks(paths, columns, chunk_rows):
+        chunk["version"] = tag_keys(repo_name, chunk["tag_name"], fleet)
+        ThirdPartySimulation.accumulate_inputs(inputs_state, chunk)
+    inputs = ThirdPartySimulation.finalize_inputs(inputs_state)
+    return inputs, ThirdPartySimulation.simulate(inputs, replications, seed=seed, params=params, repo=stream_key(paths, repo))
+
+if __name__ == "__main__":
+    # Toda la flota como una sola población
+    SimulationFeatures.refresh_features()
+    summary = SimulationStats.summarize_all(run_incident(replications=1000))
+    for name, metric in summary.items():
+        print(f"{name}: {metric['mean']:.2f} (IC 95%: {metric['ci_low']:.2f} - {metric['ci_high']:.2f})")
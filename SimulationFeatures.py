@@ -0,0 +1,164 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import AnalyticsStore
+import ExposureSimulation
+import IncidentSimulation
+import RiskTransitionSimulation
+import ThirdPartySimulation
+
+FEATURE_ROOT = "features"
+MANIFEST_FILE = "_manifest.json"
+FEATURE_FILE = "features.parquet"
+# Subir este número cuando cambie el cálculo de alguna columna para regenerar todo
+FEATURE_VERSION = 1
+
+SOURCE_COLUMNS = ["tag_name", "published_at", "cve_id", "artifact_name", "artifact_version", "base_score"]
+
+# Columnas de la tabla de features:
+#   risk_code       int8, severidad canónica (criterio de 5.9): 0 = Crítico (>= 9) ... 3 = Bajo (< 4 o nulo)
+#   incident_code   int8, cubeta de 5.7 según IncidentSimulation.SEVERITY_BINS. Sus etiquetas van al revés
+#                   que risk_code (0 = "Critical" para puntuaciones 0 - 4); se guarda aparte para no cambiar
+#                   las probabilidades calibradas del modelo. -1 = puntuación nula o fuera de rango
+#   exposure_band   int8, banda de 8.8: 0 = Bajo/Medio, 1 = Alto, 2 = Crítico
+#   tag_name        categórica ordenada por fecha de liberación
+#   cve_count       int32, CVE de la versión
+#   is_third_party  bool, el artefacto no lleva el nombre del repo
+# La antigüedad de la versión depende del día en que se corre, se calcula desde release_date con release_age.
+
+def tag_fingerprints(source):
+    # Suma de hashes de fila por versión (independiente del orden), igual que CHECKSUM_AGG en AnalyticsStore
+    hashes = pd.util.hash_pandas_object(source[SOURCE_COLUMNS].astype(str), index=False).to_numpy()
+    frame = pd.DataFrame({"tag_name": source["tag_name"].astype(str).to_numpy(), "hash": hashes})
+    grouped = frame.groupby("tag_name")["hash"]
+    sums = grouped.apply(lambda values: int(np.add.reduce(values.to_numpy(), dtype=np.uint64)))
+    return {tag: f"{count}:{total}" for tag, count, total in zip(sums.index, grouped.size(), sums)}
+
+def row_features(source, repo_name):
+    """Features que solo dependen de la fila; es la parte que se evita recalcular en una actualización."""
+    scores = pd.to_numeric(source["base_score"], errors="coerce").to_numpy(dtype=np.float32)
+    artifact_names = source["artifact_name"].astype(str)
+    repo_root = ThirdPartySimulation.repo_root_from_name(repo_name)
+    return pd.DataFrame({
+        "tag_name": source["tag_name"].astype(str).to_numpy(),
+        "release_date": pd.to_datetime(source["published_at"], errors="coerce").to_numpy(),
+        "cve_id": source["cve_id"].astype(str).to_numpy(),
+        "artifact_name": artifact_names.to_numpy(),
+        "artifact_version": source["artifact_version"].astype(str).to_numpy(),
+        "base_score": scores,
+        "risk_code": RiskTransitionSimulation.risk_codes(scores),
+        "incident_code": IncidentSimulation.severity_codes(scores),
+        "exposure_band": ExposureSimulation.score_bands(scores),
+        "is_third_party": ~artifact_names.str.lower().str.contains(repo_root, regex=False).to_numpy(),
+    })
+
+def finalize(features):
+    # Features por versión: orden de liberación y conteo de CVE
+    features = features.sort_values(["release_date", "tag_name"], kind="stable").reset_index(drop=True)
+    tags = features[["tag_name", "release_date"]].drop_duplicates().sort_values("release_date", kind="stable")
+    tag_order = pd.unique(tags["tag_name"].astype(str))
+
+    features["tag_name"] = pd.Categorical(features["tag_name"].astype(str), categories=tag_order, ordered=True)
+    features["cve_count"] = features.groupby("tag_name", observed=True)["cve_id"].transform("size").astype(np.int32)
+    for column in ("cve_id", "artifact_name", "artifact_version"):
+        features[column] = features[column].astype("category")
+    return features
+
+def build_features(source, repo_name):
+    return finalize(row_features(source, repo_name))
+
+def feature_path(root, repo_name):
+    return os.path.join(AnalyticsStore.partition_path(root, repo_name), FEATURE_FILE)
+
+def load_manifest(root=FEATURE_ROOT):
+    path = os.path.join(root, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {"version": FEATURE_VERSION, "repos": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != FEATURE_VERSION:
+        return {"version": FEATURE_VERSION, "repos": {}}
+    return manifest
+
+def save_manifest(manifest, root=FEATURE_ROOT):
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+
+def load_sources(repos=None, store_root=AnalyticsStore.STORE_ROOT, csv_path="Data.csv"):
+    # Filas crudas por repo, desde el almacén de análisis o el CSV exportado
+    if AnalyticsStore.has_partitions(store_root):
+        df = AnalyticsStore.load_releases(repos, root=store_root)
+    else:
+        df = AnalyticsStore.read_export_csv(csv_path)
+        if repos is not None:
+            df = df[df["repo_name"].isin([repos] if isinstance(repos, str) else repos)]
+    return {str(repo_name): part.reset_index(drop=True) for repo_name, part in df.groupby("repo_name", observed=True)}
+
+def refresh_repo(repo_name, source, manifest, root=FEATURE_ROOT):
+    """Actualiza las features de un repo, recalculando solo las versiones nuevas o modificadas.
+
+    Devuelve la cantidad de versiones recalculadas.
+    """
+    current = tag_fingerprints(source)
+    known = manifest["repos"].get(repo_name, {}).get("tags", {})
+    path = feature_path(root, repo_name)
+
+    if known == current and os.path.exists(path):
+        return 0
+
+    changed = {tag for tag, fingerprint in current.items() if known.get(tag) != fingerprint}
+    new_rows = row_features(source[source["tag_name"].astype(str).isin(changed)], repo_name)
+
+    if known and os.path.exists(path):
+        kept = pd.read_parquet(path)
+        kept = kept[~kept["tag_name"].astype(str).isin(changed) & kept["tag_name"].astype(str).isin(current)]
+        for column in ("tag_name", "cve_id", "artifact_name", "artifact_version"):
+            kept[column] = kept[column].astype(str)
+        new_rows = pd.concat([kept.drop(columns=["cve_count"]), new_rows], ignore_index=True)
+
+    features = finalize(new_rows)
+    shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+    os.makedirs(os.path.dirname(path))
+    # Grupos de filas acotados para que SimulationChunked lea la tabla por partes
+    features.to_parquet(path, index=False, compression="zstd", row_group_size=AnalyticsStore.ROW_GROUP_SIZE)
+
+    manifest["repos"][repo_name] = {"tags": current, "rows": len(features)}
+    return len(changed)
+
+def refresh_features(repos=None, root=FEATURE_ROOT, store_root=AnalyticsStore.STORE_ROOT, csv_path="Data.csv"):
+    manifest = load_manifest(root)
+    sources = load_sources(repos, store_root, csv_path)
+    refreshed = {}
+    for repo_name, source in sources.items():
+        tags = refresh_repo(repo_name, source, manifest, root)
+        if tags:
+            refreshed[repo_name] = tags
+            print(f"Features {repo_name}: {tags} releases recomputed, {manifest['repos'][repo_name]['rows']} rows")
+    save_manifest(manifest, root)
+    print(f"Features refreshed: {len(refreshed)} repos updated, {len(sources) - len(refreshed)} unchanged")
+    return refreshed
+
+def load_features(repo_name, root=FEATURE_ROOT, store_root=AnalyticsStore.STORE_ROOT, csv_path="Data.csv", refresh=True):
+    """Tabla de features de un repo, actualizada antes de leerla salvo que refresh=False."""
+    if refresh:
+        refresh_features([repo_name], root, store_root, csv_path)
+    path = feature_path(root, repo_name)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No features found for {repo_name}")
+    return pd.read_parquet(path)
+
+def release_age(features, today=None):
+    # Días desde la liberación de cada fila, NaN si la fecha no es válida
+    today = pd.Timestamp(today) if today is not None else pd.Timestamp.now()
+    return RiskTransitionSimulation.release_age_days(features["release_date"], today)
+
+def tag_codes(features):
+    return features["tag_name"].cat.codes.to_numpy()
+
+if __name__ == "__main__":
+    refresh_features()
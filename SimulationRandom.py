@@ -0,0 +1,119 @@
+import hashlib
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Ramas bajo (modelo, repo): una secuencia hija por réplica, una aparte para los datos sintéticos comunes
+# y un flujo por réplica para los valores por fila, direccionado por posición
+REPLICATION_BRANCH = 0
+SETUP_BRANCH = 1
+ROW_BRANCH = 2
+
+# Mismo factor que Generator.random(): 53 bits -> [0, 1)
+UNIFORM_SCALE = 1.0 / 9007199254740992.0
+MAX_INTEGER_SPAN = 1 << 11
+
+def stable_key(name):
+    # Entero estable entre procesos y ejecuciones (hash() de Python cambia con PYTHONHASHSEED)
+    return int.from_bytes(hashlib.sha256(str(name).encode("utf-8")).digest()[:8], "little")
+
+def model_sequence(seed, model, repo=""):
+    return np.random.SeedSequence(seed, spawn_key=(stable_key(model), stable_key(repo)))
+
+def replication_sequences(seed, model, repo="", replications=1, first_replication=0):
+    """Secuencias de las réplicas [first_replication, first_replication + replications).
+
+    La réplica r recibe la misma secuencia que SeedSequence.spawn(...)[r] del nodo de réplicas,
+    pero se construye directamente para que cada proceso genere solo su rango.
+    """
+    parent = model_sequence(seed, model, repo)
+    key = parent.spawn_key + (REPLICATION_BRANCH,)
+    return [np.random.SeedSequence(parent.entropy, spawn_key=key + (r,))
+            for r in range(first_replication, first_replication + replications)]
+
+def replication_streams(seed, model, repo="", replications=1, first_replication=0):
+    return [np.random.Generator(np.random.PCG64(sequence))
+            for sequence in replication_sequences(seed, model, repo, replications, first_replication)]
+
+def setup_stream(seed, model, repo=""):
+    # Para lo que se sortea una sola vez por ejecución (p. ej. el set de acuerdos de 5.19)
+    parent = model_sequence(seed, model, repo)
+    return np.random.Generator(np.random.PCG64(np.random.SeedSequence(parent.entropy, spawn_key=parent.spawn_key + (SETUP_BRANCH,))))
+
+def generator(seed, name):
+    # Generador independiente para scripts que no tienen réplicas
+    return np.random.Generator(np.random.PCG64(np.random.SeedSequence(seed, spawn_key=(stable_key(name),))))
+
+def row_draws(seed, model, repo, replications, first_replication, offset, count, variables):
+    """Enteros de 53 bits para las filas [offset, offset + count): (réplicas, filas, variables).
+
+    La variable v de la fila i en la réplica r es la salida i * variables + v del flujo por filas de r.
+    Con PCG64.advance cada bloque de filas empieza en su posición, así que partir las filas en
+    bloques de cualquier tamaño da exactamente los mismos valores.
+    """
+    parent = model_sequence(seed, model, repo)
+    out = np.empty((replications, count, variables), dtype=np.uint64)
+    for i, r in enumerate(range(first_replication, first_replication + replications)):
+        bit_generator = np.random.PCG64(np.random.SeedSequence(parent.entropy, spawn_key=parent.spawn_key + (ROW_BRANCH, r)))
+        bit_generator.advance(offset * variables)
+        out[i] = bit_generator.random_raw(count * variables).reshape(count, variables)
+    out >>= np.uint64(11)
+    return out
+
+def to_uniform(k):
+    return k * UNIFORM_SCALE
+
+def to_integers(k, low, high):
+    # Entero en [low, high) sin rechazo: floor(low + u * (high - low)) con aritmética entera exacta
+    span = np.asarray(high, dtype=np.int64) - np.asarray(low, dtype=np.int64)
+    if span.max(initial=0) >= MAX_INTEGER_SPAN:
+        raise ValueError(f"Integer ranges must be narrower than {MAX_INTEGER_SPAN}")
+    return np.asarray(low, dtype=np.int64) + ((k * span.astype(np.uint64)) >> np.uint64(53)).astype(np.int64)
+
+def draw_rows(streams, draw):
+    """Apila una extracción por réplica: fila i = draw(streams[i]).
+
+    Cada réplica consume su propio generador, así que el resultado no depende de cómo se agrupen en bloques.
+    """
+    first = np.asarray(draw(streams[0]))
+    out = np.empty((len(streams),) + first.shape, dtype=first.dtype)
+    out[0] = first
+    for i in range(1, len(streams)):
+        out[i] = draw(streams[i])
+    return out
+
+def replication_ranges(replications, workers):
+    # Rangos contiguos [inicio, fin) de tamaño parecido
+    workers = max(1, min(workers, replications))
+    bounds = np.linspace(0, replications, workers + 1).astype(int)
+    return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+def _run_range(function, start, stop, kwargs):
+    return function(replications=stop - start, first_replication=start, **kwargs)
+
+def run_replications(function, replications, workers=None, per_replication=None, **kwargs):
+    """Reparte las réplicas de `function` (un simulate de los modelos) entre procesos.
+
+    Los resultados se concatenan en orden de réplica y son idénticos a una sola ejecución con todas las réplicas.
+    Para resultados tipo dict, `per_replication` indica las claves a concatenar (por defecto el PER_REPLICATION
+    del módulo de `function`); el resto, común a todas las réplicas, se toma del primer rango.
+    """
+    if per_replication is None:
+        per_replication = getattr(sys.modules.get(getattr(function, "__module__", None)), "PER_REPLICATION", None)
+    ranges = replication_ranges(replications, workers or 1)
+    if len(ranges) == 1:
+        return function(replications=replications, **kwargs)
+
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        parts = list(executor.map(_run_range, [function] * len(ranges), *zip(*ranges), [kwargs] * len(ranges)))
+
+    if not isinstance(parts[0], dict):
+        return np.concatenate(parts)
+    # Adivinar por tipo concatenaría también los arreglos por artefacto o versión
+    if per_replication is None:
+        raise ValueError(f"{getattr(function, '__module__', function)} returns a dict but declares no PER_REPLICATION keys")
+    merged = dict(parts[0])
+    for key in per_replication:
+        merged[key] = np.concatenate([part[key] for part in parts])
+    return merged
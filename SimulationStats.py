@@ -0,0 +1,15 @@
+import numpy as np
+
+def summarize(values, confidence=0.95):
+    # Media e intervalo de confianza por percentiles de la distribución simulada
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        # Todas las réplicas en NaN (p. ej. ningún CVE con puntuación válida): no hay distribución que resumir
+        return {"mean": np.nan, "std": 0.0, "ci_low": np.nan, "ci_high": np.nan}
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(values, [tail, 100 - tail])
+    return {"mean": values.mean(), "std": values.std(ddof=1) if len(values) > 1 else 0.0, "ci_low": low, "ci_high": high}
+
+def summarize_all(results, confidence=0.95):
+    return {name: summarize(values, confidence) for name, values in results.items()}
@@ -0,0 +1,250 @@
+import copy
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import AnalyticsStore
+import ExposureSimulation
+import IncidentSimulation
+import RiskTransitionSimulation
+import SimulationFeatures
+import ThirdPartySimulation
+
+CACHE_DIR = "sweep_cache"
+
+MODELS = {
+    "5.7": IncidentSimulation,
+    "5.9": RiskTransitionSimulation,
+    "5.19": ThirdPartySimulation,
+    "8.8": ExposureSimulation,
+}
+
+# Datasets already loaded and prepared in this process, keyed by (model, dataset)
+_prepared = {}
+
+def dataset_hash(dataset):
+    # CSV path, or a repo name of the analytics store
+    if os.path.isfile(dataset):
+        paths = [dataset]
+    else:
+        partition = AnalyticsStore.partition_path(AnalyticsStore.STORE_ROOT, dataset)
+        paths = sorted(os.path.join(partition, name) for name in os.listdir(partition))
+
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+def load_dataset(dataset):
+    if os.path.isfile(dataset):
+        return AnalyticsStore.read_export_csv(dataset)
+    return AnalyticsStore.load_releases(repos=dataset)
+
+def prepare(model, dataset, today):
+    key = (model, dataset, today)
+    if key in _prepared:
+        return _prepared[key]
+
+    df = load_dataset(dataset)
+    features = SimulationFeatures.build_features(df, str(df["repo_name"].iloc[0]))
+
+    if model == "5.7":
+        prepared = {"codes": features["incident_code"].to_numpy()}
+    elif model == "5.9":
+        prepared = {
+            "risk": features["risk_code"].to_numpy(),
+            "age_days": SimulationFeatures.release_age(features, today),
+            "tag_codes": SimulationFeatures.tag_codes(features),
+            "n_tags": len(features["tag_name"].cat.categories),
+        }
+    elif model == "5.19":
+        prepared = {"inputs": ThirdPartySimulation.prepare_inputs(features.rename(columns={"tag_name": "version"}))}
+    else:
+        prepared = {"scores": features["base_score"].to_numpy()}
+
+    _prepared[key] = prepared
+    return prepared
+
+def run_model(model, prepared, params, replications, seed, repo=""):
+    # Métricas escalares (media de las réplicas) por escenario
+    if model == "5.7":
+        results = IncidentSimulation.simulate(prepared["codes"], replications, seed=seed, params=params, repo=repo)
+        return {name: float(np.nanmean(values)) for name, values in results.items()}
+
+    if model == "5.9":
+        counts = RiskTransitionSimulation.simulate(prepared["risk"], prepared["age_days"], prepared["tag_codes"],
+                                                   prepared["n_tags"], replications, seed=seed, params=params, repo=repo)
+        by_level = counts.sum(axis=1).mean(axis=0)
+        baseline = np.bincount(prepared["risk"], minlength=len(RiskTransitionSimulation.RISK_LEVELS))
+        metrics = {f"share_{level}": float(count / by_level.sum()) for level, count in zip(RiskTransitionSimulation.RISK_LEVELS, by_level)}
+        metrics["mean_risk_shift"] = float((by_level @ np.arange(len(by_level)) - baseline @ np.arange(len(baseline))) / by_level.sum())
+        return metrics
+
+    if model == "5.19":
+        inputs = prepared["inputs"]
+        result = ThirdPartySimulation.simulate(inputs, replications, seed=seed, params=params, repo=repo)
+        reduction = 1 - result["remaining"].sum(axis=1) / inputs["vulnerabilities"].sum()
+        metrics = {f"reduction_{level}": float(reduction[:, i].mean()) for i, level in enumerate(ThirdPartySimulation.SBOM_LEVELS)}
+        metrics["b31_pct_avg"] = float(result["b31_by_half"].mean())
+        return metrics
+
+    results = ExposureSimulation.simulate(prepared["scores"], replications, seed=seed, params=params, repo=repo)
+    return {name: float(np.nanmean(values)) for name, values in results.items()}
+
+def apply_overrides(defaults, flat):
+    """Aplica parámetros con rutas "a.b.0" sobre los DEFAULT_PARAMS anidados del modelo.
+
+    Los valores se convierten al tipo del valor por defecto (p. ej. los rangos de randint siguen siendo enteros).
+    """
+    params = copy.deepcopy(defaults)
+    for path, value in flat.items():
+        keys = [int(key) if key.isdigit() else key for key in path.split(".")]
+        parent = params
+        for key in keys[:-1]:
+            if isinstance(parent[key], tuple):
+                parent[key] = list(parent[key])
+            parent = parent[key]
+        leaf = parent[keys[-1]]
+        parent[keys[-1]] = int(round(value)) if isinstance(leaf, (int, np.integer)) and not isinstance(leaf, bool) else value
+    return params
+
+def grid(space):
+    # {ruta: [valores]} -> producto cartesiano de escenarios
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+def latin_hypercube(bounds, samples, seed=0):
+    # {ruta: (min, max)} -> un valor por estrato en cada dimensión, permutado de forma independiente
+    rng = np.random.default_rng(seed)
+    names = list(bounds)
+    points = (rng.permuted(np.tile(np.arange(samples), (len(names), 1)), axis=1).T + rng.random((samples, len(names)))) / samples
+    low = np.array([bounds[name][0] for name in names], dtype=float)
+    high = np.array([bounds[name][1] for name in names], dtype=float)
+    values = low + points * (high - low)
+    return [dict(zip(names, map(float, row))) for row in values]
+
+def cache_key(model, flat, data_hash, replications, seed, today):
+    payload = json.dumps({"model": model, "params": flat, "dataset": data_hash, "replications": replications,
+                          "seed": seed, "today": today}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def error_text(error):
+    return f"{type(error).__name__}: {error}"
+
+def _run_scenarios(model, dataset, scenarios, replications, seed, today, cache_dir):
+    # Se ejecuta en los procesos del pool: un lote de escenarios sobre el mismo dataset preparado.
+    # Devuelve (clave, métricas, error); un escenario inválido queda con su error y el lote sigue
+    prepared = prepare(model, dataset, today)
+    defaults = MODELS[model].DEFAULT_PARAMS
+    results = []
+    for key, flat in scenarios:
+        try:
+            metrics = run_model(model, prepared, apply_overrides(defaults, flat), replications, seed, repo=dataset)
+        except Exception as e:
+            results.append((key, None, error_text(e)))
+            continue
+        with open(os.path.join(cache_dir, f"{key}.json"), "w", encoding="utf-8") as f:
+            json.dump(metrics, f)
+        results.append((key, metrics, None))
+    return results
+
+def run_sweep(model, dataset, scenarios, replications=200, seed=42, workers=None, cache_dir=CACHE_DIR, today=None, chunk_size=8):
+    """Corre todos los escenarios de un modelo en un pool de procesos.
+
+    Los resultados se guardan por (parámetros, hash del dataset), así que repetir un barrido
+    solo calcula los escenarios nuevos. Devuelve una tabla larga: un registro por escenario y métrica.
+    Un escenario que falla no detiene el barrido: queda como un registro sin métrica con el mensaje
+    en la columna error (y no se guarda, así se vuelve a intentar en el siguiente barrido).
+    """
+    today = str(today or date.today())
+    os.makedirs(cache_dir, exist_ok=True)
+    data_hash = dataset_hash(dataset)
+
+    keys = [cache_key(model, flat, data_hash, replications, seed, today) for flat in scenarios]
+    metrics = {}
+    missing = []
+    for key, flat in zip(keys, scenarios):
+        path = os.path.join(cache_dir, f"{key}.json")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                metrics[key] = json.load(f)
+        elif key not in metrics:
+            missing.append((key, flat))
+
+    print(f"Sweep {model} on {dataset}: {len(scenarios)} scenarios, {len(scenarios) - len(missing)} cached")
+    errors = {}
+    if missing:
+        chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_run_scenarios, model, dataset, chunk, replications, seed, today, cache_dir) for chunk in chunks]
+            for chunk, future in zip(chunks, futures):
+                try:
+                    for key, values, error in future.result():
+                        if error is None:
+                            metrics[key] = values
+                        else:
+                            errors[key] = error
+                except Exception as e:
+                    # Falla común a todo el lote (p. ej. al preparar el dataset)
+                    errors.update((key, error_text(e)) for key, _ in chunk)
+
+    rows = []
+    for scenario, (key, flat) in enumerate(zip(keys, scenarios)):
+        base = {"scenario": scenario, "model": model, "dataset": dataset, **flat}
+        if key in errors:
+            rows.append({**base, "metric": None, "value": np.nan, "error": errors[key]})
+            continue
+        for metric, value in metrics[key].items():
+            rows.append({**base, "metric": metric, "value": value, "error": None})
+
+    if errors:
+        print(f"Sweep {model} on {dataset}: {len(errors)} scenarios failed, first: {next(iter(errors.values()))}")
+    return pd.DataFrame(rows)
+
+def _rank(values):
+    return pd.Series(values).rank().to_numpy()
+
+def sensitivity(results, parameters=None):
+    """Índices de sensibilidad por métrica y parámetro.
+
+    src: coeficiente de regresión estandarizado; spearman: correlación de rangos.
+    """
+    id_columns = {"scenario", "model", "dataset", "metric", "value", "error"}
+    parameters = parameters or [column for column in results.columns if column not in id_columns]
+    rows = []
+    for metric, group in results.groupby("metric"):
+        x = group[parameters].to_numpy(dtype=float)
+        y = group["value"].to_numpy(dtype=float)
+        keep = ~np.isnan(y)
+        x, y = x[keep], y[keep]
+
+        x_std = x.std(axis=0)
+        y_std = y.std()
+        varying = x_std > 0
+        src = np.full(len(parameters), np.nan)
+        if y_std > 0 and varying.any():
+            z = (x[:, varying] - x[:, varying].mean(axis=0)) / x_std[varying]
+            coefficients, *_ = np.linalg.lstsq(np.column_stack([np.ones(len(y)), z]), (y - y.mean()) / y_std, rcond=None)
+            src[varying] = coefficients[1:]
+
+        for i, parameter in enumerate(parameters):
+            spearman = np.corrcoef(_rank(x[:, i]), _rank(y))[0, 1] if varying[i] and y_std > 0 else np.nan
+            rows.append({"metric": metric, "parameter": parameter, "src": src[i], "spearman": spearman})
+    return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    bounds = {
+        "prob_with_sbom.Critical": (0.6, 0.95),
+        "prob_with_sbom.High": (0.4, 0.8),
+        "mean_time_with_sbom.Critical.1": (10, 40),
+    }
+    results = run_sweep("5.7", "tensorflow.csv", latin_hypercube(bounds, 200), replications=200)
+    print(sensitivity(results, list(bounds)))
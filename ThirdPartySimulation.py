@@ -0,0 +1,210 @@
+import numpy as np
+import pandas as pd
+
+import SimulationRandom
+
+MODEL_KEY = "5.19"
+
+SBOM_LEVELS = ['basic', 'mature', 'advanced']
+
+DEFAULT_PARAMS = {
+    # Cantidad de acuerdos: proporción de artefactos de terceros, acotada entre un mínimo y un máximo
+    "agreement_ratio": 0.6,
+    "min_agreements": 12,
+    "max_agreements": 60,
+    # Probabilidades de seleccion de categorias
+    "categories": ["Open Source", "Commercial", "Contractor"],
+    "category_probs": [0.55, 0.30, 0.15],
+    # Requerimientos por acuerdo [min, max) y nivel de cumplimiento por categoria
+    "required_range": (8, 26),
+    "compliance_ranges": {"Commercial": (0.75, 0.95), "Open Source": (0.60, 0.90), "Contractor": (0.65, 0.92)},
+    # Factor de reduccion en base al nivel de madurez del SBOM
+    "reduction_ranges": {'basic': (0.10, 0.20), 'mature': (0.20, 0.30), 'advanced': (0.30, 0.40)},
+    "max_reduction": 0.60,
+}
+
+BLOCK_ELEMENTS = 2_000_000
+
+# Solo `remaining` tiene una fila por réplica; acuerdos y mapeos son comunes a todas
+PER_REPLICATION = ("remaining",)
+
+def repo_root_from_name(repo_name):
+    # "vercel/next.js" -> "next": los artefactos propios del repo contienen este nombre
+    return repo_name.split("/")[-1].split(".")[0].lower()
+
+def new_inputs_state():
+    # Acumuladores por version y pares (semestre, artefacto); no crecen con la cantidad de filas
+    return {"versions": {}, "pairs": set()}
+
+def accumulate_inputs(state, df, repo_root=None):
+    """Suma un bloque de filas con las columnas version, artifact_name, release_date y cve_id.
+
+    Si trae is_third_party (tabla de SimulationFeatures) se usa tal cual; si no, se calcula a partir de `repo_root`.
+    """
+    df = df[df['release_date'].notna()]
+    artifact_names = df['artifact_name'].astype(str)
+    if 'is_third_party' in df.columns:
+        is_third_party = df['is_third_party'].to_numpy(dtype=bool)
+    else:
+        # Todo aquel artefacto diferente al repo se considera como tercero
+        is_third_party = ~artifact_names.str.lower().str.contains(repo_root, regex=False).to_numpy()
+
+    third_party = df[is_third_party]
+    release_date = pd.to_datetime(third_party['release_date'])
+    # Semestre de cada fila como un código entero (year * 2 + 0 para H1, 1 para H2)
+    half_key = (release_date.dt.year * 2 + (release_date.dt.month > 6)).to_numpy()
+    state["pairs"].update(zip(half_key.tolist(), artifact_names[is_third_party].tolist()))
+
+    # Conteo de vulnerabilidades de terceros y fecha de liberación por version
+    grouped = (pd.DataFrame({'version': third_party['version'].astype(str).to_numpy(),
+                             'cve_id': third_party['cve_id'].to_numpy(), 'release_date': release_date.to_numpy()})
+               .groupby('version', sort=False).agg(vulnerabilities=('cve_id', 'count'), release_date=('release_date', 'min')))
+    for version, vulnerabilities, first_date in zip(grouped.index, grouped['vulnerabilities'], grouped['release_date']):
+        known = state["versions"].get(version)
+        if known is None:
+            state["versions"][version] = [int(vulnerabilities), first_date]
+        else:
+            known[0] += int(vulnerabilities)
+            known[1] = min(known[1], first_date)
+    return state
+
+def finalize_inputs(state):
+    """Arreglos enteros por artefacto, semestre y version para el motor."""
+    pairs = sorted(state["pairs"])
+    artifacts = np.array(sorted({artifact for _, artifact in pairs}), dtype=object)
+    halves = np.array(sorted({half for half, _ in pairs}), dtype=np.int64)
+    pair_half = np.searchsorted(halves, np.array([half for half, _ in pairs], dtype=np.int64))
+    pair_artifact = np.searchsorted(artifacts, np.array([artifact for _, artifact in pairs], dtype=object))
+
+    # Versiones ordenadas por fecha de liberación (y nombre si coinciden)
+    versions = sorted(state["versions"].items(), key=lambda item: (item[1][1], item[0]))
+    release_dates = pd.to_datetime(pd.Series([first_date for _, (_, first_date) in versions], dtype="datetime64[ns]"))
+    version_half_key = (release_dates.dt.year * 2 + (release_dates.dt.month > 6)).to_numpy(dtype=np.int64)
+    version_half = np.searchsorted(halves, version_half_key)
+    found = version_half < len(halves)
+    found[found] = halves[version_half[found]] == version_half_key[found]
+
+    return {
+        "artifacts": artifacts,
+        "pair_half": pair_half,
+        "pair_artifact": pair_artifact,
+        "halves": halves,
+        "versions": np.array([version for version, _ in versions], dtype=object),
+        "release_dates": release_dates.to_numpy(),
+        "vulnerabilities": np.array([count for _, (count, _) in versions], dtype=np.int64),
+        # -1 si el semestre de la version no tiene acuerdos activos
+        "version_half": np.where(found, version_half, -1),
+    }
+
+def prepare_inputs(df, repo_root=None):
+    """Convierte el set de CVE en arreglos enteros para el motor.
+
+    `df` necesita las columnas version, artifact_name, release_date y cve_id. SimulationChunked
+    llega al mismo resultado sumando la tabla por bloques.
+    """
+    return finalize_inputs(accumulate_inputs(new_inputs_state(), df, repo_root))
+
+def generate_agreements(n_artifacts, rng, params=None):
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    n_agreements = max(params["min_agreements"], min(params["max_agreements"], int(np.ceil(n_artifacts * params["agreement_ratio"]))))
+
+    categories = np.asarray(params["categories"])
+    category = rng.choice(len(categories), size=n_agreements, p=params["category_probs"])
+    required_total = rng.integers(*params["required_range"], size=n_agreements)
+
+    # Se establecen los niveles de cumplimiento de cada categoria
+    low = np.array([params["compliance_ranges"][name][0] for name in categories])[category]
+    high = np.array([params["compliance_ranges"][name][1] for name in categories])[category]
+    base_rates = rng.uniform(low, high)
+
+    addressed_total = np.minimum(required_total, np.floor(required_total * base_rates)).astype(int)
+    return {
+        "agreement_id": np.array([f"AGR-{i:04d}" for i in range(1, n_agreements + 1)]),
+        "category": categories[category],
+        "required_total": required_total,
+        "addressed_total": addressed_total,
+        # Calculo de la metrica B31.
+        "b31_pct": 100 * addressed_total / required_total,
+    }
+
+def b31_by_version(inputs, agreements, artifact_agreement):
+    # Promedio B.31 semestral de los acuerdos activos (pares semestre x acuerdo sin duplicados)
+    n_agreements = len(agreements["b31_pct"])
+    pairs = np.unique(inputs["pair_half"] * n_agreements + artifact_agreement[inputs["pair_artifact"]])
+    pair_half = pairs // n_agreements
+    totals = np.bincount(pair_half, weights=agreements["b31_pct"][pairs % n_agreements], minlength=len(inputs["halves"]))
+    counts = np.bincount(pair_half, minlength=len(inputs["halves"]))
+    b31_half = totals / counts
+
+    # Semestres sin acuerdos se llenan con el promedio en general
+    version_half = inputs["version_half"]
+    return np.where(version_half >= 0, b31_half[np.maximum(version_half, 0)], b31_half.mean()), b31_half
+
+def reduce_vulnerabilities(vulnerabilities, b31_pct, streams, params=None):
+    """Vulnerabilidades restantes por réplica, version y nivel de SBOM: (réplicas, versiones, niveles).
+
+    `streams` tiene un generador por réplica.
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    vulnerabilities = np.asarray(vulnerabilities, dtype=float)
+    n = len(vulnerabilities)
+    replications = len(streams)
+
+    low = np.array([params["reduction_ranges"][level][0] for level in SBOM_LEVELS])
+    high = np.array([params["reduction_ranges"][level][1] for level in SBOM_LEVELS])
+    # B.31 como multiplicador de efectividad
+    multiplier = (0.5 + np.asarray(b31_pct, dtype=float) / 100)[:, None]
+
+    remaining = np.empty((replications, n, len(SBOM_LEVELS)), dtype=np.int64)
+    block = max(1, BLOCK_ELEMENTS // max(n * len(SBOM_LEVELS), 1))
+    for start in range(0, replications, block):
+        b = min(block, replications - start)
+        draws = SimulationRandom.draw_rows(streams[start:start + b], lambda g: g.uniform(low, high, size=(n, len(SBOM_LEVELS))))
+        reduction = np.minimum(draws * multiplier, params["max_reduction"])
+        remaining[start:start + b] = np.floor(vulnerabilities[:, None] * (1 - reduction))
+    return remaining
+
+def simulate(inputs, replications=1, seed=42, params=None, repo="", first_replication=0):
+    """Acuerdos, B.31 y vulnerabilidades restantes.
+
+    Los acuerdos y su mapeo salen de un flujo común a todas las réplicas, así que son los mismos
+    en cualquier rango de réplicas; solo `remaining` tiene una fila por réplica.
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    rng = SimulationRandom.setup_stream(seed, MODEL_KEY, repo)
+
+    n_artifacts = len(inputs["artifacts"])
+    if n_artifacts == 0:
+        raise ValueError("No third-party artifacts found to simulate agreements.")
+
+    agreements = generate_agreements(n_artifacts, rng, params)
+    # Mapeo de los acuerdos a artefactos de manera aleatoria
+    artifact_agreement = rng.integers(0, len(agreements["b31_pct"]), size=n_artifacts)
+    version_b31, half_b31 = b31_by_version(inputs, agreements, artifact_agreement)
+
+    return {
+        "agreements": agreements,
+        "artifact_agreement": artifact_agreement,
+        "b31_by_half": half_b31,
+        "version_b31": version_b31,
+        "remaining": reduce_vulnerabilities(inputs["vulnerabilities"], version_b31,
+                                            SimulationRandom.replication_streams(seed, MODEL_KEY, repo, replications, first_replication), params),
+    }
+
+def sweep(inputs, param_sets, replications=100, seed=42):
+    """Corre el modelo para cada combinación de parámetros (cantidad de acuerdos, probabilidades...).
+
+    Todos los escenarios usan los mismos flujos aleatorios, así las diferencias se deben a los parámetros.
+    """
+    rows = []
+    total = inputs["vulnerabilities"].sum()
+    for overrides in param_sets:
+        result = simulate(inputs, replications=replications, seed=seed, params=overrides)
+        reduction = 1 - result["remaining"].sum(axis=1) / total
+        row = dict(overrides)
+        row["n_agreements"] = len(result["agreements"]["b31_pct"])
+        row["b31_pct_avg"] = result["b31_by_half"].mean()
+        for i, level in enumerate(SBOM_LEVELS):
+            row[f"reduction_{level}"] = reduction[:, i].mean()
+        rows.append(row)
+    return rows
@@ -0,0 +1,286 @@
+import bisect
+import json
+import re
+from collections import defaultdict
+
+import numpy as np
+
+# Compiles advisory version ranges (GitHub's ">= 1.2.0, < 1.4.3", npm style "||" alternatives and OSV
+# introduced / fixed events) into intervals of comparable version keys, indexed per (ecosystem, package),
+# so components can be checked against every advisory without re-parsing ranges or calling grype.
+
+# Canonical ecosystems are purl types, the same ones ComponentCatalog stores
+ECOSYSTEMS = {
+    "pip": "pypi", "pypi": "pypi", "python": "pypi",
+    "npm": "npm", "javascript": "npm",
+    "maven": "maven", "java-archive": "maven",
+    "nuget": "nuget", "dotnet": "nuget",
+    "rubygems": "gem", "gem": "gem",
+    "composer": "composer", "packagist": "composer", "php-composer": "composer",
+    "go": "golang", "golang": "golang", "go-module": "golang",
+    "rust": "cargo", "crates.io": "cargo", "cargo": "cargo", "rust-crate": "cargo",
+    "erlang": "hex", "hex": "hex",
+    "pub": "pub", "swift": "swift", "actions": "github", "github": "github",
+}
+
+# Rank of version words against the end of the version (0): negative ranks are pre-releases, positive ones post-releases
+QUALIFIERS = {
+    "dev": -6, "snapshot": -5, "alpha": -4, "a": -4, "beta": -3, "b": -3, "milestone": -2, "m": -2,
+    "rc": -1, "cr": -1, "c": -1, "pre": -1, "preview": -1,
+    "": 0, "ga": 0, "final": 0, "release": 0,
+    "post": 1, "rev": 1, "r": 1, "sp": 1, "patch": 1, "pl": 1,
+}
+# Semver ecosystems treat any unknown word as a pre-release; Maven and RubyGems-style versions sort it after the release
+SEMVER_ECOSYSTEMS = {"npm", "cargo", "golang", "nuget", "composer", "pub", "hex", "swift", "github"}
+END = (0, 0, "")
+TOKEN = re.compile(r"\d+|[a-z]+")
+CONSTRAINT = re.compile(r"^\s*(>=|<=|>|<|==|=|!=)?\s*v?([^\s,]+)\s*$")
+
+def canonical_ecosystem(ecosystem):
+    return ECOSYSTEMS.get(str(ecosystem).lower(), str(ecosystem).lower())
+
+def canonical_name(ecosystem, name, purl=None):
+    # Advisories and SBOMs spell package names differently; this is the key both sides are indexed by
+    if ecosystem == "maven" and purl and purl.startswith("pkg:maven/"):
+        # pkg:maven/org.apache.logging.log4j/log4j-core@2.14.1 -> org.apache.logging.log4j:log4j-core
+        path = purl[len("pkg:maven/"):].split("@", 1)[0].split("?", 1)[0]
+        name = path.replace("/", ":", 1) if "/" in path else path
+    if ecosystem == "pypi":
+        # PEP 503 normalization
+        return re.sub(r"[-_.]+", "-", name).lower()
+    if ecosystem == "golang":
+        return name
+    return name.lower()
+
+def version_items(text, unknown):
+    return [(1, int(token), "") if token.isdigit() else (0, QUALIFIERS.get(token, unknown), token) for token in TOKEN.findall(text)]
+
+def version_key(version, ecosystem):
+    """Sortable tuple for a version string: numbers compare numerically, words by QUALIFIERS, with an END item
+    so 1.0 == 1.0.0 > 1.0-rc1 and 1.0-sp1 > 1.0 like the ecosystems' own comparisons."""
+    version = str(version).strip().lower()
+    if version.startswith("v") and version[1:2].isdigit():
+        version = version[1:]
+    # Build metadata / local versions do not take part in the ordering
+    version = version.split("+", 1)[0]
+    epoch = 0
+    if ecosystem == "pypi" and "!" in version:
+        epoch, _, version = version.partition("!")
+        epoch = int(epoch) if epoch.isdigit() else 0
+    unknown = -1 if ecosystem in SEMVER_ECOSYSTEMS else 2
+
+    if ecosystem in SEMVER_ECOSYSTEMS and "-" in version:
+        # Everything after the first hyphen is a pre-release, numeric ones (1.0.0-0.3.7) included;
+        # inside it numeric identifiers sort below words (1.0.0-0.3.7 < 1.0.0-alpha)
+        version, _, prerelease = version.partition("-")
+        prerelease = [(2,) + item[1:] if item[0] == 0 else item for item in version_items(prerelease, unknown)]
+        items = version_items(version, unknown) + [(0, -1, "")] + prerelease
+    else:
+        items = version_items(version, unknown)
+    # 1.0.0 and 1 are the same version: drop zeros that end a run of numbers
+    trimmed = []
+    for item in items + [END]:
+        if item[0] == 0:
+            while trimmed and trimmed[-1] == (1, 0, "") and len(trimmed) > 1:
+                trimmed.pop()
+        trimmed.append(item)
+    return ((1, epoch, ""),) + tuple(trimmed)
+
+class Interval:
+    __slots__ = ("lower", "lower_inclusive", "upper", "upper_inclusive", "advisory", "text")
+
+    def __init__(self, lower, lower_inclusive, upper, upper_inclusive, advisory, text):
+        self.lower = lower
+        self.lower_inclusive = lower_inclusive
+        self.upper = upper
+        self.upper_inclusive = upper_inclusive
+        self.advisory = advisory
+        self.text = text
+
+    def contains(self, key):
+        if self.lower is not None and (key < self.lower or (key == self.lower and not self.lower_inclusive)):
+            return False
+        if self.upper is not None and (key > self.upper or (key == self.upper and not self.upper_inclusive)):
+            return False
+        return True
+
+    def __repr__(self):
+        return f"Interval({self.text!r}, {self.advisory})"
+
+def compile_range(text, ecosystem, advisory=None):
+    """Intervals of a GitHub / npm style range: comma separated constraints, "||" between alternatives.
+
+    A bare version means exactly that version; "!=" is not an interval and is ignored.
+    """
+    intervals = []
+    for alternative in str(text).split("||"):
+        lower, lower_inclusive, upper, upper_inclusive = None, True, None, True
+        constraints = [part for part in re.split(r",|\s+(?=[<>=!])", alternative) if part.strip()]
+        for constraint in constraints:
+            match = CONSTRAINT.match(constraint)
+            if match is None:
+                raise ValueError(f"Cannot parse version constraint {constraint!r} in {text!r}")
+            operator, version = match.group(1) or "=", match.group(2)
+            key = version_key(version, ecosystem)
+            if operator in ("=", "=="):
+                lower, lower_inclusive, upper, upper_inclusive = key, True, key, True
+            elif operator in (">", ">=") and (lower is None or key >= lower):
+                lower, lower_inclusive = key, operator == ">="
+            elif operator in ("<", "<=") and (upper is None or key <= upper):
+                upper, upper_inclusive = key, operator == "<="
+        if constraints:
+            intervals.append(Interval(lower, lower_inclusive, upper, upper_inclusive, advisory, alternative.strip()))
+    return intervals
+
+def compile_osv_ranges(ranges, ecosystem, advisory=None):
+    # OSV "affected[].ranges": introduced opens an interval, fixed / limit close it exclusive, last_affected inclusive
+    intervals = []
+    for entry in ranges:
+        if entry.get("type") == "GIT":
+            continue
+        introduced = None
+        for event in entry.get("events", []):
+            if "introduced" in event:
+                introduced = event["introduced"]
+                continue
+            for name in ("fixed", "last_affected", "limit"):
+                if name in event and introduced is not None:
+                    inclusive = name == "last_affected"
+                    lower = None if introduced == "0" else version_key(introduced, ecosystem)
+                    intervals.append(Interval(lower, True, version_key(event[name], ecosystem), inclusive, advisory,
+                                              f">= {introduced}, {'<=' if inclusive else '<'} {event[name]}"))
+                    introduced = None
+        if introduced is not None:
+            # Introduced and never fixed
+            lower = None if introduced == "0" else version_key(introduced, ecosystem)
+            intervals.append(Interval(lower, True, None, True, advisory, f">= {introduced}"))
+    return intervals
+
+class RangeIndex:
+    """Intervals per (ecosystem, package), sorted by lower bound so a lookup only checks those starting at or below the version."""
+
+    def __init__(self):
+        self.packages = defaultdict(list)
+        self.sorted = True
+
+    def add(self, ecosystem, name, intervals):
+        ecosystem = canonical_ecosystem(ecosystem)
+        self.packages[(ecosystem, canonical_name(ecosystem, name))].extend(intervals)
+        self.sorted = False
+
+    def add_range(self, ecosystem, name, text, advisory=None):
+        ecosystem = canonical_ecosystem(ecosystem)
+        self.add(ecosystem, name, compile_range(text, ecosystem, advisory))
+
+    def freeze(self):
+        # Unbounded lower ends sort first; lowers keeps the bisect keys next to the intervals
+        self.lowers = {}
+        for key, intervals in self.packages.items():
+            intervals.sort(key=lambda interval: () if interval.lower is None else interval.lower)
+            self.lowers[key] = [() if interval.lower is None else interval.lower for interval in intervals]
+        self.sorted = True
+
+    def __len__(self):
+        return sum(len(intervals) for intervals in self.packages.values())
+
+    def lookup(self, ecosystem, name, version, purl=None):
+        """Advisories whose ranges contain name@version."""
+        if not self.sorted:
+            self.freeze()
+        ecosystem = canonical_ecosystem(ecosystem)
+        key = (ecosystem, canonical_name(ecosystem, name, purl))
+        intervals = self.packages.get(key)
+        if not intervals:
+            return []
+        version = version_key(version, ecosystem)
+        stop = bisect.bisect_right(self.lowers[key], version)
+        return sorted({interval.advisory for interval in intervals[:stop] if interval.contains(version)})
+
+    def match(self, components):
+        """Batch lookup: [(position, advisories)] for every affected component.
+
+        components are dicts with ecosystem, name, version and optionally purl (ComponentCatalog.component shape).
+        Each distinct (ecosystem, name, version) is resolved once.
+        """
+        if not self.sorted:
+            self.freeze()
+        cache = {}
+        matches = []
+        for position, component in enumerate(components):
+            ecosystem = canonical_ecosystem(component["ecosystem"])
+            name = canonical_name(ecosystem, component["name"], component.get("purl"))
+            if (ecosystem, name) not in self.packages:
+                continue
+            key = (ecosystem, name, component["version"])
+            if key not in cache:
+                cache[key] = self.lookup(ecosystem, name, component["version"])
+            if cache[key]:
+                matches.append((position, cache[key]))
+        return matches
+
+def from_github_advisories(advisories, index=None):
+    """Index of repository security advisories (GitHubSingleRequest output) keyed by GHSA id."""
+    index = index if index is not None else RangeIndex()
+    unnamed = 0
+    for advisory in advisories:
+        for vulnerability in advisory.get("vulnerabilities") or []:
+            package = vulnerability.get("package") or {}
+            text = vulnerability.get("vulnerable_version_range")
+            # Crawls made before the package name was kept only have the ecosystem string
+            if not isinstance(package, dict) or not package.get("name"):
+                unnamed += 1
+                continue
+            if not text:
+                continue
+            try:
+                index.add_range(package.get("ecosystem", ""), package["name"], text, advisory.get("ghsa_id"))
+            except ValueError as e:
+                print(f"Skipping range of {advisory.get('ghsa_id')}: {e}")
+    if unnamed:
+        print(f"Skipped {unnamed} vulnerable packages without a package name; re-crawl the advisories to index them")
+    return index
+
+def from_osv(entries, index=None):
+    index = index if index is not None else RangeIndex()
+    for entry in entries:
+        for affected in entry.get("affected", []):
+            package = affected.get("package", {})
+            ecosystem = canonical_ecosystem(package.get("ecosystem", ""))
+            intervals = compile_osv_ranges(affected.get("ranges", []), ecosystem, entry.get("id"))
+            intervals += [Interval(key, True, key, True, entry.get("id"), f"= {version}")
+                          for version in affected.get("versions", []) for key in [version_key(version, ecosystem)]]
+            index.add(ecosystem, package.get("name", ""), intervals)
+    return index
+
+def load_advisories(json_file="security_advisories.json"):
+    # The crawl output is {repo: [advisories]}
+    with open(json_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    index = RangeIndex()
+    for advisories in (data.values() if isinstance(data, dict) else [data]):
+        from_github_advisories(advisories, index)
+    index.freeze()
+    return index
+
+def match_releases(repo_full_name, index, root=None):
+    """{tag: {advisory: [component ids]}} for every stored release of the repo.
+
+    The catalog's components are matched once, then each release keeps the matches its id array contains.
+    """
+    import ArtifactStore
+    import ComponentCatalog
+
+    root = root or ArtifactStore.ARTIFACT_ROOT
+    catalog = ComponentCatalog.load_catalog(root)
+    components = [catalog.component(i) for i in range(len(catalog))]
+    affected = {}
+    for position, advisories in index.match(components):
+        for advisory in advisories:
+            affected.setdefault(advisory, []).append(position)
+    affected = {advisory: np.array(ids, dtype=ComponentCatalog.ID_TYPE) for advisory, ids in affected.items()}
+
+    results = {}
+    for tag, ids in ComponentCatalog.load_sets(repo_full_name, root).items():
+        found = {advisory: np.intersect1d(ids, matched, assume_unique=True).tolist() for advisory, matched in affected.items()}
+        results[tag] = {advisory: hits for advisory, hits in found.items() if hits}
+    return results
@@ -0,0 +1,71 @@
+import sqlite3
+import zlib
+
+import pytest
+
+import AnalyticsStore
+
+
+class ChecksumAgg:
+    def __init__(self):
+        self.value = 0
+
+    def step(self, value):
+        self.value ^= value
+
+    def finalize(self):
+        return self.value
+
+
+def baseline_database():
+    # The baseline tables only: no Repositories table and no row_hash columns.
+    # SQL Server's BINARY_CHECKSUM / CHECKSUM_AGG are registered as sqlite functions
+    conn = sqlite3.connect(":memory:")
+    conn.create_function("BINARY_CHECKSUM", -1, lambda *values: zlib.crc32(repr(values).encode()))
+    conn.create_aggregate("CHECKSUM_AGG", 1, ChecksumAgg)
+    conn.executescript("""
+        CREATE TABLE Repo_Releases (repo_id INT, tag_name TEXT, tarball_url TEXT, prerelease INT, published_at TEXT);
+        CREATE TABLE CVE_Mapping (repo_id INT, tag_name TEXT, cve_id TEXT, artifact_name TEXT, artifact_version TEXT);
+        CREATE TABLE CVE_History (cve_id TEXT, published_date TEXT, last_modified_date TEXT, cwe_id TEXT, severity TEXT,
+                                  cvss_version TEXT, vector_string TEXT, base_score REAL, impact_score REAL,
+                                  exploitability_score REAL);
+        INSERT INTO Repo_Releases VALUES (1, 'v1', '', 0, '2024-01-01 00:00:00'), (1, 'v2', '', 0, '2024-02-01 00:00:00'),
+                                         (1, 'v3', '', 0, '2024-03-01 00:00:00');
+        INSERT INTO CVE_Mapping VALUES (1, 'v1', 'CVE-1', 'lib', '1.0'), (1, 'v3', 'CVE-1', 'lib', '1.0');
+        INSERT INTO CVE_History VALUES ('CVE-1', NULL, NULL, NULL, 'HIGH', '3.1', 'N/A', 7.5, 3.6, 3.9);
+    """)
+    return conn
+
+
+@pytest.fixture(autouse=True)
+def sqlite_dialect(monkeypatch):
+    # ISNULL is an operator in sqlite, IFNULL is the same function
+    monkeypatch.setattr(AnalyticsStore, "EXPORT_QUERY", AnalyticsStore.EXPORT_QUERY.replace("ISNULL(", "IFNULL("))
+
+
+def test_refresh_on_baseline_schema(tmp_path):
+    root = str(tmp_path / "analytics")
+    conn = baseline_database()
+
+    assert AnalyticsStore.refresh_from_database(conn, root, names={1: "owner/repo"}) == ["owner/repo"]
+    df = AnalyticsStore.load_releases("owner/repo", root=root)
+    assert sorted(df["tag_name"].astype(str)) == ["v1", "v3"]
+    assert set(df["severity"].astype(str)) == {"HIGH"}
+    # Nothing changed: nothing re-exported
+    assert AnalyticsStore.refresh_from_database(conn, root, names={1: "owner/repo"}) == []
+
+    conn.execute("UPDATE CVE_History SET base_score = 9.8")
+    assert AnalyticsStore.refresh_from_database(conn, root, names={1: "owner/repo"}) == ["owner/repo"]
+
+
+def test_unknown_repo_ids_get_a_placeholder_name(tmp_path):
+    root = str(tmp_path / "analytics")
+    assert AnalyticsStore.refresh_from_database(baseline_database(), root, names={}) == ["repo_1"]
+
+
+def test_repo_names_from_export(tmp_path):
+    path = tmp_path / "export.csv"
+    path.write_text("\ufeffid,repo_name,tag_name\n1,tensorflow/tensorflow,v1\n1,tensorflow/tensorflow,v2\n2,angular/angular,v1\n",
+                    encoding="utf-8")
+    assert AnalyticsStore.repo_names(str(path)) == {1: "tensorflow/tensorflow", 2: "angular/angular"}
+    assert AnalyticsStore.repo_names(str(tmp_path / "missing.csv")) == {}
@@ -0,0 +1,20 @@
+import pytest
+
+import ArtifactStore
+
+
+def test_find_one_repo_refuses_several_repos(tmp_path):
+    root = str(tmp_path)
+    ArtifactStore.put("owner/a", "v1", "cve_analysis", [], root)
+    ArtifactStore.put("owner/b", "v1", "cve_analysis", [], root)
+
+    with pytest.raises(ValueError, match="2 repos"):
+        ArtifactStore.find_one_repo("cve_analysis", root=root)
+    assert [(repo, tag) for repo, tag, _ in ArtifactStore.find_one_repo("cve_analysis", "owner/b", root)] == [("owner/b", "v1")]
+
+
+def test_put_and_get_round_trip(tmp_path):
+    root = str(tmp_path)
+    ArtifactStore.put("owner/a", None, "releases", [{"tag_name": "v1"}], root)
+    assert ArtifactStore.get("owner/a", None, "releases", root) == [{"tag_name": "v1"}]
+    assert ArtifactStore.find("releases", root=root)[0][:2] == ("owner/a", None)
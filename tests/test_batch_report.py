@@ -0,0 +1,32 @@
+import shutil
+
+import pytest
+
+import BatchReport
+
+
+@pytest.fixture
+def code_dir(tmp_path, monkeypatch):
+    # Copy of the scripts and modules the report key covers, so they can be edited
+    for model in BatchReport.MODELS.values():
+        for name in (model["script"], model["engine"]):
+            shutil.copy(f"{BatchReport.BASE_DIR}/{name}", tmp_path / name)
+    for name in BatchReport.SHARED_MODULES:
+        shutil.copy(f"{BatchReport.BASE_DIR}/{name}", tmp_path / name)
+    monkeypatch.setattr(BatchReport, "BASE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.parametrize("name", ["IncidentSimulation.py", "SimulationRandom.py", "SimulationFeatures.py", "Simulation5.7.py"])
+def test_report_key_follows_the_code(code_dir, name):
+    before = BatchReport.report_key("5.7", "data", 100, 42, "2024-01-01")
+    with open(code_dir / name, "a", encoding="utf-8") as f:
+        f.write("\n# changed\n")
+    assert BatchReport.report_key("5.7", "data", 100, 42, "2024-01-01") != before
+
+
+def test_other_engines_do_not_invalidate(code_dir):
+    before = BatchReport.report_key("5.7", "data", 100, 42, "2024-01-01")
+    with open(code_dir / "ExposureSimulation.py", "a", encoding="utf-8") as f:
+        f.write("\n# changed\n")
+    assert BatchReport.report_key("5.7", "data", 100, 42, "2024-01-01") == before
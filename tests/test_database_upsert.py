@@ -0,0 +1,76 @@
+import sqlite3
+
+import pytest
+
+import DatabaseUpsert
+
+KEYS = ("cve_id",)
+VALUES = ("severity",)
+
+
+class Cursor:
+    # sqlite3 cursors do not take pyodbc's fast_executemany attribute
+    def __init__(self, conn):
+        self.cursor = conn.cursor()
+
+    def execute(self, query, params=()):
+        return self.cursor.execute(query, params)
+
+    def executemany(self, query, rows):
+        return self.cursor.executemany(query, rows)
+
+
+class FailingCursor(Cursor):
+    # Raises on the write, like a dropped connection or a constraint violation
+    def executemany(self, query, rows):
+        raise sqlite3.OperationalError("connection lost")
+
+
+def database():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE CVE_History (cve_id TEXT, severity TEXT, row_hash TEXT)")
+    return conn
+
+
+def stored(conn):
+    return conn.execute("SELECT cve_id, severity FROM CVE_History ORDER BY cve_id").fetchall()
+
+
+def test_failed_batch_leaves_the_cache_untouched():
+    conn = database()
+    existing = {}
+    with pytest.raises(sqlite3.OperationalError):
+        DatabaseUpsert.upsert_rows(conn, FailingCursor(conn), "CVE_History", KEYS, VALUES, [("CVE-1", "HIGH")], existing)
+    conn.rollback()
+    assert existing == {}
+
+    # The retry still inserts the row instead of taking it as unchanged
+    stats = DatabaseUpsert.upsert_rows(conn, Cursor(conn), "CVE_History", KEYS, VALUES, [("CVE-1", "HIGH")], existing)
+    assert stats == {"inserted": 1, "updated": 0, "unchanged": 0}
+    assert stored(conn) == [("CVE-1", "HIGH")]
+    assert set(existing) == {("CVE-1",)}
+
+
+def test_uncommitted_batches_go_to_pending():
+    conn = database()
+    existing, pending = {}, {}
+    cursor = Cursor(conn)
+    DatabaseUpsert.upsert_rows(conn, cursor, "CVE_History", KEYS, VALUES, [("CVE-1", "HIGH")], existing, commit=False, pending=pending)
+    # A later batch of the same transaction sees the row as written
+    stats = DatabaseUpsert.upsert_rows(conn, cursor, "CVE_History", KEYS, VALUES, [("CVE-1", "LOW"), ("CVE-2", "LOW")], existing,
+                                       commit=False, pending=pending)
+    assert stats == {"inserted": 1, "updated": 1, "unchanged": 0}
+    assert existing == {} and set(pending) == {("CVE-1",), ("CVE-2",)}
+
+    conn.commit()
+    existing.update(pending)
+    stats = DatabaseUpsert.upsert_rows(conn, cursor, "CVE_History", KEYS, VALUES, [("CVE-1", "LOW"), ("CVE-2", "LOW")], existing)
+    assert stats == {"inserted": 0, "updated": 0, "unchanged": 2}
+    assert stored(conn) == [("CVE-1", "LOW"), ("CVE-2", "LOW")]
+
+
+def test_duplicate_keys_in_one_batch_are_inserted_once():
+    conn = database()
+    stats = DatabaseUpsert.upsert_rows(conn, Cursor(conn), "CVE_History", KEYS, VALUES, [("CVE-1", "HIGH"), ("CVE-1", "HIGH")], {})
+    assert stats == {"inserted": 1, "updated": 0, "unchanged": 1}
+    assert stored(conn) == [("CVE-1", "HIGH")]
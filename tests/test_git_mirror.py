@@ -0,0 +1,43 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import GitMirror
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    source = tmp_path / "source"
+    source.mkdir()
+    run = lambda *args: subprocess.run(["git", *args], cwd=source, check=True, capture_output=True)
+    run("init", "--quiet")
+    (source / "requirements.txt").write_text("requests==2.31.0\n")
+    run("add", ".")
+    run("-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "--quiet", "-m", "release")
+    run("tag", "v1.0.0")
+    root = str(tmp_path / "mirrors")
+    GitMirror.ensure_mirror("owner/repo", root, url=str(source))
+    return root
+
+
+def test_worktree_can_be_added_again_after_removal(mirror, tmp_path):
+    dest = str(tmp_path / "v1.0.0")
+    for _ in range(2):
+        GitMirror.materialize_release("owner/repo", "v1.0.0", dest, method="worktree", root=mirror, refresh=False)
+        assert os.path.exists(os.path.join(dest, "requirements.txt"))
+        GitMirror.remove_release("owner/repo", dest, mirror)
+        assert not os.path.exists(dest)
+
+
+def test_worktree_deleted_by_hand_is_pruned(mirror, tmp_path):
+    dest = str(tmp_path / "v1.0.0")
+    GitMirror.materialize_release("owner/repo", "v1.0.0", dest, method="worktree", root=mirror, refresh=False)
+    shutil.rmtree(dest)
+
+    GitMirror.remove_release("owner/repo", dest, mirror)
+    GitMirror.materialize_release("owner/repo", "v1.0.0", dest, method="worktree", root=mirror, refresh=False)
+    assert os.path.exists(os.path.join(dest, "requirements.txt"))
@@ -0,0 +1,34 @@
+import pytest
+import requests
+
+import GitHubStandIn
+
+
+@pytest.fixture
+def server():
+    fixtures = {
+        "search": [],
+        "repos": {
+            "owner/repo": {
+                "default_branch": "master",
+                "releases": GitHubStandIn.releases_for([{"tag_name": "v1.0.0", "prerelease": False,
+                                                         "published_at": "2024-01-01T00:00:00Z"}], "owner/repo"),
+                "commits": [],
+                "advisories": [],
+            },
+        },
+    }
+    server = GitHubStandIn.start_server(fixtures, tarball_size=4096)
+    yield server
+    GitHubStandIn.stop_server(server)
+
+
+def test_served_releases_download_from_the_stand_in(server):
+    releases = requests.get(f"{server.url}/repos/owner/repo/releases", timeout=10).json()
+    assert releases[0]["tarball_url"] == f"{server.url}/repos/owner/repo/tarball/v1.0.0"
+
+    response = requests.get(releases[0]["tarball_url"], headers={"Range": "bytes=100-199"}, timeout=10)
+    assert response.status_code == 206
+    assert response.content == GitHubStandIn.tarball_bytes("owner/repo", "v1.0.0", 4096)[100:200]
+    # The fixture itself is left untouched
+    assert server.fixtures["repos"]["owner/repo"]["releases"][0]["tarball_url"].startswith("https://api.github.com/")
@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+
+import AnalyticsStore
+import ArtifactStore
+import CVELifecycleIndex
+import SBOMCli
+
+
+def export_rows(rows):
+    # Releases x CVE rows as EXPORT_QUERY returns them: clean releases have no row at all
+    columns = {name: [] for name in AnalyticsStore.EXPORT_COLUMNS}
+    for tag, published, cve_id in rows:
+        values = dict(id=1, repo_name="owner/repo", tag_name=tag, prerelease=0, published_at=published, cve_id=cve_id,
+                      artifact_name="lib", artifact_version="1.0", severity="HIGH", cvss_version="3.1",
+                      vector_string="N/A", base_score=7.5, impact_score=3.6, exploitability_score=3.9)
+        for name in columns:
+            columns[name].append(values[name])
+    return pd.DataFrame(columns)
+
+
+RELEASES = [
+    {"tag_name": "v1", "published_at": "2024-01-01T00:00:00Z"},
+    {"tag_name": "v2", "published_at": "2024-02-01T00:00:00Z"},
+    {"tag_name": "v3", "published_at": "2024-03-01T00:00:00Z"},
+    {"tag_name": "v4", "published_at": "2024-04-01T00:00:00Z"},
+]
+ROWS = [("v1", "2024-01-01", "CVE-1"), ("v3", "2024-03-01", "CVE-1")]
+
+
+def test_clean_release_splits_the_interval(tmp_path):
+    root = str(tmp_path / "analytics")
+    releases = pd.DataFrame(RELEASES[:3])
+    AnalyticsStore.write_partitions(export_rows(ROWS), root, releases={"owner/repo": releases})
+
+    index = CVELifecycleIndex.load_index("owner/repo", root)
+    assert index.tags == ["v1", "v2", "v3"]
+    assert index.open_at("v2") == []
+    assert index.releases_affected("CVE-1") == ["v1", "v3"]
+    window = index.exposure_window("CVE-1", now="2024-03-11")
+    assert window["reintroduced"] == 1 and window["open"]
+    # January plus the ten days since v3
+    assert window["days_exposed"] == 31 + 10
+
+
+def test_release_list_comes_from_the_artifact_store(tmp_path):
+    root, artifacts = str(tmp_path / "analytics"), str(tmp_path / "artifacts")
+    ArtifactStore.put("owner/repo", None, "releases", RELEASES, artifacts)
+    AnalyticsStore.write_partitions(export_rows(ROWS), root, artifacts=artifacts)
+
+    window = CVELifecycleIndex.load_index("owner/repo", root).exposure_window("CVE-1")
+    assert window["fixed_in"] == "v4"
+    assert window["reintroduced"] == 1
+
+    AnalyticsStore.rebuild_lifecycle(root=root, artifacts=artifacts)
+    assert CVELifecycleIndex.load_index("owner/repo", root).open_counts() == {"v1": 1, "v2": 0, "v3": 1, "v4": 0}
+
+
+def test_without_release_list_only_exported_releases_are_known():
+    df = export_rows(ROWS)
+    _, order, _ = CVELifecycleIndex.build_intervals(df)
+    assert order == ["v1", "v3"]
+
+
+@pytest.mark.parametrize("argv, message", [
+    (["lifecycle", "affected", "--cve", "CVE-1"], "requires --repo"),
+    (["lifecycle", "affected", "--repo", "owner/repo"], "requires --cve"),
+    (["lifecycle", "window", "--repo", "owner/repo"], "requires --cve"),
+    (["lifecycle", "open", "--repo", "owner/repo"], "requires --tag"),
+])
+def test_lifecycle_cli_reports_missing_options(argv, message, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        SBOMCli.main(argv)
+    assert exit_info.value.code == 2
+    assert message in capsys.readouterr().err
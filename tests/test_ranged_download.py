@@ -0,0 +1,45 @@
+import hashlib
+
+import pytest
+
+import GitHubStandIn
+import RangedDownload
+
+SIZE = 64 * 1024
+
+
+@pytest.fixture
+def server():
+    fixtures = {"search": [], "repos": {"owner/repo": {"default_branch": "master", "releases": [], "commits": [], "advisories": []}}}
+    # Every response is cut after 5000 bytes, so each segment needs several resumed requests
+    server = GitHubStandIn.start_server(fixtures, tarball_size=SIZE, drop_after=5000)
+    yield server
+    GitHubStandIn.stop_server(server)
+
+
+def test_sidecar_only_claims_bytes_on_disk(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(RangedDownload, "CHUNK_SIZE", 1024)
+    monkeypatch.setattr(RangedDownload, "WRITE_BUFFER", 4096)
+    split_segments = RangedDownload.split_segments
+    monkeypatch.setattr(RangedDownload, "split_segments", lambda size, workers: split_segments(size, workers, 8192))
+    monkeypatch.setattr(RangedDownload, "STATE_INTERVAL", 0)
+    monkeypatch.setattr(RangedDownload, "RETRY_DELAY", 0)
+    monkeypatch.setattr(RangedDownload, "RETRIES", 50)
+    expected = GitHubStandIn.tarball_bytes("owner/repo", "v1.0.0", SIZE)
+    dest = str(tmp_path / "repo.tar.gz")
+
+    save_state = RangedDownload.save_state
+    def checked_save_state(path, state):
+        with open(RangedDownload.part_path(path), "rb") as f:
+            content = f.read()
+        for start, _, done in state["segments"]:
+            assert content[start:start + done] == expected[start:start + done]
+        save_state(path, state)
+    monkeypatch.setattr(RangedDownload, "save_state", checked_save_state)
+
+    stats = RangedDownload.download(f"{server.url}/repos/owner/repo/tarball/v1.0.0", dest, workers=4)
+
+    assert stats["segments"] == 4
+    assert stats["sha256"] == hashlib.sha256(expected).hexdigest()
+    with open(dest, "rb") as f:
+        assert f.read() == expected
@@ -0,0 +1,23 @@
+import RequestTelemetry
+
+
+def test_endpoint_template_collapses_tags_and_codeload_refs():
+    assert RequestTelemetry.endpoint_template("https://api.github.com/repos/a/b/releases/tags/v1.2") == \
+        ("/repos/{owner}/{repo}/releases/tags/{tag}", "a/b")
+    assert RequestTelemetry.endpoint_template("https://api.github.com/repos/a/b/releases/123") == \
+        ("/repos/{owner}/{repo}/releases/{release_id}", "a/b")
+    assert RequestTelemetry.endpoint_template("https://codeload.github.com/a/b/legacy.tar.gz/refs/tags/v1.2") == \
+        ("/{owner}/{repo}/legacy.tar.gz/{ref}", "a/b")
+    assert RequestTelemetry.host_source("https://codeload.github.com/a/b/legacy.tar.gz/v1", "github") == "codeload"
+    assert RequestTelemetry.host_source("https://api.github.com/repos/a/b/tarball/v1", "github") == "github"
+
+
+def test_only_misses_count_against_the_budget():
+    telemetry = RequestTelemetry.Telemetry()
+    url = "https://api.github.com/repos/a/b/releases"
+    for status, cache in ((200, "miss"), (200, "hit"), (304, "revalidated")):
+        telemetry.record_request("github", "GET", url, status, 0.1, 0, cache, None)
+
+    snapshot = telemetry.snapshot()
+    assert snapshot["budget"] == [{"source": "github", "repo": "a/b", "endpoint": "/repos/{owner}/{repo}/releases", "requests": 1}]
+    assert snapshot["endpoints"][0]["requests"] == 3
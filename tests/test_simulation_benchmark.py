@@ -0,0 +1,22 @@
+import json
+
+import pytest
+
+import SimulationBenchmark
+
+
+def test_results_path_marks_a_dirty_tree():
+    assert SimulationBenchmark.results_path({"commit": "abc1234", "dirty": False}).endswith("abc1234.json")
+    assert "abc1234-dirty-" in SimulationBenchmark.results_path({"commit": "abc1234", "dirty": True})
+    assert SimulationBenchmark.results_path({"commit": "abc1234", "dirty": False}, "out.json") == "out.json"
+
+
+def test_main_never_overwrites_the_baseline(tmp_path, monkeypatch):
+    baseline = tmp_path / "base.json"
+    content = {"environment": {}, "results": [{"stage": "5.7", "rows": 10, "replications": 1, "seconds": 1e-9, "peak_bytes": 1}]}
+    baseline.write_text(json.dumps(content))
+    monkeypatch.setattr(SimulationBenchmark, "run_benchmarks", lambda *args, **kwargs: pytest.fail("benchmarks should not run"))
+
+    with pytest.raises(ValueError):
+        SimulationBenchmark.main(output=str(baseline), baseline=str(baseline))
+    assert json.loads(baseline.read_text()) == content
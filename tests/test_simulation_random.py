@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import ExposureSimulation
+import IncidentSimulation
+import RiskTransitionSimulation
+import SimulationRandom
+import ThirdPartySimulation
+
+REPLICATIONS = 7
+
+
+def scores(rows=300, seed=0):
+    rng = np.random.default_rng(seed)
+    base_score = np.round(rng.uniform(0, 10, rows), 1)
+    base_score[::17] = np.nan
+    return base_score
+
+
+def third_party_inputs(rows=300, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "version": rng.choice([f"v{i}" for i in range(12)], rows),
+        "artifact_name": rng.choice(["next-core", "lodash", "react", "webpack", "babel", "tslib", "zod"], rows),
+        "release_date": pd.to_datetime("2021-01-01") + pd.to_timedelta(rng.integers(0, 1000, rows), unit="D"),
+        "cve_id": [f"CVE-{i}" for i in range(rows)],
+    })
+    return ThirdPartySimulation.prepare_inputs(df, repo_root="next")
+
+
+def engines():
+    base_score = scores()
+    risk = RiskTransitionSimulation.risk_codes(base_score)
+    tag_codes = np.random.default_rng(1).integers(-1, 5, len(base_score))
+    age_days = np.random.default_rng(2).uniform(0, 1500, len(base_score))
+    return {
+        "incident": (IncidentSimulation.simulate, {"codes": IncidentSimulation.severity_codes(base_score)}),
+        "risk": (RiskTransitionSimulation.simulate, {"risk": risk, "age_days": age_days, "tag_codes": tag_codes, "n_tags": 5}),
+        "exposure": (ExposureSimulation.simulate, {"base_score": base_score}),
+        "third_party": (ThirdPartySimulation.simulate, {"inputs": third_party_inputs()}),
+    }
+
+
+def assert_same(a, b):
+    if isinstance(a, dict):
+        assert a.keys() == b.keys()
+        for key in a:
+            assert_same(a[key], b[key])
+    else:
+        np.testing.assert_array_equal(np.asarray(a), np.asarray(b))
+
+
+@pytest.mark.parametrize("engine", ["incident", "risk", "exposure", "third_party"])
+def test_split_replications_match_a_single_run(engine):
+    function, kwargs = engines()[engine]
+    single = function(replications=REPLICATIONS, seed=42, repo="owner/repo", **kwargs)
+    split = SimulationRandom.run_replications(function, REPLICATIONS, workers=3, seed=42, repo="owner/repo", **kwargs)
+    assert_same(single, split)
+
+
+def test_third_party_per_dataset_arrays_are_not_duplicated():
+    function, kwargs = engines()["third_party"]
+    split = SimulationRandom.run_replications(function, REPLICATIONS, workers=3, seed=42, **kwargs)
+    assert len(split["remaining"]) == REPLICATIONS
+    assert len(split["artifact_agreement"]) == len(kwargs["inputs"]["artifacts"])
+
+
+def test_dict_results_need_declared_keys():
+    with pytest.raises(ValueError, match="PER_REPLICATION"):
+        SimulationRandom.run_replications(undeclared, 4, workers=2)
+
+
+def undeclared(replications=1, first_replication=0):
+    return {"values": np.arange(first_replication, first_replication + replications)}
@@ -0,0 +1,17 @@
+import numpy as np
+
+import SimulationStats
+
+
+def test_summarize_ignores_nan_replications():
+    summary = SimulationStats.summarize([1.0, np.nan, 3.0])
+    assert summary["mean"] == 2.0
+    assert summary["ci_low"] < summary["ci_high"]
+
+
+def test_summarize_all_nan_returns_nan():
+    summary = SimulationStats.summarize_all({"metric": np.full(5, np.nan), "empty": []})
+    for name in ("metric", "empty"):
+        assert np.isnan(summary[name]["mean"])
+        assert np.isnan(summary[name]["ci_low"]) and np.isnan(summary[name]["ci_high"])
+        assert summary[name]["std"] == 0.0
@@ -0,0 +1,29 @@
+import os
+
+import numpy as np
+
+import SimulationSweep
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tensorflow.csv")
+
+
+def test_invalid_scenario_does_not_abort_the_sweep(tmp_path):
+    scenarios = [
+        {"affected_with_sbom.0.1": 3},
+        # No such parameter
+        {"affected_with_sbom.9.1": 3},
+        {"affected_with_sbom.0.1": 4},
+    ]
+    results = SimulationSweep.run_sweep("8.8", DATASET, scenarios, replications=5, workers=1, cache_dir=str(tmp_path),
+                                        today="2024-01-01", chunk_size=3)
+
+    failed = results[results["error"].notna()]
+    assert failed["scenario"].tolist() == [1]
+    assert failed["error"].iloc[0].startswith("IndexError")
+    assert np.isnan(failed["value"].iloc[0])
+    assert set(results.loc[results["error"].isna(), "scenario"]) == {0, 2}
+    # Only the scenarios that ran are cached
+    assert len(os.listdir(tmp_path)) == 2
+
+    sensitivity = SimulationSweep.sensitivity(results, ["affected_with_sbom.0.1"])
+    assert "error" not in set(sensitivity["parameter"])
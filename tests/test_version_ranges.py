@@ -0,0 +1,78 @@
+import json
+
+import VersionRanges
+from VersionRanges import version_key
+
+
+def crawled(package):
+    # One advisory as GitHubSingleRequest / GitHubRequest write it
+    return {
+        "ghsa_id": "GHSA-aaaa-bbbb-cccc",
+        "vulnerabilities": [
+            {"package": package, "vulnerable_version_range": ">= 1.2.0, < 1.4.3", "vulnerable_functions": []},
+        ],
+    }
+
+
+def test_crawler_shaped_advisories_are_indexed():
+    index = VersionRanges.from_github_advisories([crawled({"ecosystem": "pip", "name": "Requests"})])
+    assert index.lookup("pypi", "requests", "1.3.0") == ["GHSA-aaaa-bbbb-cccc"]
+    assert index.lookup("python", "requests", "1.4.3") == []
+
+
+def test_legacy_ecosystem_only_package_is_skipped(capsys):
+    index = VersionRanges.from_github_advisories([crawled("pip")])
+    assert len(index) == 0
+    assert "without a package name" in capsys.readouterr().out
+
+
+def test_load_advisories_accepts_crawl_output(tmp_path):
+    path = tmp_path / "security_advisories.json"
+    path.write_text(json.dumps({
+        "owner/new": [crawled({"ecosystem": "npm", "name": "lodash"})],
+        "owner/old": [crawled("npm")],
+    }))
+    index = VersionRanges.load_advisories(str(path))
+    assert index.lookup("npm", "lodash", "1.2.0") == ["GHSA-aaaa-bbbb-cccc"]
+
+
+def test_prereleases_sort_before_the_release():
+    assert version_key("1.0rc1", "pypi") < version_key("1.0", "pypi")
+    assert version_key("1.0.0-rc.1", "npm") < version_key("1.0.0", "npm")
+    assert version_key("1.0.0-0.3.7", "npm") < version_key("1.0.0-alpha", "npm") < version_key("1.0.0", "npm")
+    # The precedence example of the semver spec
+    chain = ["1.0.0-alpha", "1.0.0-alpha.1", "1.0.0-alpha.beta", "1.0.0-beta", "1.0.0-beta.2", "1.0.0-beta.11", "1.0.0-rc.1", "1.0.0"]
+    assert all(version_key(a, "npm") < version_key(b, "npm") for a, b in zip(chain, chain[1:]))
+    assert version_key("2.0-beta", "maven") < version_key("2.0-RC1", "maven") < version_key("2.0", "maven")
+
+
+def test_post_releases_sort_after_the_release():
+    assert version_key("1.0", "pypi") < version_key("1.0.post1", "pypi") < version_key("1.0.1", "pypi")
+    assert version_key("1.0", "maven") < version_key("1.0-sp1", "maven")
+
+
+def test_trailing_zeros_are_equal():
+    assert version_key("1.0", "pypi") == version_key("1.0.0", "pypi")
+    assert version_key("v1", "npm") == version_key("1.0.0", "npm")
+    assert version_key("1.10", "npm") > version_key("1.9", "npm")
+
+
+def test_maven_components_match_by_purl():
+    index = VersionRanges.RangeIndex()
+    index.add_range("maven", "org.apache.logging.log4j:log4j-core", ">= 2.0-beta9, < 2.15.0", "GHSA-jfh8-c2jp-5v3q")
+    components = [
+        {"ecosystem": "maven", "name": "log4j-core", "version": "2.14.1",
+         "purl": "pkg:maven/org.apache.logging.log4j/log4j-core@2.14.1"},
+        {"ecosystem": "maven", "name": "log4j-core", "version": "2.15.0",
+         "purl": "pkg:maven/org.apache.logging.log4j/log4j-core@2.15.0"},
+    ]
+    assert index.match(components) == [(0, ["GHSA-jfh8-c2jp-5v3q"])]
+
+
+def test_alternatives_and_exact_versions():
+    intervals = VersionRanges.compile_range("< 1.0.5 || >= 2.0.0, < 2.1.1 || = 3.0.0", "npm")
+    key = lambda version: version_key(version, "npm")
+    assert [interval.contains(key("1.0.4")) for interval in intervals] == [True, False, False]
+    assert any(interval.contains(key("2.1.0")) for interval in intervals)
+    assert not any(interval.contains(key("2.1.1")) for interval in intervals)
+    assert any(interval.contains(key("3.0.0")) for interval in intervals)